@@ -0,0 +1,9 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Host-side benchmarks for the Network Studio Clock firmware libraries.
+
+Run from the repository root, e.g.:
+
+    python -m bench.mtcframecounter --output bench_output.txt
+"""
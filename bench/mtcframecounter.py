@@ -0,0 +1,345 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+MTCFrameCounter throughput and latency benchmark.
+
+Drives MTCFrameCounter with synthetic MTC streams
+at every MTC rate and in several transport patterns:
+- forward: plain playback
+- backward: reverse playback
+- shuttle: alternating forward and backward runs
+- locate: jumps to random positions, each announced by a Full Frame message
+- dropout: playback with lost Quarter Frames and short silences
+
+Through either input path:
+- raw: the firmware path, RawMTCInput bytes dispatched by the MIDIRouter (default)
+- adafruit: adafruit_midi message objects fed to MTCFrameCounter.midi()
+
+Reports as JSON, for each rate and pattern:
+- messages per second
+- per Quarter Frame processing time percentiles against the Quarter Frame period budget
+- bytes allocated per message
+- time to lock after the initial Full Frame message
+
+Figures are host (CPython) figures. Compare them between versions on the same machine and path.
+"""
+import argparse
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+from sim import mtc
+from midirouter import MIDIRouter  # Made importable by sim.mtc
+from mtcframecounter import MTCFrameCounter
+from rawmidi import RawMTCInput
+from timecode import FRAMERATES, Timecode
+
+RATE_NAMES = ('24', '25', '29.97DF', '30')
+PATTERNS = ('forward', 'backward', 'shuttle', 'locate', 'dropout')
+PATHS = ('raw', 'adafruit')
+PERCENTILES = (50, 90, 99, 99.9)
+
+SHUTTLE_FRAMES = 50  # Frames per shuttle run
+LOCATE_FRAMES = 40  # Frames played after each locate
+DROPOUT_RATE = 0.01  # Probability of losing a Quarter Frame
+GAP_INTERVAL = 2000  # ms between silences
+GAP_LENGTH = 6  # Quarter Frames lost per silence
+
+START = (1, 0, 0, 0)
+
+
+def _index(tc: (int, int, int, int), rate: int) -> int:
+    timecode = Timecode(rate)
+    timecode.set(*tc, rate=rate)
+    return timecode.index
+
+
+def _position(index: int, rate: int) -> (int, int, int, int):
+    timecode = Timecode(rate)
+    timecode.index = index
+    return timecode.hours, timecode.minutes, timecode.seconds, timecode.frames
+
+
+def _append(events: list, segment: list, offset: float) -> float:
+    """
+    Appends a stream segment at an offset in ms. Returns the offset following the segment.
+    """
+    if not segment:
+        return offset
+    for at, data in segment:
+        events.append((offset + at, data))
+    period = segment[1][0] - segment[0][0] if len(segment) > 1 else 0
+    return offset + segment[-1][0] + period
+
+
+def generate(pattern: str, rate: int, duration: float, seed: int = 0) -> [(float, bytes)]:
+    """
+    Generates a timed MTC stream for a pattern lasting about duration ms.
+    """
+    fps = FRAMERATES[rate]
+    frames = int(duration * fps / 1000)
+    rng = random.Random(seed)
+
+    if pattern == 'forward':
+        return mtc.stream(START, rate, frames)
+
+    if pattern == 'backward':
+        return mtc.stream((1, 0, 30, 0), rate, frames, direction=-1)
+
+    events = []
+    if pattern == 'shuttle':
+        offset = 0.0
+        position = _index(START, rate)
+        direction = 1
+        first = True
+        while len(events) < frames * 4:
+            segment = mtc.stream(_position(position, rate), rate, SHUTTLE_FRAMES, direction, with_full_frame=first)
+            offset = _append(events, segment, offset)
+            position += direction * SHUTTLE_FRAMES
+            direction = -direction
+            first = False
+        return events
+
+    if pattern == 'locate':
+        offset = 0.0
+        first = True
+        while len(events) < frames * 4:
+            if first:
+                position = START
+            else:
+                position = (rng.randrange(24), rng.randrange(60), rng.randrange(60), rng.randrange(int(fps)))
+            offset = _append(events, mtc.stream(position, rate, LOCATE_FRAMES), offset)
+            first = False
+        return events
+
+    if pattern == 'dropout':
+        gap = 0
+        next_gap = GAP_INTERVAL
+        for at, data in mtc.stream(START, rate, frames):
+            if at >= next_gap:
+                gap = GAP_LENGTH
+                next_gap += GAP_INTERVAL
+            if gap:
+                gap -= 1
+                continue
+            if data[0] == mtc.QUARTER_FRAME and rng.random() < DROPOUT_RATE:
+                continue
+            events.append((at, data))
+        return events
+
+    raise ValueError(f"Unknown pattern: {pattern}")
+
+
+class _Port:
+    """
+    A USB MIDI port stand-in holding one message at a time.
+    """
+
+    def __init__(self) -> None:
+        self.data = b''
+
+    def readinto(self, buf) -> int:
+        nbytes = len(self.data)
+        buf[:nbytes] = self.data
+        self.data = b''
+        return nbytes
+
+
+def counter_input(path: str) -> (MTCFrameCounter, object):
+    """
+    A new counter and the function feeding it a message through an input path.
+    """
+    counter = MTCFrameCounter()
+    if path == 'adafruit':
+        return counter, counter.midi
+
+    router = MIDIRouter()
+    counter.register(router)
+    port = _Port()
+    poll = RawMTCInput(port, router).poll
+
+    def feed(data: bytes, ts: int) -> None:
+        port.data = data
+        poll(ts)
+
+    return counter, feed
+
+
+def to_messages(events: [(float, bytes)], path: str) -> [(int, object)]:
+    """
+    Converts raw stream events to timestamped (ns) messages for an input path.
+    """
+    if path == 'raw':
+        return [(int(at * 1000000), data) for at, data in events]
+
+    from adafruit_midi.mtc_quarter_frame import MtcQuarterFrame
+    from adafruit_midi.system_exclusive import SystemExclusive
+
+    messages = []
+    for at, data in events:
+        if data[0] == mtc.QUARTER_FRAME:
+            msg = MtcQuarterFrame(data[1] >> 4, data[1] & 0x0F)
+        else:
+            # F0 7F <device> 01 01 hr mn sc fr F7
+            msg = SystemExclusive(data[1:2], data[2:-1])
+        messages.append((int(at * 1000000), msg))
+    return messages
+
+
+def _is_quarter_frame(msg) -> bool:
+    if isinstance(msg, bytes):
+        return msg[0] == mtc.QUARTER_FRAME
+    return msg.__class__.__name__ == 'MtcQuarterFrame'
+
+
+def percentile(values: [int], p: float) -> int:
+    """
+    Nearest-rank percentile of sorted values.
+    """
+    if not values:
+        return 0
+    rank = max(1, int(round(p / 100 * len(values) + 0.5)))
+    return values[min(rank, len(values)) - 1]
+
+
+def measure_throughput(messages: [(int, object)], repeat: int, path: str) -> float:
+    """
+    Best messages per second over repeated runs.
+    """
+    best = None
+    for _ in range(repeat):
+        _, midi = counter_input(path)
+        start = time.perf_counter_ns()
+        for ts, msg in messages:
+            midi(msg, ts)
+        elapsed = time.perf_counter_ns() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return len(messages) / (best / 1e9) if best else 0.0
+
+
+def measure_latency(messages: [(int, object)], budget: float, path: str) -> dict:
+    """
+    Per Quarter Frame processing time and time to lock after the initial Full Frame.
+    """
+    counter, midi = counter_input(path)
+    clock = time.perf_counter_ns
+    latencies = []
+    ff_ts = None
+    lock_ts = None
+    lock_messages = 0
+
+    for count, (ts, msg) in enumerate(messages):
+        start = clock()
+        midi(msg, ts)
+        elapsed = clock() - start
+        if _is_quarter_frame(msg):
+            latencies.append(elapsed)
+        elif ff_ts is None:
+            ff_ts = ts
+        if lock_ts is None and counter.locked:
+            lock_ts = ts
+            lock_messages = count
+
+    latencies.sort()
+    budget_ns = budget * 1e6
+    result = {
+        'quarter_frames': len(latencies),
+        'budget_ms': round(budget, 3),
+        'over_budget': sum(1 for latency in latencies if latency > budget_ns),
+        'max_us': round(latencies[-1] / 1000, 3) if latencies else 0,
+        'mean_us': round(sum(latencies) / len(latencies) / 1000, 3) if latencies else 0,
+        'locked': counter.locked,
+        'time_to_lock_ms': None,
+        'messages_to_lock': None,
+        'final_timecode': counter.timecode,
+    }
+    for p in PERCENTILES:
+        latency = percentile(latencies, p)
+        result[f'p{p:g}_us'] = round(latency / 1000, 3)
+        result[f'p{p:g}_budget_pct'] = round(latency / budget_ns * 100, 4)
+    if ff_ts is not None and lock_ts is not None:
+        result['time_to_lock_ms'] = round((lock_ts - ff_ts) / 1e6, 3)
+        result['messages_to_lock'] = lock_messages
+    return result
+
+
+def measure_allocations(messages: [(int, object)], path: str) -> dict:
+    """
+    Bytes allocated per message, transient (peak) and retained.
+    """
+    _, midi = counter_input(path)
+    transient = 0
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        for ts, msg in messages:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            midi(msg, ts)
+            transient += tracemalloc.get_traced_memory()[1] - before
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    return {
+        'alloc_bytes_per_msg': round(transient / len(messages), 3) if messages else 0,
+        'retained_bytes': retained,
+    }
+
+
+def run(duration: float, repeat: int, rates=range(len(RATE_NAMES)), patterns=PATTERNS, path: str = 'raw') -> dict:
+    """
+    Runs every benchmark and returns the results.
+    """
+    results = []
+    for rate in rates:
+        budget = 1000 / FRAMERATES[rate] / 4  # Quarter Frame period in ms
+        for pattern in patterns:
+            messages = to_messages(generate(pattern, rate, duration), path)
+            result = {
+                'rate': RATE_NAMES[rate],
+                'pattern': pattern,
+                'messages': len(messages),
+                'msgs_per_sec': round(measure_throughput(messages, repeat, path), 1),
+            }
+            result.update(measure_latency(messages, budget, path))
+            result.update(measure_allocations(messages, path))
+            results.append(result)
+
+    return {
+        'benchmark': 'mtcframecounter',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_implementation() + ' ' + platform.python_version(),
+        'machine': platform.machine(),
+        'path': path,
+        'duration_ms': duration,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MTCFrameCounter benchmark")
+    parser.add_argument('--duration', type=float, default=10000, help="stream length in ms")
+    parser.add_argument('--repeat', type=int, default=3, help="throughput runs, the best is kept")
+    parser.add_argument('--rate', choices=RATE_NAMES, action='append', help="only these rates")
+    parser.add_argument('--pattern', choices=PATTERNS, action='append', help="only these patterns")
+    parser.add_argument('--path', choices=PATHS, default='raw', help="input path, raw is the firmware's")
+    parser.add_argument('--output', help="write the JSON report to a file instead of stdout")
+    args = parser.parse_args()
+
+    rates = [RATE_NAMES.index(rate) for rate in args.rate] if args.rate else range(len(RATE_NAMES))
+    report = run(args.duration, args.repeat, rates, args.pattern or PATTERNS, args.path)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Host-side simulation harness for the Network Studio Clock firmware.
+
+Stand-ins for board, digitalio, displayio, rtc, supervisor, usb_midi, adafruit_ds3231
+and the MatrixPortal Network/NTP modules let src/code.py run unmodified under CPython
+against a virtual clock.
+
+    from sim import Simulator
+    from sim import mtc
+
+    sim = Simulator()
+    sim.send_midi_stream(1000, mtc.stream(start=(1, 0, 0, 0), frames=60))
+    sim.press('up', 3000)
+    sim.run(duration=5000)
+    print(sim.ascii())
+"""
+from sim.core import SimulationEnd, Simulator, VirtualClock
+
+__all__ = ['SimulationEnd', 'Simulator', 'VirtualClock']
@@ -0,0 +1,41 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Runs the firmware in the simulator and prints the final framebuffer.
+
+    python -m sim --duration 5000 --mtc 1000
+"""
+import argparse
+
+from sim import Simulator
+from sim import mtc
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Network Studio Clock simulator")
+    parser.add_argument('--duration', type=float, default=3000, help="virtual run time in ms")
+    parser.add_argument('--mtc', type=float, metavar='MS', help="start a 30 fps MTC stream at this time")
+    parser.add_argument('--mtc-frames', type=int, default=60, help="length of the MTC stream")
+    parser.add_argument('--midi-file', help="raw MIDI bytes file to play from the start")
+    parser.add_argument('--press', action='append', default=[], metavar='BUTTON@MS',
+                        help="press 'up' or 'down' at a time, e.g. down@1500")
+    parser.add_argument('--no-wifi', action='store_true', help="make the access point unreachable")
+    args = parser.parse_args()
+
+    sim = Simulator(wifi=not args.no_wifi)
+    if args.mtc is not None:
+        sim.send_midi_stream(args.mtc, mtc.stream(start=(1, 0, 0, 0), frames=args.mtc_frames))
+    if args.midi_file:
+        sim.send_midi_file(0, args.midi_file)
+    for press in args.press:
+        button, at = press.split('@')
+        sim.press(button, float(at))
+
+    sim.run(args.duration)
+
+    print(f"--- {sim.now_ms:.1f} ms, {sim.passes} scheduler passes ---")
+    print(sim.ascii())
+
+
+if __name__ == '__main__':
+    main()
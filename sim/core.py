@@ -0,0 +1,328 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Host-side simulation of the Network Studio Clock firmware.
+
+Runs src/code.py unmodified under CPython with stand-in hardware modules and a virtual clock.
+"""
+
+import asyncio
+import builtins
+import calendar
+import heapq
+import os
+import runpy
+import selectors
+import sys
+import time
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+FAKES_DIR = os.path.join(SIM_DIR, 'fakes')
+SRC_DIR = os.path.join(os.path.dirname(SIM_DIR), 'src')
+
+TICKS_PERIOD = 1 << 29  # supervisor.ticks_ms() wraps around
+
+# Hardware stand-ins
+FAKE_MODULES = (
+    'adafruit_ds3231',
+    'adafruit_esp32spi',
+    'adafruit_esp32spi.adafruit_esp32spi',
+    'adafruit_matrixportal',
+    'adafruit_matrixportal.matrix',
+    'adafruit_matrixportal.network',
+    'adafruit_ntp',
+    'bitmaptools',
+    'board',
+    'busio',
+    'digitalio',
+    'displayio',
+    'fontio',
+    'micropython',
+    'rtc',
+    'supervisor',
+    'usb_midi',
+)
+
+current = None  # The running Simulator, used by the fake modules
+
+
+class SimulationEnd(BaseException):
+    """
+    Raised from the virtual clock when the simulated duration is over.
+
+    Derives from BaseException so that the firmware error handling does not catch it.
+    """
+
+
+class VirtualClock:
+    """
+    Monotonic time that only moves when told to.
+    """
+
+    def __init__(self, start_ns: int = 0) -> None:
+        self.ns: int = start_ns
+
+    def monotonic_ns(self) -> int:
+        return self.ns
+
+    def monotonic(self) -> float:
+        return self.ns / 1e9
+
+    def ticks_ms(self) -> int:
+        return (self.ns // 1000000) % TICKS_PERIOD
+
+    def advance(self, ns: int) -> None:
+        self.ns += ns
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """
+    Makes asyncio waits advance the virtual clock instead of blocking.
+    """
+
+    def __init__(self, simulator: 'Simulator') -> None:
+        super().__init__()
+        self._sim = simulator
+
+    def select(self, timeout=None):
+        ready = super().select(0)  # Only the event loop self-pipe is registered
+        self._sim.wait(None if timeout is None else int(timeout * 1e9))
+        return ready
+
+
+class _VirtualEventLoopPolicy(asyncio.DefaultEventLoopPolicy):
+    def __init__(self, simulator: 'Simulator') -> None:
+        super().__init__()
+        self._sim = simulator
+
+    def new_event_loop(self):
+        return asyncio.SelectorEventLoop(_VirtualSelector(self._sim))
+
+
+class Simulator:
+    """
+    Simulates the MatrixPortal M4 running the firmware.
+
+    Events (MIDI input, button presses, anything callable) are scheduled on the virtual timeline
+    and fired as the firmware main loop makes the virtual clock advance.
+    Every scheduler pass costs pass_cost nanoseconds of virtual time.
+    """
+
+    WIDTH = 64
+    HEIGHT = 32
+
+    def __init__(
+            self,
+            root: str = SRC_DIR,
+            wall_time=(2022, 1, 1, 12, 0, 0),
+            pass_cost: int = 50000,
+            wifi: bool = True,
+            secrets: dict = None,
+    ) -> None:
+        self.root = root
+        self.clock = VirtualClock()
+        self.pass_cost = pass_cost  # ns
+
+        # Wall clock: UTC seconds at virtual time 0
+        self.wall_epoch: int = calendar.timegm(tuple(wall_time) + (0, 0, 0))
+        self.ds3231_offset: int = 0  # Seconds from the true wall clock
+        self.rtc_offset: int = 0
+
+        # Network
+        self.wifi = wifi  # Access point reachable
+        self.wifi_connect_delay: int = 2000  # ms
+        self.ntp_available: bool = True
+        self.secrets = secrets or {'ssid': 'sim', 'password': 'sim', 'timezone': 'Etc/UTC'}
+
+        # Hardware state, populated by the fake modules
+        self.buttons = {'BUTTON_UP': True, 'BUTTON_DOWN': True}  # Pulled up: True is released
+        self.midi_in = bytearray()
+        self.midi_out = bytearray()
+        self.display = None
+
+        self.passes: int = 0
+        self.longest_sleep: int = 0  # ns, longest blocking time.sleep() call: no task ran meanwhile
+        self.namespace: dict = {}  # The firmware globals after the run
+
+        self._events = []
+        self._seq = 0
+        self._until = None
+        self._ended = False
+
+    # Timeline --------------------------------------------------------------
+
+    @property
+    def now_ms(self) -> float:
+        return self.clock.ns / 1e6
+
+    @property
+    def wall_time(self) -> int:
+        """
+        True UTC wall clock seconds
+        """
+        return self.wall_epoch + self.clock.ns // 1000000000
+
+    def at(self, ms: float, action, *args) -> None:
+        """
+        Schedules a callable at a virtual time in milliseconds.
+        """
+        heapq.heappush(self._events, (int(ms * 1e6), self._seq, action, args))
+        self._seq += 1
+
+    def _fire(self) -> None:
+        while self._events and self._events[0][0] <= self.clock.ns:
+            _, _, action, args = heapq.heappop(self._events)
+            action(*args)
+
+    def wait(self, ns) -> None:
+        """
+        One scheduler pass, sleeping for up to ns nanoseconds.
+        """
+        self.passes += 1
+        step = self.pass_cost
+        if ns is None:
+            ns = (self._until - self.clock.ns) if self._until is not None else step
+        if ns > step:
+            # Do not sleep past the next event
+            if self._events and self._events[0][0] - self.clock.ns < ns:
+                ns = max(self._events[0][0] - self.clock.ns, step)
+            step = ns
+        self.clock.advance(step)
+        self._fire()
+        if self._until is not None and self.clock.ns >= self._until and not self._ended:
+            self._ended = True
+            raise SimulationEnd
+
+    def sleep(self, secs: float) -> None:
+        # Blocking: timed events still happen (e.g. MIDI input piling up) but no task runs
+        ns = int(secs * 1e9)
+        if ns > self.longest_sleep:
+            self.longest_sleep = ns
+        until = self.clock.ns + ns
+        while self.clock.ns < until:
+            self.wait(until - self.clock.ns)
+
+    # Inputs ----------------------------------------------------------------
+
+    def send_midi(self, ms: float, data: bytes) -> None:
+        """
+        Delivers MIDI bytes to the USB MIDI input at a virtual time.
+        """
+        self.at(ms, self.midi_in.extend, bytes(data))
+
+    def send_midi_stream(self, ms: float, events) -> None:
+        """
+        Delivers (offset ms, bytes) pairs starting at a virtual time.
+        """
+        for offset, data in events:
+            self.send_midi(ms + offset, data)
+
+    def send_midi_file(self, ms: float, path: str, bytes_per_ms: float = 3.125) -> None:
+        """
+        Delivers a raw MIDI byte stream from a file, paced like a 31250 baud DIN MIDI link by default.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        chunk = max(1, int(bytes_per_ms))
+        for i in range(0, len(data), chunk):
+            self.send_midi(ms + i / bytes_per_ms, data[i:i + chunk])
+
+    def press(self, button: str, ms: float, duration: float = 100) -> None:
+        """
+        Presses 'up' or 'down' at a virtual time for a duration in ms.
+        """
+        pin = 'BUTTON_' + button.upper()
+        self.at(ms, self.buttons.__setitem__, pin, False)
+        self.at(ms + duration, self.buttons.__setitem__, pin, True)
+
+    # Outputs ---------------------------------------------------------------
+
+    @staticmethod
+    def firmware() -> dict:
+        """
+        The globals of the running firmware, e.g. from a timed action.
+        """
+        return vars(sys.modules['__main__'])
+
+    def snapshot(self) -> [[int]]:
+        """
+        Renders the 64x32 framebuffer as rows of 0xRRGGBB colors.
+        """
+        return self.display.render()
+
+    def ascii(self) -> str:
+        """
+        Renders the framebuffer as text. Lit pixels are '#'.
+        """
+        return '\n'.join(''.join('#' if pixel else '.' for pixel in row) for row in self.snapshot())
+
+    # Run -------------------------------------------------------------------
+
+    def _open(self, file, *args, **kwargs):
+        # The firmware addresses the CIRCUITPY drive root with absolute paths
+        if isinstance(file, str) and file.startswith('/') and not os.path.exists(file):
+            mapped = os.path.join(self.root, file.lstrip('/'))
+            if os.path.exists(mapped) or args and 'w' in args[0]:
+                file = mapped
+        return self._builtin_open(file, *args, **kwargs)
+
+    def run(self, duration: float, script: str = 'code.py') -> dict:
+        """
+        Runs the firmware for a virtual duration in ms.
+
+        Returns the firmware globals.
+        """
+        global current
+        current = self
+        self._until = self.clock.ns + int(duration * 1e6)
+        self._ended = False
+
+        loaded_modules = set(sys.modules)
+        saved_modules = {
+            name: sys.modules.pop(name) for name in list(sys.modules)
+            if name in FAKE_MODULES or name == 'secrets'
+        }
+        saved_path = list(sys.path)
+        saved_time = (time.monotonic_ns, time.monotonic, time.sleep)
+        saved_policy = asyncio.get_event_loop_policy()
+        self._builtin_open = builtins.open
+
+        secrets_module = type(sys)('secrets')
+        secrets_module.secrets = self.secrets
+        sys.modules['secrets'] = secrets_module
+        sys.path[:0] = [FAKES_DIR, self.root, os.path.join(self.root, 'libs')]
+        time.monotonic_ns = self.clock.monotonic_ns
+        time.monotonic = self.clock.monotonic
+        time.sleep = self.sleep
+        builtins.open = self._open
+        asyncio.set_event_loop_policy(_VirtualEventLoopPolicy(self))
+
+        namespace = {}
+        try:
+            namespace = runpy.run_path(os.path.join(self.root, script), run_name='__main__')
+        except SimulationEnd:
+            namespace = self._main_globals()
+        finally:
+            asyncio.set_event_loop_policy(saved_policy)
+            builtins.open = self._builtin_open
+            time.monotonic_ns, time.monotonic, time.sleep = saved_time
+            sys.path[:] = saved_path
+            # Forget everything the firmware imported so that the next run starts fresh
+            for name in set(sys.modules) - loaded_modules:
+                del sys.modules[name]
+            sys.modules.update(saved_modules)
+            current = None
+
+        self.namespace = namespace
+        return namespace
+
+    @staticmethod
+    def _main_globals() -> dict:
+        # runpy does not return the globals when the script raised: find them in the traceback
+        tb = sys.exc_info()[2]
+        namespace = {}
+        while tb is not None:
+            if tb.tb_frame.f_globals.get('__name__') == '__main__':
+                namespace = tb.tb_frame.f_globals
+            tb = tb.tb_next
+        return namespace
@@ -0,0 +1,32 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Simulated DS3231 precision RTC, following the virtual clock.
+"""
+import calendar
+import time
+
+from sim import core
+
+
+class DS3231:
+    def __init__(self, i2c) -> None:
+        self.i2c = i2c
+        self.lost_power = False
+        self.calibration = 0
+        self.reads = 0
+
+    @property
+    def datetime(self) -> time.struct_time:
+        sim = core.current
+        self.reads += 1
+        return time.gmtime(sim.wall_time + sim.ds3231_offset)
+
+    @datetime.setter
+    def datetime(self, value) -> None:
+        sim = core.current
+        sim.ds3231_offset = calendar.timegm(tuple(value)[:6] + (0, 0, 0)) - sim.wall_time
+
+    @property
+    def temperature(self) -> float:
+        return 25.0
@@ -0,0 +1,52 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Simulated ESP32 co-processor driver.
+"""
+import time
+
+from sim import core
+
+
+class ESP_SPIcontrol:
+    firmware_version = b'1.7.4\x00'
+    MAC_address_actual = b'\x24\x0a\xc4\x00\x00\x01'
+    rssi = -50
+
+    def __init__(self, spi, cs_dio, ready_dio, reset_dio, gpio0_dio=None, *, debug=False) -> None:
+        self._reset = reset_dio
+        self._connect_ns = None
+        self.connects = 0
+        self.reset()
+
+    def reset(self) -> None:
+        # Blocks like the real driver
+        self._reset.value = False
+        time.sleep(0.01)
+        self._reset.value = True
+        time.sleep(0.75)
+
+    @property
+    def is_connected(self) -> bool:
+        sim = core.current
+        return (
+                sim.wifi
+                and self._connect_ns is not None
+                and sim.clock.ns >= self._connect_ns + sim.wifi_connect_delay * 1000000
+        )
+
+    def wifi_set_passphrase(self, ssid, passphrase) -> None:
+        self.connects += 1
+        self._connect_ns = core.current.clock.ns
+
+    def connect_AP(self, ssid, password, timeout_s: int = 10) -> int:
+        self.wifi_set_passphrase(ssid, password)
+        time.sleep(core.current.wifi_connect_delay / 1000)
+        if not self.is_connected:
+            raise ConnectionError("No such ssid", ssid)
+        return 3
+
+    def get_time(self) -> tuple:
+        if not self.is_connected:
+            raise ValueError("Error getting time")
+        return (core.current.wall_time,)
@@ -0,0 +1,14 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Simulated RGB matrix, rendering into an in-memory framebuffer.
+"""
+from displayio import Display
+from sim import core
+
+
+class Matrix:
+    def __init__(self, *, width: int = 64, height: int = 32, bit_depth: int = 2, alt_addr_pins=None,
+                 color_order: str = 'RGB', serpentine: bool = True, tile_rows: int = 1, rotation: int = 0) -> None:
+        self.display = Display(width, height)
+        core.current.display = self.display
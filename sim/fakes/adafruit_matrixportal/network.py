@@ -0,0 +1,56 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Simulated MatrixPortal networking through the ESP32 co-processor.
+"""
+import time
+
+import board
+import busio
+import rtc
+from adafruit_esp32spi.adafruit_esp32spi import ESP_SPIcontrol
+from digitalio import DigitalInOut
+from sim import core
+
+
+class _WiFi:
+    def __init__(self, esp=None, external_spi=None) -> None:
+        if esp is None:
+            # Resets the co-processor, blocking
+            esp = ESP_SPIcontrol(
+                external_spi or busio.SPI(board.SCK, board.MOSI, board.MISO),
+                DigitalInOut(board.ESP_CS),
+                DigitalInOut(board.ESP_BUSY),
+                DigitalInOut(board.ESP_RESET),
+                DigitalInOut(board.ESP_GPIO0),
+            )
+        self.esp = esp
+
+    @property
+    def is_connected(self) -> bool:
+        return self.esp.is_connected
+
+
+class Network:
+    def __init__(self, status_neopixel=None, esp=None, external_spi=None, extract_values=True, debug=False) -> None:
+        self._wifi = _WiFi(esp, external_spi)
+        self._debug = debug
+
+    @property
+    def ip_address(self) -> str:
+        return '192.168.0.42' if self._wifi.is_connected else '0.0.0.0'
+
+    def connect(self, max_attempts: int = 10) -> None:
+        secrets = core.current.secrets
+        for _ in range(max_attempts):
+            try:
+                self._wifi.esp.connect_AP(secrets['ssid'], secrets['password'])
+                return
+            except ConnectionError as error:
+                print("Could not connect to internet", error)
+                time.sleep(1)
+
+    def get_local_time(self, location=None) -> None:
+        if not self._wifi.is_connected:
+            self.connect()
+        rtc.RTC().datetime = time.gmtime(core.current.wall_time)
@@ -0,0 +1,23 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Simulated ESP32SPI NTP client.
+"""
+import time
+
+import rtc
+from sim import core
+
+
+class NTP:
+    def __init__(self, esp, debug: bool = False) -> None:
+        self._esp = esp
+        self.valid_time = False
+
+    def set_time(self, tz_offset: int = 0) -> None:
+        sim = core.current
+        if not (self._esp.is_connected and sim.ntp_available):
+            self.valid_time = False
+            return
+        rtc.RTC().datetime = time.gmtime(sim.wall_time + tz_offset)
+        self.valid_time = True
@@ -0,0 +1,40 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Simulated bitmaptools. Only what the firmware and the Adafruit libraries use.
+"""
+
+
+def readinto(
+        bitmap,
+        file,
+        bits_per_pixel: int,
+        element_size: int = 1,
+        reverse_pixels_in_element: bool = False,
+        swap_bytes_in_element: bool = False,
+        reverse_rows: bool = False,
+) -> None:
+    """
+    Reads bitmap.height rows of packed pixels, each padded to a multiple of element_size bytes.
+
+    Pixels are taken from the least significant bits first unless reverse_pixels_in_element is set.
+    """
+    if 8 % bits_per_pixel:
+        raise NotImplementedError("Only 1, 2, 4 or 8 bits per pixel are simulated")
+    per_byte = 8 // bits_per_pixel
+    mask = (1 << bits_per_pixel) - 1
+    row_bits = bitmap.width * bits_per_pixel
+    row_bytes = (row_bits + 8 * element_size - 1) // (8 * element_size) * element_size
+    for row in range(bitmap.height):
+        data = bytearray(file.read(row_bytes))
+        if len(data) < row_bytes:
+            raise EOFError("Read past the end of the file")
+        if swap_bytes_in_element:
+            for start in range(0, row_bytes, element_size):
+                data[start:start + element_size] = data[start:start + element_size][::-1]
+        y = bitmap.height - 1 - row if reverse_rows else row
+        for x in range(bitmap.width):
+            slot = x % per_byte
+            if reverse_pixels_in_element:
+                slot = per_byte - 1 - slot
+            bitmap[x, y] = (data[x // per_byte] >> (slot * bits_per_pixel)) & mask
@@ -0,0 +1,41 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Simulated board pins and buses.
+"""
+
+
+class Pin:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"board.{self.name}"
+
+
+BUTTON_UP = Pin('BUTTON_UP')
+BUTTON_DOWN = Pin('BUTTON_DOWN')
+
+# ESP32 co-processor
+ESP_BUSY = Pin('ESP_BUSY')
+ESP_CS = Pin('ESP_CS')
+ESP_GPIO0 = Pin('ESP_GPIO0')
+ESP_RESET = Pin('ESP_RESET')
+SCK = Pin('SCK')
+MOSI = Pin('MOSI')
+MISO = Pin('MISO')
+
+
+class _I2C:
+    def try_lock(self) -> bool:
+        return True
+
+    def unlock(self) -> None:
+        pass
+
+    def deinit(self) -> None:
+        pass
+
+
+def I2C() -> _I2C:
+    return _I2C()
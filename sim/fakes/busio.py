@@ -0,0 +1,13 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Simulated buses.
+"""
+
+
+class SPI:
+    def __init__(self, clock, MOSI=None, MISO=None) -> None:
+        self._pins = (clock, MOSI, MISO)
+
+    def deinit(self) -> None:
+        pass
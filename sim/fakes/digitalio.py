@@ -0,0 +1,45 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Simulated digital pins. Inputs read the simulator buttons state.
+"""
+from sim import core
+
+
+class Direction:
+    INPUT = 'INPUT'
+    OUTPUT = 'OUTPUT'
+
+
+class Pull:
+    UP = 'UP'
+    DOWN = 'DOWN'
+
+
+class DigitalInOut:
+    def __init__(self, pin) -> None:
+        self._pin = pin
+        self.direction = Direction.INPUT
+        self.pull = None
+        self._value = False
+
+    @property
+    def value(self) -> bool:
+        if self.direction == Direction.INPUT:
+            return core.current.buttons.get(self._pin.name, self.pull == Pull.UP)
+        return self._value
+
+    @value.setter
+    def value(self, value: bool) -> None:
+        self._value = value
+
+    def switch_to_output(self, value: bool = False, drive_mode=None) -> None:
+        self.direction = Direction.OUTPUT
+        self._value = value
+
+    def switch_to_input(self, pull=None) -> None:
+        self.direction = Direction.INPUT
+        self.pull = pull
+
+    def deinit(self) -> None:
+        pass
@@ -0,0 +1,224 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Simulated displayio with in-memory bitmaps and a software compositor.
+"""
+from array import array
+
+
+class Bitmap:
+    def __init__(self, width: int, height: int, value_count: int) -> None:
+        self.width = width
+        self.height = height
+        self.value_count = value_count
+        self._data = array('H', [0] * (width * height))
+        self.writes = 0  # Pixel writes, to measure drawing work
+
+    def _index(self, key) -> int:
+        if isinstance(key, tuple):
+            x, y = key
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise IndexError("pixel coordinates out of bounds")
+            return y * self.width + x
+        return key
+
+    def __getitem__(self, key) -> int:
+        return self._data[self._index(key)]
+
+    def __setitem__(self, key, value: int) -> None:
+        if not 0 <= value < self.value_count:
+            raise ValueError("pixel value out of range")
+        self._data[self._index(key)] = value
+        self.writes += 1
+
+    def fill(self, value: int) -> None:
+        for i in range(len(self._data)):
+            self._data[i] = value
+        self.writes += len(self._data)
+
+    def blit(self, x: int, y: int, source_bitmap: 'Bitmap', *, x1: int = 0, y1: int = 0,
+             x2: int = None, y2: int = None, skip_index: int = None) -> None:
+        x2 = source_bitmap.width if x2 is None else x2
+        y2 = source_bitmap.height if y2 is None else y2
+        for sy in range(y1, y2):
+            for sx in range(x1, x2):
+                value = source_bitmap[sx, sy]
+                if value == skip_index:
+                    continue
+                dx = x + sx - x1
+                dy = y + sy - y1
+                if 0 <= dx < self.width and 0 <= dy < self.height:
+                    self._data[dy * self.width + dx] = value
+                    self.writes += 1
+
+    def dirty(self, x1: int = 0, y1: int = 0, x2: int = None, y2: int = None) -> None:
+        pass
+
+
+class Palette:
+    def __init__(self, color_count: int) -> None:
+        self._colors = [0] * color_count
+        self._transparent = [False] * color_count
+
+    def __len__(self) -> int:
+        return len(self._colors)
+
+    def __getitem__(self, index: int) -> int:
+        return self._colors[index]
+
+    def __setitem__(self, index: int, value) -> None:
+        if not isinstance(value, int):
+            value = (value[0] << 16) | (value[1] << 8) | value[2]
+        self._colors[index] = value
+
+    def make_transparent(self, index: int) -> None:
+        self._transparent[index] = True
+
+    def make_opaque(self, index: int) -> None:
+        self._transparent[index] = False
+
+    def is_transparent(self, index: int) -> bool:
+        return self._transparent[index]
+
+
+class TileGrid:
+    def __init__(self, bitmap: Bitmap, *, pixel_shader: Palette, width: int = 1, height: int = 1,
+                 tile_width: int = None, tile_height: int = None, default_tile: int = 0,
+                 x: int = 0, y: int = 0) -> None:
+        self.bitmap = bitmap
+        self.pixel_shader = pixel_shader
+        self.width = width
+        self.height = height
+        self.tile_width = bitmap.width if tile_width is None else tile_width
+        self.tile_height = bitmap.height if tile_height is None else tile_height
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self._tiles = bytearray([default_tile] * (width * height))
+
+    def _index(self, key) -> int:
+        if isinstance(key, tuple):
+            return key[1] * self.width + key[0]
+        return key
+
+    def __getitem__(self, key) -> int:
+        return self._tiles[self._index(key)]
+
+    def __setitem__(self, key, tile: int) -> None:
+        self._tiles[self._index(key)] = tile
+
+    def _draw(self, frame, x: int, y: int, scale: int) -> None:
+        palette = self.pixel_shader
+        bitmap = self.bitmap
+        tw = self.tile_width
+        th = self.tile_height
+        tiles_per_row = bitmap.width // tw
+        x += self.x * scale
+        y += self.y * scale
+        for cy in range(self.height):
+            for cx in range(self.width):
+                tile = self._tiles[cy * self.width + cx]
+                sx = (tile % tiles_per_row) * tw
+                sy = (tile // tiles_per_row) * th
+                for py in range(th):
+                    for px in range(tw):
+                        value = bitmap[sx + px, sy + py]
+                        if palette.is_transparent(value):
+                            continue
+                        color = palette[value]
+                        for oy in range(scale):
+                            fy = y + (cy * th + py) * scale + oy
+                            if not 0 <= fy < len(frame):
+                                continue
+                            row = frame[fy]
+                            for ox in range(scale):
+                                fx = x + (cx * tw + px) * scale + ox
+                                if 0 <= fx < len(row):
+                                    row[fx] = color
+
+
+class Group:
+    def __init__(self, *, scale: int = 1, x: int = 0, y: int = 0) -> None:
+        self.scale = scale
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self._layers = []
+
+    def append(self, layer) -> None:
+        if layer in self._layers:
+            raise ValueError("Layer already in a group")
+        self._layers.append(layer)
+
+    def insert(self, index: int, layer) -> None:
+        self._layers.insert(index, layer)
+
+    def remove(self, layer) -> None:
+        self._layers.remove(layer)
+
+    def pop(self, index: int = -1):
+        return self._layers.pop(index)
+
+    def index(self, layer) -> int:
+        return self._layers.index(layer)
+
+    def __len__(self) -> int:
+        return len(self._layers)
+
+    def __getitem__(self, index: int):
+        return self._layers[index]
+
+    def __setitem__(self, index: int, layer) -> None:
+        self._layers[index] = layer
+
+    def __contains__(self, layer) -> bool:
+        return layer in self._layers
+
+    def _draw(self, frame, x: int, y: int, scale: int) -> None:
+        x += self.x * scale
+        y += self.y * scale
+        scale *= self.scale
+        for layer in self._layers:
+            if not layer.hidden:
+                layer._draw(frame, x, y, scale)
+
+
+class Display:
+    """
+    The framebuffer display behind the matrix.
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.brightness = 1.0
+        self.auto_refresh = True
+        self.root_group = None
+        self.refreshes = 0
+        self._frame = None  # Last refreshed frame
+
+    def show(self, group: Group) -> None:
+        self.root_group = group
+
+    def refresh(self, *, target_frames_per_second: int = None, minimum_frames_per_second: int = 0) -> bool:
+        self.refreshes += 1
+        self._frame = self._compose()
+        return True
+
+    def render(self) -> [[int]]:
+        """
+        What the matrix shows: the live groups under auto refresh, the last refreshed frame otherwise.
+        """
+        if self.auto_refresh or self._frame is None:
+            return self._compose()
+        return [list(row) for row in self._frame]
+
+    def _compose(self) -> [[int]]:
+        frame = [[0] * self.width for _ in range(self.height)]
+        if self.root_group is not None and self.brightness and not self.root_group.hidden:
+            self.root_group._draw(frame, 0, 0, 1)
+        return frame
+
+
+def release_displays() -> None:
+    pass
@@ -0,0 +1,8 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Font glyph metrics, as used by adafruit_bitmap_font.
+"""
+from collections import namedtuple
+
+Glyph = namedtuple('Glyph', ('bitmap', 'tile_index', 'width', 'height', 'dx', 'dy', 'shift_x', 'shift_y'))
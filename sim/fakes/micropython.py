@@ -0,0 +1,9 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+MicroPython built-ins used by the Adafruit libraries.
+"""
+
+
+def const(value):
+    return value
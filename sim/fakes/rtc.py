@@ -0,0 +1,27 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Simulated microcontroller RTC, following the virtual clock.
+"""
+import calendar
+import time
+
+from sim import core
+
+
+class RTC:
+    calibration = 0
+
+    @property
+    def datetime(self) -> time.struct_time:
+        sim = core.current
+        return time.gmtime(sim.wall_time + sim.rtc_offset)
+
+    @datetime.setter
+    def datetime(self, value) -> None:
+        sim = core.current
+        sim.rtc_offset = calendar.timegm(tuple(value)[:6] + (0, 0, 0)) - sim.wall_time
+
+
+def set_time_source(source) -> None:
+    pass
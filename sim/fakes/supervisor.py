@@ -0,0 +1,21 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Simulated supervisor, driven by the virtual clock.
+"""
+from sim import core
+
+
+def ticks_ms() -> int:
+    return core.current.clock.ticks_ms()
+
+
+class _Runtime:
+    serial_connected = True
+
+    @property
+    def serial_bytes_available(self) -> bool:
+        return False
+
+
+runtime = _Runtime()
@@ -0,0 +1,35 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Simulated USB MIDI ports, fed from the simulator timeline.
+"""
+from sim import core
+
+
+class PortIn:
+    def read(self, nbytes: int = None) -> bytes:
+        pending = core.current.midi_in
+        if nbytes is None:
+            nbytes = len(pending)
+        data = bytes(pending[:nbytes])
+        del pending[:nbytes]
+        return data
+
+    def readinto(self, buf, nbytes: int = None) -> int:
+        pending = core.current.midi_in
+        if nbytes is None:
+            nbytes = len(buf)
+        nbytes = min(nbytes, len(pending))
+        buf[:nbytes] = pending[:nbytes]
+        del pending[:nbytes]
+        return nbytes
+
+
+class PortOut:
+    def write(self, buf, nbytes: int = None) -> int:
+        data = bytes(buf if nbytes is None else buf[:nbytes])
+        core.current.midi_out.extend(data)
+        return len(data)
+
+
+ports = (PortIn(), PortOut())
@@ -0,0 +1,67 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Synthetic MIDI Time Code streams.
+"""
+import os
+import sys
+
+from sim.core import SRC_DIR
+
+sys.path.insert(0, os.path.join(SRC_DIR, 'libs'))
+
+from timecode import FRAMERATES, Timecode  # noqa: E402 (firmware module)
+
+QUARTER_FRAME = 0xF1
+
+
+def full_frame(hours: int, minutes: int, seconds: int, frames: int, rate: int, device: int = 0x7F) -> bytes:
+    """
+    An MTC Full Frame SysEx message.
+    """
+    return bytes((0xF0, 0x7F, device, 0x01, 0x01, (rate << 5) | hours, minutes, seconds, frames, 0xF7))
+
+
+def quarter_frames(hours: int, minutes: int, seconds: int, frames: int, rate: int) -> [bytes]:
+    """
+    The 8 MTC Quarter Frame messages describing a time, in forward order.
+    """
+    values = (
+        frames & 0x0F, frames >> 4,
+        seconds & 0x0F, seconds >> 4,
+        minutes & 0x0F, minutes >> 4,
+        hours & 0x0F, (hours >> 4) | (rate << 1),
+    )
+    return [bytes((QUARTER_FRAME, (qf_type << 4) | value)) for qf_type, value in enumerate(values)]
+
+
+def stream(start=(0, 0, 0, 0), rate: int = 3, frames: int = 30, direction: int = 1, fps: float = None,
+           with_full_frame: bool = True) -> [(float, bytes)]:
+    """
+    A timed MTC stream as (offset ms, message bytes) pairs.
+
+    Runs for a number of frames (rounded up to pairs, each QF sequence spans 2 frames)
+    at the nominal rate unless an actual fps is given (e.g. pull-down).
+    Backward streams send each sequence in reverse order.
+    """
+    fps = FRAMERATES[rate] if fps is None else fps
+    qf_period = 1000 / fps / 4
+    tc = Timecode(rate)
+    tc.set(*start, rate=rate)
+
+    events = []
+    offset = 0.0
+    if with_full_frame:
+        events.append((offset, full_frame(tc.hours, tc.minutes, tc.seconds, tc.frames, rate)))
+        offset += qf_period
+
+    for _ in range((frames + 1) // 2):
+        sequence = quarter_frames(tc.hours, tc.minutes, tc.seconds, tc.frames, rate)
+        if direction < 0:
+            sequence.reverse()
+        for message in sequence:
+            events.append((offset, message))
+            offset += qf_period
+        tc.add(2 * direction)
+
+    return events
@@ -15,10 +15,12 @@ Runs on MatrixPortal M4.
 - [ ] Timezone/DST support (Using http://worldtimeapi.org ?)
 """
 
-import gc
-import math
 import time
 
+BOOT_START = time.monotonic_ns()  # Before anything else, for the boot stages
+
+import gc
+
 # import adafruit_requests as requests
 import board
 import digitalio
@@ -27,18 +29,32 @@ import rtc
 import supervisor
 import usb_midi
 
-import adafruit_ds3231
-from adafruit_bitmap_font import bitmap_font
 from adafruit_debouncer import Debouncer
-from adafruit_display_text.label import Label
 from adafruit_matrixportal.matrix import Matrix
-from adafruit_matrixportal.network import Network
-from adafruit_midi import MIDI
-from adafruit_ntp import NTP
+from beatclock import BeatClock
+from bootstages import FIRST_FRAME, MIDI_READY, BootStages
+from clockscheduler import ClockScheduler
+from gcscheduler import GCScheduler
+from glyphcells import GlyphCells, GlyphSheet
+from hui import HUIDecoder, HUIDisplay
+from mcu import MCUDecoder, MCUDisplay
+import instrument
+from midiingest import MIDIIngest
+from midirouter import MIDIRouter
 from mtcframecounter import MTCFrameCounter
+from rawmidi import RawMTCInput
+from refreshcontroller import RefreshController
+from runtime import PRIORITY_BUTTONS, PRIORITY_DISPLAY, PRIORITY_MIDI, PRIORITY_SYNC, Runtime
+from statusoverlay import LOCKED, RUNNING, STOPPED, StatusOverlay
+from timecode import RATE_NAMES
+from timesync import TimeSync
+from viewmanager import ViewManager
 
 DEBUG = False
 
+boot = BootStages(BOOT_START)
+boot.mark('imports')
+
 gc.collect()
 #if DEBUG:
 #    print("DEBUG: free memory after imports", gc.mem_free())
@@ -56,7 +72,7 @@ except ImportError:
 
 # CONFIGURABLE SETTINGS ----------------------------------------------------
 
-MODE = 'Clock'  # Preferred mode at bootup. Allowed values: 'Clock', 'MTC'.
+MODE = 'Clock'  # Preferred mode at bootup. Allowed values: 'Clock', 'MTC', 'HUI', 'MCU', 'Beats'.
 TWENTYFOURHOURS = True
 SHOWSECONDS = True
 BLINK = True
@@ -64,9 +80,23 @@ SUMMER_TIME = False
 TZ_OFFSET = 1  # Hours
 USENTP = True  # Uses adafruit.io otherwise
 UPDATEINTERVAL = 60 * 60 * 24  # Retrieve time from the Internet every [n] seconds
+RTC_ANCHOR_INTERVAL = 60 * 60  # Re-read the hardware RTC every [n] seconds. Interpolated in between.
 # CALIBRATION = -127  # FIXME: doesn’t work with microcontroller clock. Report
 USB_MIDI_CHANNEL = 1  # 1-16
+MIDI_PARSER = 'raw'  # Allowed values: 'raw' (zero-allocation), 'adafruit_midi'.
 MTC_TIMEOUT = 30  # Seconds with no messages received to wait before switching to the clock
+BEAT_CLOCK_TIMEOUT = 5  # Seconds with no beat clock messages received to wait before switching to the clock
+BEATS_PER_BAR = 4
+HUI_TIMEOUT = 5  # Seconds with no HUI messages received to wait before switching to the clock
+MCU_TIMEOUT = 5  # Seconds with no MCU messages received and a blank display to wait before switching to the clock
+MCU_IDLE_TIMEOUT = 600  # Seconds with no MCU messages received to wait before switching to the clock from a stopped host
+SHOW_STATUS = True  # Display the MTC direction, frame rate and state under the timecode
+SHOW_LOCK_QUALITY = False  # Display MTC lock quality bars in the bottom right corner
+BUTTONS_INTERVAL = 10  # Buttons polling period in ms
+SYNC_INTERVAL = 100  # Time synchronization step period in ms
+INSTRUMENT = DEBUG  # Collect latency statistics. Enter 'd' on the serial console to print them.
+GC_INTERVAL = 1000  # Minimum ms between garbage collections, only run while the display is idle
+MAX_FPS = 60  # Display refreshes cap. Only refreshed when something changed.
 
 if SUMMER_TIME:
     TZ_OFFSET += 1
@@ -81,27 +111,18 @@ print("Studio Network Clock")
 
 
 def second_ticks():
-    # Seconds ticks
-    # We have 64 pixels wide and we want to use the 60 in the center.
-    # Let's move two pixels to the right!
-    offset = 2
-    for x in range(0, 60):
-        clock_bitmap[x + offset, 30] = 1
-    for x in range(0, 60, 5):
-        clock_bitmap[x + offset, 1] = 1
-        clock_bitmap[x + offset, 30] = 0
-
-
-def display_clock(updating=False):
-    hint = None
-    # now = time.localtime()  # Get the time values we need
-    now = rtc.RTC().datetime = hwrtc.datetime  # Get time from the hardware RTC
-    # = now  # Update board RTC time to prevent it from drifting
+    # Seconds ticks, blitted from their precomputed rows
+    clock_bitmap.blit(CHASE_OFFSET, 1, ticks_bitmap, x1=0, y1=0, x2=60, y2=1)
+    clock_bitmap.blit(CHASE_OFFSET, 30, ticks_bitmap, x1=0, y1=1, x2=60, y2=2)
+
+
+def display_clock(edges=ClockScheduler.ALL, updating=False):
+    # Labels are written by tile index: no string is built in the steady state
 
     #if DEBUG:
-    #    print(now)
+    #    print(clock.hour, clock.minute, clock.second)
 
-    hours = now[3]
+    hours = clock.hour
 
     time_label.color = color[1]
     # if hours >= 18 or hours < 6:
@@ -111,108 +132,189 @@ def display_clock(updating=False):
     # else:
     #    time_label.color = color[1]  # morning
 
+    position = 0
     if not TWENTYFOURHOURS:
-        hint = "AM"
+        hint = am_tile
         if hours > 12:  # Handle times later than 12:59
             hours -= 12
-            hint = "PM"
+            hint = pm_tile
         elif not hours:  # Handle times between 0:00 and 0:59
             hours = 12
+        time_label.set_tile(0, hint)
+        position = 3
 
-    minutes = now[4]
+    minutes = clock.minute
 
-    seconds = now[5]
+    seconds = clock.second
 
     if BLINK:
-        # Blink every 500 ms
-        # TODO: Rewrite using:
-        #       https://circuitpython.readthedocs.io/en/latest/docs/library/uasyncio.html?
-        colon = ":" if math.floor(supervisor.ticks_ms() / 500 % 2) else " "
+        # Blink every 500 ms
+        colon = colon_tile if clock.colon else blank_tile
     else:
-        colon = ":"
+        colon = colon_tile
 
     if updating:
-        colon = "."
+        colon = point_tile
+
+    if edges & ClockScheduler.DAY:
+        # ISO8601
+        date_label.set_number(0, clock.year, 4)
+        date_label.set_number(5, clock.month, 2)
+        date_label.set_number(8, clock.day, 2)
+
+    time_label.set_number(position, hours, 2)
+    time_label.set_tile(position + 2, colon)
+    time_label.set_number(position + 3, minutes, 2)
+
+    if SHOWSECONDS:
+        time_label.set_tile(position + 5, colon)
+        time_label.set_number(position + 6, seconds, 2)
+
+    # Seconds chase, only drawn when the second changed.
+    # Always drawn in full: right after a mode switch or an update, it is in sync at once.
+    if edges & ClockScheduler.SECOND and not updating:
+        # A 60 pixels window of the precomputed rows: seconds + 1 ticks, then the inverse ticks
+        start = 59 - seconds
+        clock_bitmap.blit(CHASE_OFFSET, 2, chase_bitmap, x1=start, y1=0, x2=start + 60, y2=1)
+        clock_bitmap.blit(CHASE_OFFSET, 29, chase_bitmap, x1=start, y1=1, x2=start + 60, y2=2)
 
-    date_fs = "{year}-{month:02d}-{day:02d}"  # ISO8601
-    date_label.text = date_fs.format(year=now[0], month=now[1], day=now[2])
+        #if DEBUG:
+        #    print(seconds)
 
-    if TWENTYFOURHOURS:
-        time_fs = "{hours:02d}{colon}{minutes:02d}"
-    else:
-        time_fs = "{hint} {hours:02d}{colon}{minutes:02d}"
 
-    if SHOWSECONDS and not updating:
-        time_fs += "{colon}{seconds:02d}"
+def display_timecode(timecode):
+    #if DEBUG:
+    #    print(timecode)
 
-    time_label.text = time_fs.format(
-        hours=hours, minutes=minutes, seconds=seconds, colon=colon, hint=hint
-    )
+    # HH:MM:SS:FF by tile index. Drop frame separates the frames with a '.'.
+    tc_label.set_number(0, timecode.hours, 2)
+    tc_label.set_number(3, timecode.minutes, 2)
+    tc_label.set_number(6, timecode.seconds, 2)
+    tc_label.set_tile(8, point_tile if timecode.drop_frame else colon_tile)
+    tc_label.set_number(9, timecode.frames, 2)
 
-    # Seconds chase
-    if not updating:
-        # We have 64 pixels wide and we want to use the 60 in the center.
-        # Let's move two pixels to the right!
-        offset = 2
 
-        # FIXME: draw full
-        if seconds == 0:
-            for x_position in range(1, 60):
-                clock_bitmap[x_position + offset, 2] = 0  # Blank ticks
-                clock_bitmap[x_position + offset, 29] = 1  # Illuminate all Inverse ticks
-        clock_bitmap[seconds + offset, 2] = 1  # Tick
-        clock_bitmap[seconds + offset, 29] = 0  # Inverse tick blanking
+def display_beats():
+    if beat_clock.running:
+        beats_color = color[3]  # Green
+    else:
+        beats_color = color[1]  # Red
+    bpm_label.color = beats_color
+    position_label.color = beats_color
 
-        #if DEBUG:
-        #    print(seconds)
+    # Tempo is steadier shown once per beat
+    if not beat_clock.tick:
+        tenths = int(beat_clock.bpm * 10 + 0.5)
+        bpm_label.set_number(0, tenths // 10, 3)
+        bpm_label.set_number(4, tenths, 1)
+    position_label.set_number(0, beat_clock.bar, 3)
+    position_label.set_number(4, beat_clock.beat, 1)
+    position_label.set_number(6, beat_clock.tick, 2)
 
 
-def display_timecode(timecode="00:00:00:00"):
-    #if DEBUG:
-    #    print(timecode)
+def switch_mode(mode):
+    global MODE
 
-    tc_label.text = timecode
+    #if DEBUG:
+    #    print(f"Switching to {mode} mode")
+    views.show(mode)
+    if mode == 'Clock' and clock is not None:
+        clock.invalidate()  # Redraws everything, second chase included
+    MODE = mode
+    refresher.invalidate()
 
 
 def update_display(
-        *, timecode=None, updating=False
+        *, timecode=None, updating=False, edges=ClockScheduler.ALL
 ):
     # FIXME: factorize
     if timecode:
-        #display_timecode(timecode)
-        # --- Unroll TEST
-        tc_label.text = timecode
-        # ---
+        display_timecode(timecode)
     else:
-        display_clock(updating)
+        display_clock(edges, updating)
+
+
+def wifi_connect():
+    # Only starts connecting, TimeSync polls for the result
+    esp.wifi_set_passphrase(secrets['ssid'], secrets['password'])
+
+
+def wifi_connected():
+    return esp.is_connected
 
 
-def update_time():
+def fetch_time():
     if not USENTP:
         network.get_local_time()  # Synchronize Board's clock to Internet
-    else:
-        while not network._wifi.is_connected:
-            network.connect()
-            if not network._wifi.is_connected:
-                # FIXME: Use exponential backoff
-                #if DEBUG:
-                #    print("Failed to connect to WiFi, retrying in 5 seconds...")
-                time.sleep(5)
-                continue
-        time.sleep(1)  # Let network settle
-        # esp.get_time()
-        # while not ntp.valid_time:
-        #     # TODO: handle DST and local time
-        #     ntp.set_time(
-        #         tz_offset=3600 * TZ_OFFSET
-        #     )  # Fetch and set the microcontroller's current UTC time
-        #     if not ntp.valid_time:
-        #         # FIXME: Use exponential backoff
-        #         if DEBUG:
-        #             print("Failed to obtain time from NTP, retrying in 5 seconds...")
-        #         time.sleep(5)
-        #         continue
-        # hwrtc.datetime = rtc.RTC().datetime  # Update the hardware real time clock module's time
+        return True
+    # TODO: handle DST and local time
+    ntp.set_time(
+        tz_offset=3600 * TZ_OFFSET
+    )  # Fetch and set the microcontroller's current UTC time
+    return ntp.valid_time
+
+
+def apply_time():
+    hwrtc.datetime = rtc.RTC().datetime  # Update the hardware real time clock module's time
+    clock.anchor(supervisor.ticks_ms())
+
+
+def start_clock():
+    global hwrtc, clock
+
+    import adafruit_ds3231
+
+    print("Initializing hardware RTC (DS3231)")
+    hwrtc = adafruit_ds3231.DS3231(board.I2C())
+    #if DEBUG:
+    #    print(f"Hardware RTC temperature: {hwrtc.temperature}")
+    # rtc.set_time_source(hwrtc)
+    # r=rtc.RTC()
+
+    # Read the hardware RTC once, then interpolate
+    clock = ClockScheduler(hwrtc, supervisor.ticks_ms(), RTC_ANCHOR_INTERVAL)
+    boot.mark('RTC')
+
+
+def start_network(ticks):
+    """
+    Starts networking one non-blocking stage per call. Returns True once done.
+    """
+    global esp_starter, network, esp, ntp
+
+    if esp_starter is None:
+        from espstarter import ESPStarter
+
+        print("Initializing networking")
+        # Resets the ESP32 co-processor without sleeping until it booted
+        esp_starter = ESPStarter(
+            digitalio.DigitalInOut(board.ESP_RESET), digitalio.DigitalInOut(board.ESP_GPIO0), ticks
+        )
+        return False
+    if not esp_starter.step(ticks):
+        return False
+
+    import busio
+    from adafruit_matrixportal.network import Network
+
+    spi = busio.SPI(board.SCK, board.MOSI, board.MISO)
+    esp = esp_starter.esp(spi, digitalio.DigitalInOut(board.ESP_CS), digitalio.DigitalInOut(board.ESP_BUSY))
+    network = Network(esp=esp, external_spi=spi, debug=DEBUG)
+    #if DEBUG:
+    #    print(f"ESP32 co-processor running firmware v{esp.firmware_version.decode()}")
+    #    MAC_address = ''
+    #    for b in esp.MAC_address_actual:
+    #        MAC_address += '{:x}'.format(b)
+    #        MAC_address += ':'
+    #    MAC_address = MAC_address[:-1]  # Remove extraneous ':'
+    #    print(f"WiFi MAC Address: {MAC_address}")
+
+    if USENTP:
+        from adafruit_ntp import NTP
+
+        ntp = NTP(esp)  # Initialize the NTP object
+    boot.mark('network')
+    return True
 
 
 # ONE-TIME INITIALIZATION --------------------------------------------------
@@ -241,82 +343,171 @@ color[3] = 0x00FF00  # green
 clock_bitmap = displayio.Bitmap(64, 32, 2)  # Create a bitmap object, width, height, bit depth
 tc_bitmap = displayio.Bitmap(64, 32, 2)  # Create a bitmap object, width, height, bit depth
 
+# Seconds ticks and chase rows, precomputed.
+# We have 64 pixels wide and we want to use the 60 in the center.
+# Let's move two pixels to the right!
+CHASE_OFFSET = 2
+ticks_bitmap = displayio.Bitmap(60, 2, 2)  # Ticks every 5 seconds, inverse ticks
+for x in range(60):
+    ticks_bitmap[x, 0 if x % 5 == 0 else 1] = 1
+chase_bitmap = displayio.Bitmap(120, 2, 2)  # 60 lit then 60 blank, and the inverse
+for x in range(60):
+    chase_bitmap[x, 0] = 1
+    chase_bitmap[x + 60, 1] = 1
+
 clock_tile_grid = displayio.TileGrid(clock_bitmap, pixel_shader=color)
 tc_tile_grid = displayio.TileGrid(tc_bitmap, pixel_shader=color)
 
-splash = displayio.Group()
 clock_view = displayio.Group()
 tc_view = displayio.Group()
+beats_view = displayio.Group()
 
 clock_view.append(clock_tile_grid)
 tc_view.append(tc_tile_grid)
+second_ticks()
 
-if MODE == 'Clock':
-    second_ticks()
-    splash.append(clock_view)
-else:
-    splash.append(tc_view)
+# Every view is built once and stays in the display tree. Switching modes only hides and shows them.
+views = ViewManager(MODE)
+views.add('Clock', clock_view)
+views.add('MTC', tc_view)
+views.add('Beats', beats_view)
 
 # FIXME: Not implemented upstream. Only 0.0 is supported.
 #        All other values are treated as 1.0.
 # display.brightness = 0.5
 
 # Draw something ASAP
-display.show(splash)
+display.show(views)
+boot.mark('display')
 
-# Custom font
-font = bitmap_font.load_font('/gt.pcf')
-#if DEBUG:
-#    font = bitmap_font.load_font('/gt.bdf')
-
-date_label = Label(font)
-date_label.color = color[1]
-date_label.text = '0000-00-00'
-
-# TODO: factorize
-bbx, bby, bbwidth, bbh = date_label.bounding_box
-date_x = display.width // 2 - bbwidth // 2
-date_y = display.height // 4 + 2
-date_label.x = date_x
-date_label.y = date_y
-
-time_label = Label(font)
-time_label.color = color[1]
-time_label.text = '00:00:00'
-
-# TODO: factorize
-bbx, bby, bbwidth, bbh = time_label.bounding_box
-# FIXME: pre-compute to prevent flickering
-time_x = display.width // 2 - bbwidth // 2
-time_y = display.height // 4 * 3 - 1
-time_label.x = time_x
-time_label.y = time_y
-
-tc_label = Label(font)
-tc_label.color = color[1]
-tc_label.text = '00:00:00:00'
-
-# TODO: factorize
-bbx, bby, bbwidth, bbh = tc_label.bounding_box
-tc_label.x = round(display.width / 2 - bbwidth / 2)
-tc_label.y = display.height // 2 - 1
+# MIDI next: the views are ready before the main loop reads anything
+# --- Instrumentation ---
+profiler = instrument.Instrument(enabled=INSTRUMENT)
+collector = GCScheduler(profiler.collect, GC_INTERVAL)
 
-clock_view.append(date_label)
-clock_view.append(time_label)
-tc_view.append(tc_label)
+# No more auto refresh: the display task commits a refresh once each frame is fully drawn
+refresher = RefreshController(display, MAX_FPS, profiler.recorder(instrument.REFRESH))
 
-last_time_check = None
+# --- USB MIDI ---
+mtc_counter = MTCFrameCounter()
+beat_clock = BeatClock(BEATS_PER_BAR, BEAT_CLOCK_TIMEOUT)
+hui = HUIDecoder(HUI_TIMEOUT)
+mcu = MCUDecoder(MCU_TIMEOUT, MCU_IDLE_TIMEOUT)
+if profiler.enabled:
+    mtc_counter.quarter_frame = profiler.wrap(mtc_counter.quarter_frame, instrument.DECODE)
+    mtc_counter.full_frame = profiler.wrap(mtc_counter.full_frame, instrument.DECODE)
+
+# Every subsystem registers for the messages it needs. The rest is dropped.
+router = MIDIRouter()
+mtc_counter.register(router)
+beat_clock.register(router)
+hui.register(router)
+mcu.register(router)
+
+if MIDI_PARSER == 'raw':
+    midi = RawMTCInput(usb_midi.ports[0], router)
+else:
+    # Only imported when selected: heap is scarce
+    from adafruit_midi import MIDI
+    from adafruitmidiinput import AdafruitMIDIInput
+
+    midi = AdafruitMIDIInput(
+        MIDI(
+            midi_in=usb_midi.ports[0],
+            in_channel=USB_MIDI_CHANNEL - 1,
+            midi_out=usb_midi.ports[1],
+            out_channel=USB_MIDI_CHANNEL - 1,
+        ),
+        router,
+    )
+ingest = MIDIIngest(midi, router)
 
-# --- Real Time Clock ---
-print("Initializing hardware RTC (DS3231)")
-hwrtc = adafruit_ds3231.DS3231(board.I2C())
-#if DEBUG:
-#    print(f"Hardware RTC temperature: {hwrtc.temperature}")
-# rtc.set_time_source(hwrtc)
-# r=rtc.RTC()
+boot.mark('MIDI')
 
-# Update clock display ASAP
-display_clock()
+
+# Custom font, precompiled into a glyph atlas (python -m tools.glyphatlas) read in one go.
+# Every glyph pre-blitted once. Labels only swap the tiles of the characters that change.
+try:
+    glyphs = GlyphSheet(atlas='/gt.atlas')
+except (OSError, ValueError) as e:
+    print("Glyph atlas unavailable -", e)
+    # Much slower: parses the font and renders every glyph
+    from adafruit_bitmap_font import bitmap_font
+
+    font = bitmap_font.load_font('/gt.pcf')
+    #if DEBUG:
+    #    font = bitmap_font.load_font('/gt.bdf')
+    glyphs = GlyphSheet(font)
+boot.mark('glyphs')
+colon_tile = glyphs.tile(':')
+point_tile = glyphs.tile('.')
+blank_tile = glyphs.tile(' ')
+am_tile = glyphs.tile('A')  # The font has no letters: blank
+pm_tile = glyphs.tile('P')
+
+date_label = GlyphCells(glyphs, '0000-00-00', color[1])
+date_label.x = display.width // 2 - date_label.width // 2
+date_label.y = display.height // 4 + 2 - date_label.height // 2
+
+time_template = '00:00:00' if SHOWSECONDS else '00:00'
+if not TWENTYFOURHOURS:
+    time_template = 'AM ' + time_template
+time_label = GlyphCells(glyphs, time_template, color[1])
+time_label.x = display.width // 2 - time_label.width // 2
+time_label.y = display.height // 4 * 3 - 1 - time_label.height // 2
+
+tc_label = GlyphCells(glyphs, '00:00:00:00', color[1])
+tc_label.x = round(display.width / 2 - tc_label.width / 2)
+tc_label.y = display.height // 2 - 1 - tc_label.height // 2
+
+bpm_label = GlyphCells(glyphs, '000.0', color[1])
+bpm_label.x = display.width // 2 - bpm_label.width // 2
+bpm_label.y = display.height // 4 + 2 - bpm_label.height // 2
+
+position_label = GlyphCells(glyphs, '000:0:00', color[1])
+position_label.x = display.width // 2 - position_label.width // 2
+position_label.y = display.height // 4 * 3 - 1 - position_label.height // 2
+
+# MTC direction, frame rate and state
+status = StatusOverlay(glyphs, color, display.width, display.height)
+
+clock_view.append(date_label)
+clock_view.append(time_label)
+tc_view.append(tc_label)
+if SHOW_STATUS:
+    tc_view.append(status)
+beats_view.append(bpm_label)
+beats_view.append(position_label)
+
+# HUI time display and meters
+hui_view = HUIDisplay(glyphs, color, display.width, display.height)
+views.add('HUI', hui_view)
+
+# MCU timecode/BBT and assignment displays and meters
+mcu_view = MCUDisplay(glyphs, color, display.width, display.height)
+views.add('MCU', mcu_view)
+
+# MTC lock quality bars. Tile n shows n bars.
+quality_bitmap = displayio.Bitmap(5 * 4, 3, 2)
+for quality in range(1, 4):
+    for bar in range(quality):
+        for y in range(2 - bar, 3):
+            quality_bitmap[quality * 5 + bar * 2, y] = 1
+quality_palette = displayio.Palette(2)
+quality_palette.make_transparent(0)
+quality_palette[1] = color[1]
+quality_colors = (color[1], color[1], color[2], color[3])  # By quality
+quality_bars = displayio.TileGrid(
+    quality_bitmap,
+    pixel_shader=quality_palette,
+    tile_width=5,
+    tile_height=3,
+    x=display.width - 5,
+    y=display.height - 3,
+)
+if SHOW_LOCK_QUALITY:
+    tc_view.append(quality_bars)
+boot.mark('views')
 
 # --- Setup buttons ---
 up_pin = digitalio.DigitalInOut(board.BUTTON_UP)
@@ -329,35 +520,15 @@ down_pin.direction = digitalio.Direction.INPUT
 down_pin.pull = digitalio.Pull.UP
 down = Debouncer(down_pin)
 
-# --- USB MIDI ---
-midi = MIDI(
-    midi_in=usb_midi.ports[0],
-    in_channel=USB_MIDI_CHANNEL - 1,
-    midi_out=usb_midi.ports[1],
-    out_channel=USB_MIDI_CHANNEL - 1,
-)
-
-# --- Networking ---
-network = Network(debug=DEBUG)
-esp = network._wifi.esp
-#if DEBUG:
-#    print(f"ESP32 co-processor running firmware v{esp.firmware_version.decode()}")
-#    MAC_address = ''
-#    for b in esp.MAC_address_actual:
-#        MAC_address += '{:x}'.format(b)
-#        MAC_address += ':'
-#    MAC_address = MAC_address[:-1]  # Remove extraneous ':'
-#    print(f"WiFi MAC Address: {MAC_address}")
-
-if MODE == 'Clock':
-    # FIXME: Handle wifi unavailable
-    network.connect()
-    #if DEBUG:
-    #    print(f'WiFi signal strength: {esp.rssi}dB')
-    #    print(f'Connected as {network.ip_address}')
-
-if USENTP:
-    ntp = NTP(esp)  # Initialize the NTP object
+# --- Real Time Clock and Networking ---
+# Started from the main loop the first time the clock is shown (start_clock(), start_network())
+# so that MTC, HUI, MCU and the beat clock never wait for them.
+hwrtc = None
+clock = None
+esp_starter = None
+network = None
+esp = None
+ntp = None
 
 # Load time zone string from secrets.py, else IP geolocation for this too
 # (http://worldtimeapi.org/api/timezone for list).
@@ -385,74 +556,142 @@ if USENTP:
 #    print("DEBUG: offset set to: ", TZ_OFFSET)
 #    tzinfo.close()
 
-if MODE == 'Clock':
-    # rtc.RTC().calibration = CALIBRATION
-    # hwrtc.calibration = CALIBRATION
-    update_time()
-    last_time_check = supervisor.ticks_ms()
+# rtc.RTC().calibration = CALIBRATION
+# hwrtc.calibration = CALIBRATION
 
-mtc_counter = MTCFrameCounter()
+# Connects, then synchronizes every UPDATEINTERVAL in the background, once networking is started
+timesync = TimeSync(
+    wifi_connect, wifi_connected, fetch_time, apply_time, supervisor.ticks_ms(), UPDATEINTERVAL
+)
+
+profiler.reports.append(mtc_counter.report)
+profiler.reports.append(timesync.report)
+profiler.reports.append(router.report)
+profiler.reports.append(boot.report)
+profiler.reports.append(refresher.report)
 
 #if DEBUG:
 #    print("DEBUG: free memory after init before GC", gc.mem_free())
-gc.collect()
+profiler.collect()
 #if DEBUG:
 #    print("DEBUG: free memory after GC", gc.mem_free())
 
 # MAIN LOOP ----------------------------------------------------------------
 
-print("Started!")
-
 # SMPTE helpers
 #prev_direction = 0
 #prev_framerate = 0
 
-while True:
-    timestamp = time.monotonic_ns()
-
-    is_mtc = False
-    is_frame = False
-
-    # MIDI
-    message = midi.receive()
-
-    if message:
-        #if DEBUG:
-        #    print("Received MIDI message")
-        #    print(message)
-        is_mtc, is_frame = mtc_counter.midi(message, timestamp)
+# Boot milestones not reached yet
+midi_pending = True
+frame_pending = True
+
+# MIDI results awaiting the display task
+mtc_received = False
+frame_received = False
+clock_received = False
+position_received = False
+hui_received = False
+mcu_received = False
+
+
+def midi_step(timestamp):
+    global mtc_received, frame_received, clock_received, position_received, hui_received, mcu_received
+    global midi_pending
+
+    # Drain everything pending so that frames arriving together only update the display once
+    ingest.drain(timestamp)
+    if midi_pending:
+        boot.mark(MIDI_READY, timestamp)
+        midi_pending = False
+    if ingest.is_mtc:
+        mtc_received = True
+    if ingest.is_frame:
+        frame_received = True
+    if ingest.is_clock:
+        clock_received = True
+    if ingest.is_position:
+        position_received = True
+    if ingest.is_hui:
+        hui_received = True
+    if ingest.is_mcu:
+        mcu_received = True
+
+    return ingest.more  # Flooded: make lower priority tasks give way
+
+
+def display_step(timestamp):
+    global mtc_received, frame_received, clock_received, position_received, hui_received, mcu_received
+    global frame_pending
+
+    is_mtc = mtc_received
+    is_frame = frame_received
+    is_clock = clock_received
+    is_position = position_received
+    is_hui = hui_received
+    is_mcu = mcu_received
+    mtc_received = False
+    frame_received = False
+    clock_received = False
+    position_received = False
+    hui_received = False
+    mcu_received = False
 
     # Update caches
     #timecode = mtc_counter.timecode
-    framerate = mtc_counter.framerate
-    direction = mtc_counter.direction
+    #framerate = mtc_counter.framerate
+    #direction = mtc_counter.direction
     # running = mtc_counter.running
     # locked = mtc_counter.locked
 
-    # Crude automatic mode switching
-    if MODE == 'Clock' and is_mtc:
-        #if DEBUG:
-        #    print("Switching to MTC mode")
-        # TODO: clear screen?
-        MODE = 'MTC'
-        splash.remove(clock_view)
-        splash.append(tc_view)
-    elif MODE == 'MTC' and mtc_counter.timedout:
-        #if DEBUG:
-        #    print("Switching to Clock mode")
-        splash.remove(tc_view)
-        splash.append(clock_view)
-        second_ticks()
-        # FIXME: second chase can be partially in sync
-        MODE = 'Clock'
+    # Crude automatic mode switching. MTC takes precedence over MCU, MCU over HUI, HUI over the beat clock.
+    if is_mtc and MODE != 'MTC':
+        switch_mode('MTC')
+    elif is_mcu and MODE in ('Clock', 'Beats', 'HUI'):
+        switch_mode('MCU')
+    elif is_hui and MODE in ('Clock', 'Beats'):
+        switch_mode('HUI')
+    elif is_clock and MODE == 'Clock':
+        switch_mode('Beats')
+        is_position = True  # Draw ASAP
+    elif (
+            MODE == 'MTC' and mtc_counter.timedout
+            or MODE == 'HUI' and hui.timedout
+            or MODE == 'MCU' and mcu.timedout
+            or MODE == 'Beats' and beat_clock.timedout
+    ):
+        switch_mode('Clock')
+
+    # Garbage is only collected in idle windows
+    idle = not (is_mtc or is_clock or is_hui or is_mcu)
 
     if MODE == 'MTC':
+        # Ride out late or lost Quarter Frames
+        if mtc_counter.update(timestamp):
+            is_frame = True
+
+        if SHOW_LOCK_QUALITY:
+            quality = mtc_counter.quality
+            if quality_bars[0] != quality:
+                quality_bars[0] = quality
+                quality_palette[1] = quality_colors[quality]
+                refresher.invalidate()
+
         if mtc_counter.locked:
-            tc_label.color = color[3]  # Green
+            state = LOCKED  # Green
         elif mtc_counter.running:
-            tc_label.color = color[2]  # Yellow
+            state = RUNNING  # Yellow
         else:
-            tc_label.color = color[1]  # Red
+            state = STOPPED  # Red
+        if tc_label.color != color[state]:
+            tc_label.color = color[state]
+            refresher.invalidate()  # Shown with the next frame, if any
+
+        # Only redrawn on change
+        if SHOW_STATUS and status.update(
+                mtc_counter.direction if mtc_counter.running else 0, RATE_NAMES[mtc_counter.tc.rate], state
+        ):
+            refresher.invalidate()
 
         if is_frame:
             #if DEBUG:
@@ -472,31 +711,99 @@ while True:
                 #if DEBUG:
                 #    print(f"Direction Change: {dir_r}")
             #    prev_direction = direction
-            update_display(timecode=mtc_counter.timecode)
+            update_display(timecode=mtc_counter.tc)
+            refresher.invalidate()
+
+        # Right after a frame boundary, the next one is at least a Quarter Frame away
+        idle = is_frame or not mtc_counter.running
+
+    elif MODE == 'HUI':
+        # Batched: everything received since the last pass at once
+        if hui.dirty_digits or hui.dirty_meters:
+            hui_view.update(hui)
+            refresher.invalidate()
+
+    elif MODE == 'MCU':
+        # Meters decay by themselves
+        mcu.decay(timestamp)
+        if mcu.dirty_chars or mcu.dirty_meters:
+            mcu_view.update(mcu)
+            refresher.invalidate()
+
+    elif MODE == 'Beats':
+        if is_position:
+            display_beats()
+            refresher.invalidate()
 
     elif MODE == 'Clock':
-        # Time & display
-        if last_time_check is None or timestamp > last_time_check + UPDATEINTERVAL * 1e9:
+        if clock is None:
+            start_clock()  # First time the clock is shown
+
+        # Only redraw at blink, second and day edges
+        edges = clock.poll(supervisor.ticks_ms())
+        if edges:
             # Make sure status is displayed while updating
+            update_display(edges=edges, updating=timesync.busy)
+            refresher.invalidate()
+            idle = True
+
+    # Everything drawn by this pass is shown at once
+    refresher.commit(timestamp)
+
+    if idle:
+        collector.idle(timestamp)
+
+    if frame_pending:
+        boot.mark(FIRST_FRAME)
+        frame_pending = False
+        print(boot.summary())
 
-            update_display(updating=True)
-            try:
-                update_time()
-            except RuntimeError as e:
-                print("Some error occurred, retrying! -", e)
-            last_time_check = timestamp
-        update_display()
 
-    # Buttons Handling
+def buttons_step(timestamp):
     up.update()
     down.update()
 
     if up.fell:
         print("UP")
         display.brightness = 1.0
+        refresher.invalidate()
     if down.fell:
         print("DOWN")
         display.brightness = 0.0
+        refresher.invalidate()
     #if DEBUG:
+    #    print(f"MIDI batches: {ingest.batches}, max: {ingest.max_batch}, coalesced: {ingest.coalesced}")
     #    print("DEBUG: free memory", gc.mem_free())
-    #   print(f"Main loop took: {time.monotonic_ns() - timestamp} ns")
+
+
+def sync_step(timestamp):
+    if MODE != 'Clock' or clock is None:
+        return
+
+    if esp is None:
+        start_network(supervisor.ticks_ms())
+        return  # One stage per step: give way to the other tasks
+
+    # Advances one small step at a time, never blocks
+    timesync.step(supervisor.ticks_ms())
+
+
+def instrument_step(timestamp):
+    profiler.lap(instrument.LOOP, timestamp)
+    profiler.allocations()
+    profiler.poll_console()
+
+
+runtime = Runtime()
+runtime.add(profiler.wrap(midi_step, instrument.MIDI), 0, PRIORITY_MIDI, 'midi_step')  # Every pass
+# Every pass, only draws on changes
+runtime.add(profiler.wrap(display_step, instrument.DISPLAY), 0, PRIORITY_DISPLAY, 'display_step')
+runtime.add(profiler.wrap(buttons_step, instrument.BUTTONS), BUTTONS_INTERVAL, PRIORITY_BUTTONS, 'buttons_step')
+runtime.add(sync_step, SYNC_INTERVAL, PRIORITY_SYNC)
+if profiler.enabled:
+    runtime.add(instrument_step, 0, PRIORITY_MIDI)
+
+boot.mark('loop')
+print("Started!")
+
+runtime.run()
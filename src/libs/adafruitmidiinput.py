@@ -0,0 +1,73 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import adafruit_midi
+
+# Registers the adafruit_midi message types the router may dispatch
+from adafruit_midi.channel_pressure import ChannelPressure  # noqa: F401
+from adafruit_midi.control_change import ControlChange  # noqa: F401
+from adafruit_midi.midi_continue import Continue  # noqa: F401
+from adafruit_midi.mtc_quarter_frame import MtcQuarterFrame  # noqa: F401
+from adafruit_midi.note_on import NoteOn  # noqa: F401
+from adafruit_midi.polyphonic_key_pressure import PolyphonicKeyPressure  # noqa: F401
+from adafruit_midi.start import Start  # noqa: F401
+from adafruit_midi.stop import Stop  # noqa: F401
+from adafruit_midi.system_exclusive import SystemExclusive  # noqa: F401
+from adafruit_midi.timing_clock import TimingClock  # noqa: F401
+from midirouter import SYSEX_START, MIDIRouter
+
+
+class AdafruitMIDIInput:
+    """
+    Feeds a MIDIRouter from adafruit_midi, one message per poll().
+
+    Same interface as RawMTCInput, which is the default:
+    adafruit_midi and its message types are only imported when this input is selected.
+    Every message is an object, converted back to bytes only if somebody registered for it.
+    """
+
+    def __init__(self, midi: adafruit_midi.MIDI, router: MIDIRouter) -> None:
+        self._midi = midi
+        self._router = router
+
+        # Result of the last poll
+        self.more: bool = False  # A message was received, more may be pending
+
+    def poll(self, ts: int) -> int:
+        """
+        Receives and dispatches a single message.
+
+        Returns the number of messages received.
+        """
+        msg = self._midi.receive()
+        if msg is None:
+            self.more = False
+            return 0
+        self.more = True
+        self.dispatch(msg, ts)
+        return 1
+
+    def dispatch(self, msg: adafruit_midi.MIDIMessage, ts: int) -> None:
+        """
+        Dispatches an adafruit_midi message through the router table.
+        """
+        router = self._router
+        status = msg._STATUS
+        if status is None:
+            router.dropped += 1  # Unknown or bad message
+            return
+        if status == SYSEX_START:
+            data = bytes(msg)
+            router.dispatch_sysex(data, 1, len(data) - 1, ts)
+            return
+        if msg._STATUSMASK == 0xF0:
+            status |= msg.channel
+        if not router.registered(status):
+            router.dropped += 1
+            return
+        data = bytes(msg)
+        router.dispatch(
+            status,
+            data[1] if len(data) > 1 else 0,
+            data[2] if len(data) > 2 else 0,
+            ts,
+        )
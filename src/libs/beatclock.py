@@ -0,0 +1,179 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import time
+
+from midirouter import CLOCK, CONTINUE, SONG_POSITION, START, STOP, TIMING_CLOCK, MIDIRouter
+
+PPQN = 24  # MIDI Timing Clocks per quarter note
+TICKS_PER_MIDI_BEAT = 6  # Song Position Pointer unit (a sixteenth note)
+
+
+class BeatClock:
+    """
+    A MIDI beat clock tempo tracker.
+
+    Consumes Timing Clock, Start, Stop, Continue and Song Position Pointer
+    to maintain a bars:beats:ticks song position.
+
+    The tempo is estimated by a second order PLL locked onto the Timing Clock timestamps:
+    the phase error between the predicted and the actual tick corrects both
+    the predicted phase and the smoothed tick period.
+    The filter gains are power of two shifts so that every tick is O(1) integer work.
+
+    Ticks drained together share a timestamp, which is only right for the last one:
+    a batch is corrected once, for its last tick, against the prediction made before the batch.
+    """
+
+    # PLL gains
+    PHASE_SHIFT = 2  # 1/4 of the phase error corrects the phase
+    PERIOD_SHIFT = 5  # 1/32 of the phase error corrects the period
+
+    def __init__(self, beats_per_bar: int = 4, timeout: int = 30) -> None:
+        self.beats_per_bar: int = beats_per_bar
+
+        # Transport
+        self.running: bool = False
+        self.ticks: int = 0  # Song position in Timing Clocks
+        self._armed: bool = False  # The next Timing Clock marks the current position
+
+        # Tempo PLL
+        self.period: int = 0  # Smoothed Timing Clock period in ns. 0 until measured.
+        self._predicted: int = 0  # Next Timing Clock expected timestamp
+        self._prev_tick_ts: int = 0
+        self._batch_period: int = 0  # PLL state before the ticks sharing the last timestamp
+        self._batch_predicted: int = 0
+
+        # Timestamps
+        self._prev_msg_ts: int = time.monotonic_ns()
+        self._timeout: float = timeout * 1e9  # Converts secs to nanoseconds
+
+    @property
+    def bpm(self) -> float:
+        """
+        Estimated tempo in beats (quarter notes) per minute. 0 until measured.
+        """
+        if not self.period:
+            return 0.0
+        return 60000000000 / (self.period * PPQN)
+
+    @property
+    def bar(self) -> int:
+        return self.ticks // (PPQN * self.beats_per_bar) + 1
+
+    @property
+    def beat(self) -> int:
+        return (self.ticks // PPQN) % self.beats_per_bar + 1
+
+    @property
+    def tick(self) -> int:
+        return self.ticks % PPQN
+
+    @property
+    def timedout(self) -> bool:
+        """
+        Checks if we recently received beat clock messages
+        """
+        if time.monotonic_ns() > self._prev_msg_ts + self._timeout:
+            self.running = False
+            self.period = 0
+            self._prev_tick_ts = 0
+            return True
+        return False
+
+    def timing_clock(self, ts: int) -> bool:
+        """
+        Interprets a Timing Clock.
+
+        Returns True when the song position moved.
+        """
+        self._prev_msg_ts = ts
+
+        prev_ts = self._prev_tick_ts
+        self._prev_tick_ts = ts
+        if prev_ts:
+            period = self.period
+            if not period:
+                if ts != prev_ts:
+                    # First measurement
+                    self.period = ts - prev_ts
+                    self._predicted = ts + self.period
+            else:
+                if ts == prev_ts:
+                    # Batched: undo the correction of the previous tick, it was not late
+                    period = self._batch_period
+                    predicted = self._batch_predicted + period
+                else:
+                    self._batch_period = period
+                    predicted = self._predicted
+                self._batch_predicted = predicted
+                error = ts - predicted
+                if -period < error < period << 1:
+                    self.period = period + (error >> self.PERIOD_SHIFT)
+                    self._predicted = predicted + self.period + (error >> self.PHASE_SHIFT)
+                elif ts != prev_ts:
+                    # Tempo jump or dropout: restart from the last interval
+                    self.period = ts - prev_ts
+                    self._predicted = ts + self.period
+
+        if not self.running:
+            return False
+        if self._armed:
+            self._armed = False
+            return False
+        self.ticks += 1
+        return True
+
+    def start(self, ts: int) -> None:
+        self._prev_msg_ts = ts
+        self.ticks = 0
+        self.running = True
+        self._armed = True
+
+    def cont(self, ts: int) -> None:
+        self._prev_msg_ts = ts
+        self.running = True
+        self._armed = True
+
+    def stop(self, ts: int) -> None:
+        self._prev_msg_ts = ts
+        self.running = False
+
+    def song_position(self, position: int, ts: int) -> None:
+        """
+        Interprets a Song Position Pointer, in MIDI beats (sixteenth notes).
+        """
+        self._prev_msg_ts = ts
+        self.ticks = position * TICKS_PER_MIDI_BEAT
+
+    def register(self, router: MIDIRouter) -> None:
+        """
+        Registers the Timing Clock, transport and Song Position Pointer handlers.
+
+        adafruit_midi has no Song Position Pointer message: only the raw input receives it.
+        """
+        router.register(TIMING_CLOCK, self._on_timing_clock, CLOCK)
+        router.register(START, self._on_start, CLOCK)
+        router.register(CONTINUE, self._on_continue, CLOCK)
+        router.register(STOP, self._on_stop, CLOCK)
+        router.register(SONG_POSITION, self._on_song_position, CLOCK)
+
+    # Router handlers. Return True when the song position or transport changed.
+
+    def _on_timing_clock(self, _, __, ts: int) -> bool:
+        return self.timing_clock(ts)
+
+    def _on_start(self, _, __, ts: int) -> bool:
+        self.start(ts)
+        return True
+
+    def _on_continue(self, _, __, ts: int) -> bool:
+        self.cont(ts)
+        return True
+
+    def _on_stop(self, _, __, ts: int) -> bool:
+        self.stop(ts)
+        return True
+
+    def _on_song_position(self, lsb: int, msb: int, ts: int) -> bool:
+        self.song_position(lsb | msb << 7, ts)
+        return True
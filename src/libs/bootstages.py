@@ -0,0 +1,61 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import time
+
+# Milestones
+MIDI_READY = 'MIDI ready'  # First MIDI input poll
+FIRST_FRAME = 'first frame'  # First display pass
+
+
+class BootStages:
+    """
+    Boot stage timestamps.
+
+    Each stage is marked once it completed, with its time.monotonic_ns() timestamp.
+    Times are reported relative to the start of boot,
+    ideally taken before the first import.
+
+    Stages initialized lazily (e.g. networking) are marked whenever they happen.
+    """
+
+    def __init__(self, start: int = None) -> None:
+        self._start: int = time.monotonic_ns() if start is None else start
+        self.names: [str] = []
+        self.times: [int] = []  # ns since the start of boot
+
+    def mark(self, name: str, now: int = None) -> None:
+        """
+        Records the completion of a stage.
+        """
+        if now is None:
+            now = time.monotonic_ns()
+        self.names.append(name)
+        self.times.append(now - self._start)
+
+    def elapsed(self, name: str) -> int:
+        """
+        Time in ns from the start of boot to the completion of a stage. -1 if it did not happen yet.
+        """
+        if name not in self.names:
+            return -1
+        return self.times[self.names.index(name)]
+
+    def summary(self) -> str:
+        """
+        Time to the milestones.
+        """
+        return f"Boot: first frame {self._ms(FIRST_FRAME)}, MIDI ready {self._ms(MIDI_READY)}"
+
+    def _ms(self, name: str) -> str:
+        elapsed = self.elapsed(name)
+        return f"{elapsed / 1e6:.1f} ms" if elapsed >= 0 else "pending"
+
+    def report(self) -> None:
+        """
+        Prints every stage, with its own duration.
+        """
+        prev = 0
+        for name, elapsed in zip(self.names, self.times):
+            print(f"Boot: {name:12} {elapsed / 1e6:10.1f} ms (+{(elapsed - prev) / 1e6:.1f})")
+            prev = elapsed
+        print(self.summary())
@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import rtc
+
+# supervisor.ticks_ms() wraps around
+_TICKS_PERIOD = 1 << 29
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALFPERIOD = _TICKS_PERIOD // 2
+
+
+def ticks_diff(ticks1: int, ticks2: int) -> int:
+    """
+    Signed difference between two supervisor.ticks_ms() values, wraparound safe.
+    """
+    diff = (ticks1 - ticks2) & _TICKS_MAX
+    return ((diff + _TICKS_HALFPERIOD) & _TICKS_MAX) - _TICKS_HALFPERIOD
+
+
+class ClockScheduler:
+    """
+    Keeps the wall clock time from the hardware RTC without polling it continuously.
+
+    The RTC is read once to anchor the time to supervisor.ticks_ms()
+    which is then used to interpolate until the next anchoring.
+    Right after anchoring, the RTC is sampled a few times to catch its next second edge
+    and align our seconds with it.
+
+    poll() reports the display edges that need a redraw.
+    """
+
+    # Edges
+    BLINK = 0b001  # Half second
+    SECOND = 0b010
+    DAY = 0b100
+    ALL = BLINK | SECOND | DAY
+
+    SEEK_INTERVAL = 50  # ms between RTC reads while looking for a second edge
+    SEEK_TIMEOUT = 1100  # ms
+
+    def __init__(self, hwrtc, ticks: int, anchor_interval: int = 60 * 60) -> None:
+        self._hwrtc = hwrtc
+        self._anchor_interval: int = anchor_interval * 1000  # Converts secs to ms
+
+        # Current time
+        self.year: int = 0
+        self.month: int = 0
+        self.day: int = 0
+        self.hour: int = 0
+        self.minute: int = 0
+        self.second: int = 0
+        self.colon: bool = True  # First half of the second
+
+        # Anchor
+        self._anchor_ticks: int = 0
+        self._anchor_sod: int = 0  # Seconds of day
+        self._sod: int = -1
+        self._seeking: bool = False  # Looking for the RTC second edge
+        self._seek_ticks: int = 0  # Last RTC read while seeking
+
+        self._pending: int = self.ALL
+
+        self.reads: int = 0  # Number of RTC reads
+
+        self.anchor(ticks)
+
+    def invalidate(self) -> None:
+        """
+        Forces a full redraw on next poll.
+        """
+        self._pending = self.ALL
+
+    def _read(self) -> int:
+        """
+        Reads the hardware RTC.
+
+        Returns the seconds of day.
+        """
+        now = rtc.RTC().datetime = self._hwrtc.datetime  # Also prevents board RTC drift
+        self.reads += 1
+
+        if now[2] != self.day or now[1] != self.month or now[0] != self.year:
+            self.year = now[0]
+            self.month = now[1]
+            self.day = now[2]
+            self._pending |= self.DAY
+
+        return now[3] * 3600 + now[4] * 60 + now[5]
+
+    def anchor(self, ticks: int) -> None:
+        """
+        Reads the hardware RTC and anchors the time to the given ticks.
+        """
+        self._anchor_sod = self._read()
+        self._anchor_ticks = ticks
+
+        # Start looking for the next second edge
+        self._seeking = True
+        self._seek_ticks = ticks
+
+    def poll(self, ticks: int) -> int:
+        """
+        Advances the time to the given ticks.
+
+        Returns the edges crossed since the previous poll.
+        """
+        if self._seeking:
+            if ticks_diff(ticks, self._anchor_ticks) > self.SEEK_TIMEOUT:
+                self._seeking = False  # Keep the coarse anchor
+            elif ticks_diff(ticks, self._seek_ticks) >= self.SEEK_INTERVAL:
+                self._seek_ticks = ticks
+                sod = self._read()
+                if sod != self._anchor_sod:
+                    # Caught a second edge
+                    self._anchor_sod = sod
+                    self._anchor_ticks = ticks
+                    self._seeking = False
+
+        elapsed = ticks_diff(ticks, self._anchor_ticks)
+        if elapsed >= self._anchor_interval or elapsed < 0:
+            self.anchor(ticks)
+            elapsed = 0
+
+        sod = self._anchor_sod + elapsed // 1000
+        if sod >= 86400:
+            # Let the RTC handle the date change
+            self.anchor(ticks)
+            elapsed = 0
+            sod = self._anchor_sod
+
+        edges = self._pending
+        self._pending = 0
+
+        if sod != self._sod:
+            self._sod = sod
+            self.hour = sod // 3600
+            self.minute = sod // 60 % 60
+            self.second = sod % 60
+            edges |= self.SECOND
+
+        colon = elapsed % 1000 < 500
+        if colon != self.colon:
+            self.colon = colon
+            edges |= self.BLINK
+
+        return edges
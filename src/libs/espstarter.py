@@ -0,0 +1,75 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+from adafruit_esp32spi.adafruit_esp32spi import ESP_SPIcontrol
+from clockscheduler import ticks_diff
+
+# States
+RESETTING = 0  # Co-processor held in reset
+BOOTING = 1  # Waiting for the co-processor firmware
+READY = 2
+
+
+class _BootedESP(ESP_SPIcontrol):
+    """
+    The ESP32 SPI driver, constructed without its blocking reset: ESPStarter already did it.
+
+    Later resets (e.g. to recover from errors) are the driver's own.
+    """
+
+    _booted = True
+
+    def reset(self) -> None:
+        if self._booted:
+            self._booted = False
+            return
+        super().reset()
+
+
+class ESPStarter:
+    """
+    Brings the ESP32 co-processor up in non-blocking stages.
+
+    The ESP32 SPI driver resets the co-processor when constructed, sleeping for about 0.8 s:
+    MIDI would not be serviced meanwhile.
+    Instead, the reset pin is toggled here, one stage per step() call,
+    and the driver is only constructed once the co-processor booted.
+    """
+
+    RESET_TIME = 10  # ms
+    BOOT_TIME = 750  # ms
+
+    def __init__(self, reset, gpio0, ticks: int) -> None:
+        self._reset = reset
+        self._gpio0 = gpio0
+
+        gpio0.switch_to_output(True)  # Normal boot, not the bootloader
+        reset.switch_to_output(False)
+        self.state: int = RESETTING
+        self._state_ticks: int = ticks
+
+    def step(self, ticks: int) -> bool:
+        """
+        Advances to the next stage when due.
+
+        Returns True once the co-processor is ready.
+        """
+        state = self.state
+        if state == READY:
+            return True
+        if state == RESETTING:
+            if ticks_diff(ticks, self._state_ticks) >= self.RESET_TIME:
+                self._reset.value = True
+                self.state = BOOTING
+                self._state_ticks = ticks
+            return False
+        if ticks_diff(ticks, self._state_ticks) < self.BOOT_TIME:
+            return False
+        self._gpio0.switch_to_input()
+        self.state = READY
+        return True
+
+    def esp(self, spi, cs, ready) -> ESP_SPIcontrol:
+        """
+        The driver of the ready co-processor.
+        """
+        return _BootedESP(spi, cs, ready, self._reset, self._gpio0)
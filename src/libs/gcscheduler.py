@@ -0,0 +1,37 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import gc
+
+
+class GCScheduler:
+    """
+    Collects garbage in known idle windows instead of whenever the heap happens to fill up.
+
+    The main loop reports its idle windows, e.g. right after a frame boundary was drawn
+    while the next one is still at least a Quarter Frame away.
+    A collection runs in the first window once the interval has elapsed.
+
+    CircuitPython has no incremental collector:
+    collecting regularly while little garbage has accumulated keeps each pause short.
+    Automatic collection stays enabled as a safety net.
+    """
+
+    def __init__(self, collect=gc.collect, interval: int = 1000) -> None:
+        self._collect = collect
+        self._interval: int = interval * 1000000  # Converts ms to ns
+        self._next: int = 0
+
+        self.collections: int = 0
+
+    def idle(self, now: int) -> bool:
+        """
+        Reports an idle window.
+
+        Returns True if garbage was collected.
+        """
+        if now < self._next:
+            return False
+        self._collect()
+        self._next = now + self._interval
+        self.collections += 1
+        return True
@@ -0,0 +1,197 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import displayio
+
+try:
+    import bitmaptools
+except ImportError:
+    bitmaptools = None
+
+CHARSET = " -.0123456789:"  # Every glyph the clock needs. Space must come first.
+
+ATLAS_MAGIC = b'GLA1'
+
+
+class GlyphSheet:
+    """
+    A sprite sheet holding every glyph of a charset pre-blitted into one Bitmap.
+
+    All cells share the font bounding box size so that glyphs can be swapped
+    by changing a TileGrid tile index only.
+
+    The sheet is either rendered from a font or loaded from a glyph atlas precompiled
+    on the host by tools/glyphatlas.py: a header, the metrics and the bitmap read in one go.
+    """
+
+    def __init__(self, font=None, charset: str = CHARSET, *, atlas: str = None) -> None:
+        # Tile index by ASCII code. Unknown characters are rendered as the first tile (space).
+        self.tiles = bytearray(128)
+        # Tile index by decimal digit
+        self.digits = bytearray(10)
+
+        if atlas is not None:
+            self._load(atlas)
+        else:
+            self._render(font, charset)
+
+        for digit in range(10):
+            self.digits[digit] = self.tiles[0x30 + digit]
+
+    def _render(self, font, charset: str) -> None:
+        font.load_glyphs(charset)
+        width, height, x_offset, y_offset = font.get_bounding_box()
+        baseline = height + y_offset
+
+        self.tile_width: int = width
+        self.tile_height: int = height
+        self.bitmap = displayio.Bitmap(width * len(charset), height, 2)
+
+        # Horizontal advance by tile index
+        self.advances = bytearray(len(charset))
+
+        for tile, char in enumerate(charset):
+            self.tiles[ord(char)] = tile
+            glyph = font.get_glyph(ord(char))
+            if glyph is None:
+                continue
+            self.advances[tile] = glyph.shift_x
+            src_x = glyph.tile_index * glyph.width
+            dst_x = tile * width + glyph.dx - x_offset
+            dst_y = baseline - glyph.height - glyph.dy
+            for y in range(glyph.height):
+                for x in range(glyph.width):
+                    if glyph.bitmap[src_x + x, y]:
+                        self.bitmap[dst_x + x, dst_y + y] = 1
+
+    def _load(self, path: str) -> None:
+        with open(path, 'rb') as f:
+            header = f.read(7)
+            if len(header) != 7 or header[:4] != ATLAS_MAGIC:
+                raise ValueError(f"{path} is not a glyph atlas")
+            width = header[4]
+            height = header[5]
+            count = header[6]
+            row_bytes = (width * count + 7) // 8
+
+            # Truncated or stale atlases would leave the sheet partly blank
+            size = f.seek(0, 2)
+            f.seek(7)
+            if not (width and height and count) or size != 7 + 2 * count + row_bytes * height:
+                raise ValueError(f"{path}: corrupted glyph atlas")
+
+            self.tile_width: int = width
+            self.tile_height: int = height
+            for tile, code in enumerate(f.read(count)):
+                self.tiles[code] = tile
+            self.advances = bytearray(f.read(count))
+
+            self.bitmap = displayio.Bitmap(width * count, height, 2)
+            if bitmaptools is not None:
+                bitmaptools.readinto(self.bitmap, f, 1, reverse_pixels_in_element=True)  # MSB first
+                return
+
+            # Slower, still no font parsing
+            for y in range(height):
+                row = f.read(row_bytes)
+                for x in range(width * count):
+                    if row[x >> 3] & (0x80 >> (x & 7)):
+                        self.bitmap[x, y] = 1
+
+    def tile(self, char: str) -> int:
+        return self.tiles[ord(char) & 0x7F]
+
+
+class GlyphCells(displayio.Group):
+    """
+    A fixed layout text line with one TileGrid cell per character position.
+
+    Positions are laid out once from a template string.
+    Updating the text only changes the tile index of the characters that differ.
+    """
+
+    def __init__(self, sheet: GlyphSheet, template: str, color: int, *, x: int = 0, y: int = 0) -> None:
+        super().__init__(x=x, y=y)
+        self._sheet = sheet
+
+        self._palette = displayio.Palette(2)
+        self._palette.make_transparent(0)  # Cells overlap
+        self._palette[1] = color
+
+        self._length = len(template)
+        self._cells = bytearray(self._length)  # Current tile index by position
+        self._grids = []
+
+        cell_x = 0
+        for position, char in enumerate(template):
+            tile = sheet.tile(char)
+            grid = displayio.TileGrid(
+                sheet.bitmap,
+                pixel_shader=self._palette,
+                width=1,
+                height=1,
+                tile_width=sheet.tile_width,
+                tile_height=sheet.tile_height,
+                default_tile=tile,
+                x=cell_x,
+            )
+            self._cells[position] = tile
+            self._grids.append(grid)
+            self.append(grid)
+            cell_x += sheet.advances[tile]
+
+        self.width: int = cell_x
+        self.height: int = sheet.tile_height
+        self._text: str = template
+
+    @property
+    def color(self) -> int:
+        return self._palette[1]
+
+    @color.setter
+    def color(self, value: int) -> None:
+        if self._palette[1] != value:
+            self._palette[1] = value
+
+    @property
+    def text(self) -> str:
+        """
+        The last text set. None once changed by tile.
+        """
+        return self._text
+
+    @text.setter
+    def text(self, value: str) -> None:
+        if value == self._text:
+            return
+        self._text = value
+        tiles = self._sheet.tiles
+        cells = self._cells
+        length = len(value)
+        for position in range(self._length):
+            # Pad with the first tile (space)
+            tile = tiles[ord(value[position]) & 0x7F] if position < length else 0
+            if cells[position] != tile:
+                cells[position] = tile
+                self._grids[position][0] = tile
+
+    def set_tile(self, position: int, tile: int) -> None:
+        """
+        Changes a single position by tile index, without going through a string.
+        """
+        if self._cells[position] != tile:
+            self._cells[position] = tile
+            self._grids[position][0] = tile
+            self._text = None
+
+    def set_number(self, position: int, value: int, digits: int) -> None:
+        """
+        Writes a zero padded decimal number of digits length from position, without going through a string.
+
+        Higher digits that do not fit are dropped.
+        """
+        tiles = self._sheet.digits
+        position += digits
+        for _ in range(digits):
+            position -= 1
+            self.set_tile(position, tiles[value % 10])
+            value //= 10
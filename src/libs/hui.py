@@ -0,0 +1,221 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import time
+
+import displayio
+from glyphcells import GlyphCells, GlyphSheet
+from midirouter import HUI, MIDIRouter
+
+# SysEx: F0 00 00 66 05 00 <command> ... F7
+MANUFACTURER_ID = b'\x00\x00\x66'  # Mackie
+HEADER_LEN = 6  # Manufacturer ID, product ID (05), device (00) and command
+TIMECODE = 0x11  # Time display. Followed by 1 to 8 digits, rightmost first.
+TIMECODE_PREFIX = MANUFACTURER_ID + bytes((0x05, 0x00, TIMECODE))
+METER = 0xA0  # Polyphonic Key Pressure, channel 1: A0 0z sv (z: strip, s: side, v: level)
+PING = 0x90  # Note On, channel 1: 90 00 00. Sent by the host every second.
+
+DIGITS = 8
+DECIMAL_POINT = 0x10  # Set in a digit value
+STRIPS = 8
+METERS = STRIPS * 2  # Left and right side by strip
+MAX_LEVEL = 12  # Clip
+
+
+class HUIDecoder:
+    """
+    A Mackie HUI time display and meters decoder.
+
+    Decoded state is kept in fixed arrays with a dirty bit per digit and per meter
+    so that the display only redraws what changed, once per display update,
+    however many messages arrived in between.
+
+    Everything else HUI sends (switches, faders, text displays...) is dropped
+    by the MIDI router before reaching the decoder.
+    """
+
+    def __init__(self, timeout: int = 5) -> None:
+        self.digits = bytearray(DIGITS)  # Rightmost first. Values may have DECIMAL_POINT set.
+        self.meters = bytearray(METERS)  # Indexed by strip * 2 + side
+        self.dirty_digits: int = 0  # One bit per digit
+        self.dirty_meters: int = 0  # One bit per meter
+
+        # Only the time display and pings are specific to HUI:
+        # channel 1 Polyphonic Key Pressure also comes from keyboards.
+        self._detected: bool = False
+
+        # Timestamps
+        self._prev_msg_ts: int = time.monotonic_ns()  # Last time display or ping
+        self._timeout: float = timeout * 1e9  # Converts secs to nanoseconds
+
+    def detected(self, ts: int) -> bool:
+        """
+        A time display or ping was received recently
+        """
+        return self._detected and ts <= self._prev_msg_ts + self._timeout
+
+    @property
+    def timedout(self) -> bool:
+        """
+        Checks if we recently received HUI messages
+        """
+        if time.monotonic_ns() > self._prev_msg_ts + self._timeout:
+            self._detected = False
+            return True
+        return False
+
+    def ping(self, ts: int) -> None:
+        """
+        Interprets a ping.
+        """
+        self._prev_msg_ts = ts
+        self._detected = True
+
+    def timecode(self, buf, start: int, end: int, ts: int) -> bool:
+        """
+        Interprets the time display digits held in buf[start:end].
+
+        Returns True if any digit changed.
+        """
+        self._prev_msg_ts = ts
+        self._detected = True
+        if end - start > DIGITS:
+            end = start + DIGITS
+        digits = self.digits
+        dirty = self.dirty_digits
+        for i in range(end - start):
+            value = buf[start + i]
+            if digits[i] != value:
+                digits[i] = value
+                dirty |= 1 << i
+        changed = dirty != self.dirty_digits
+        self.dirty_digits = dirty
+        return changed
+
+    def meter(self, strip: int, value: int, ts: int) -> bool:
+        """
+        Interprets a meter message data bytes. Ignored until HUI is detected.
+
+        Returns True if the level changed.
+        """
+        if strip >= STRIPS or not self.detected(ts):
+            return False
+        index = strip << 1 | (value >> 4) & 1
+        level = value & 0x0F
+        if level > MAX_LEVEL:
+            level = MAX_LEVEL
+        if self.meters[index] == level:
+            return False
+        self.meters[index] = level
+        self.dirty_meters |= 1 << index
+        return True
+
+    def register(self, router: MIDIRouter) -> None:
+        """
+        Registers the ping, meters and time display handlers.
+
+        Time displays and pings always count as a change so that HUI gets detected.
+        Meters only count once it was.
+        """
+        router.register(PING, self._on_ping, HUI)
+        router.register(METER, self.meter, HUI)
+        router.register_sysex(TIMECODE_PREFIX, self._on_timecode, HUI, HEADER_LEN + DIGITS)
+
+    def _on_ping(self, note: int, velocity: int, ts: int) -> bool:
+        if note or velocity:
+            return False  # A keyboard
+        self.ping(ts)
+        return True
+
+    def _on_timecode(self, buf, start: int, end: int, ts: int) -> bool:
+        self.timecode(buf, start + HEADER_LEN, end, ts)
+        return True
+
+
+class HUIDisplay(displayio.Group):
+    """
+    Renders the HUI time display and meters.
+
+    Meters are bars in a TileGrid with one precomputed tile per level:
+    a level change is a single tile index write.
+    Digits are swapped by tile index in GlyphCells.
+    """
+
+    BAR_WIDTH = 3
+    BAR_SPACING = 4
+
+    def __init__(self, sheet: GlyphSheet, palette: displayio.Palette, width: int, height: int) -> None:
+        super().__init__()
+
+        # Level tiles. Segments use the palette indexes: red (1) clip, yellow (2) and green (3).
+        bitmap = displayio.Bitmap(self.BAR_SPACING * (MAX_LEVEL + 1), MAX_LEVEL, 4)
+        for level in range(1, MAX_LEVEL + 1):
+            for segment in range(level):
+                if segment == MAX_LEVEL - 1:
+                    value = 1
+                elif segment >= MAX_LEVEL - 4:
+                    value = 2
+                else:
+                    value = 3
+                y = MAX_LEVEL - 1 - segment
+                for x in range(self.BAR_WIDTH):
+                    bitmap[level * self.BAR_SPACING + x, y] = value
+        self._meter_grid = displayio.TileGrid(
+            bitmap,
+            pixel_shader=palette,
+            width=METERS,
+            height=1,
+            tile_width=self.BAR_SPACING,
+            tile_height=MAX_LEVEL,
+            x=(width - METERS * self.BAR_SPACING) // 2,
+        )
+
+        # HH:MM:SS:FF layout. Separators show the decimal points.
+        self._label = GlyphCells(sheet, '00:00:00:00', palette[1])
+        self._label.x = width // 2 - self._label.width // 2
+        self._label.y = MAX_LEVEL + (height - MAX_LEVEL - self._label.height) // 2
+
+        # Cell position by digit (rightmost first) and separator position after it
+        self._digit_cells = bytes((10, 9, 7, 6, 4, 3, 1, 0))
+        self._separator_cells = bytes((0, 0, 8, 0, 5, 0, 2, 0))  # 0: none
+        self._digit_tiles = bytearray(16)
+        for value in range(16):
+            self._digit_tiles[value] = sheet.tile(str(value) if value < 10 else ' ')
+        self._point_tile = sheet.tile('.')
+        self._blank_tile = sheet.tile(' ')
+
+        self.append(self._meter_grid)
+        self.append(self._label)
+
+    @property
+    def color(self) -> int:
+        return self._label.color
+
+    @color.setter
+    def color(self, value: int) -> None:
+        self._label.color = value
+
+    def update(self, hui: HUIDecoder) -> None:
+        """
+        Applies every pending change of the decoder in one go.
+        """
+        dirty = hui.dirty_meters
+        if dirty:
+            meters = hui.meters
+            grid = self._meter_grid
+            for index in range(METERS):
+                if dirty & (1 << index):
+                    grid[index] = meters[index]
+            hui.dirty_meters = 0
+
+        dirty = hui.dirty_digits
+        if dirty:
+            digits = hui.digits
+            label = self._label
+            for i in range(DIGITS):
+                if dirty & (1 << i):
+                    value = digits[i]
+                    label.set_tile(self._digit_cells[i], self._digit_tiles[value & 0x0F])
+                    separator = self._separator_cells[i]
+                    if separator:
+                        label.set_tile(separator, self._point_tile if value & DECIMAL_POINT else self._blank_tile)
+            hui.dirty_digits = 0
@@ -0,0 +1,230 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import gc
+import time
+from array import array
+
+try:
+    import usb_cdc
+except ImportError:
+    usb_cdc = None
+
+# Stages
+MIDI = 0  # MIDI ingest, decoding included
+DECODE = 1  # MTC decoding
+DISPLAY = 2  # Display update
+BUTTONS = 3  # Buttons polling
+LOOP = 4  # Full scheduler pass
+GC = 5  # Garbage collection pauses
+ALLOC = 6  # Bytes allocated by a full scheduler pass. Not a duration.
+REFRESH = 7  # Display latency, from the first change to the end of its refresh
+
+STAGE_NAMES = ('MIDI', 'DECODE', 'DISPLAY', 'BUTTONS', 'LOOP', 'GC', 'ALLOC', 'REFRESH')
+STAGES = len(STAGE_NAMES)
+
+# Histogram bucket n counts values from 2^(n-1) up to 2^n - 1 (µs or bytes). The last one also counts larger ones.
+BUCKETS = 24  # Up to ~8 seconds
+
+
+class Instrument:
+    """
+    Per-stage latency statistics with fixed-size preallocated storage.
+
+    Each stage keeps all-time count, min, max and a log2 µs histogram
+    plus a ring buffer of the latest durations for exact recent percentiles.
+    Recording never allocates nor prints.
+
+    Allocations are counted the same way, in bytes per scheduler pass, where gc.mem_alloc() is available.
+
+    When disabled, wrap() returns the callables unchanged so that there is no overhead at all.
+    """
+
+    def __init__(self, enabled: bool = False, ring_size: int = 64) -> None:
+        self.enabled: bool = enabled
+        self.ring_size: int = ring_size
+
+        self.counts = array('L', [0] * STAGES)
+        self.mins = array('L', [0] * STAGES)
+        self.maxs = array('L', [0] * STAGES)
+        self.histograms = array('L', [0] * (STAGES * BUCKETS))
+        self.rings = array('L', [0] * (STAGES * ring_size))  # µs
+        self._ring_pos = array('H', [0] * STAGES)
+        self._laps = [0] * STAGES  # Previous lap timestamp by stage
+        self._mem_alloc = getattr(gc, 'mem_alloc', None)  # Not on the host
+        self._prev_alloc: int = 0
+
+        # Extra reports printed with the statistics
+        self.reports: list = []
+
+        # Console commands
+        self._console = usb_cdc.console if usb_cdc is not None else None
+        self._command = bytearray(16)
+        self._command_len: int = 0
+
+    def reset(self) -> None:
+        for stage in range(STAGES):
+            self.counts[stage] = 0
+            self.mins[stage] = 0
+            self.maxs[stage] = 0
+            self._ring_pos[stage] = 0
+            self._laps[stage] = 0
+        for i in range(len(self.histograms)):
+            self.histograms[i] = 0
+
+    def record(self, stage: int, ns: int) -> None:
+        """
+        Records a duration in nanoseconds.
+        """
+        self.add(stage, ns // 1000)
+
+    def add(self, stage: int, value: int) -> None:
+        """
+        Records a value in the stage unit.
+        """
+        count = self.counts[stage]
+        if not count or value < self.mins[stage]:
+            self.mins[stage] = value
+        if value > self.maxs[stage]:
+            self.maxs[stage] = value
+        self.counts[stage] = count + 1
+
+        bucket = 0
+        rest = value
+        while rest and bucket < BUCKETS - 1:
+            rest >>= 1
+            bucket += 1
+        self.histograms[stage * BUCKETS + bucket] += 1
+
+        pos = self._ring_pos[stage]
+        self.rings[stage * self.ring_size + pos] = value
+        pos += 1
+        self._ring_pos[stage] = 0 if pos == self.ring_size else pos
+
+    def lap(self, stage: int, ns: int) -> None:
+        """
+        Records the duration since the previous lap of a stage.
+        """
+        prev = self._laps[stage]
+        self._laps[stage] = ns
+        if prev:
+            self.record(stage, ns - prev)
+
+    def allocations(self) -> None:
+        """
+        Records the bytes allocated since the previous call. Call once per scheduler pass.
+
+        Passes that collected garbage are skipped.
+        """
+        if self._mem_alloc is None:
+            return
+        allocated = self._mem_alloc()
+        prev = self._prev_alloc
+        self._prev_alloc = allocated
+        if prev and allocated >= prev:
+            self.add(ALLOC, allocated - prev)
+
+    def wrap(self, f, stage: int):
+        """
+        Times every call of a callable.
+        """
+        if not self.enabled:
+            return f
+
+        record = self.record
+        clock = time.monotonic_ns
+
+        def timed(*args):
+            start = clock()
+            result = f(*args)
+            record(stage, clock() - start)
+            return result
+
+        return timed
+
+    def recorder(self, stage: int):
+        """
+        A callable recording durations in ns for a stage. None when disabled.
+        """
+        if not self.enabled:
+            return None
+
+        record = self.record
+
+        def recording(ns):
+            record(stage, ns)
+
+        return recording
+
+    def collect(self) -> None:
+        """
+        Collects garbage, timing the pause.
+        """
+        if not self.enabled:
+            gc.collect()
+            return
+        start = time.monotonic_ns()
+        gc.collect()
+        self.record(GC, time.monotonic_ns() - start)
+
+    def percentile(self, stage: int, p: int) -> int:
+        """
+        Nearest-rank percentile of the recent durations in µs.
+        """
+        count = min(self.counts[stage], self.ring_size)
+        if not count:
+            return 0
+        start = stage * self.ring_size
+        recent = sorted(self.rings[start:start + count])
+        rank = (p * count + 99) // 100
+        return recent[max(rank, 1) - 1]
+
+    def dump(self) -> None:
+        """
+        Prints the statistics summary.
+        """
+        print(f"{'stage':8} {'count':>8} {'min':>8} {'p50':>8} {'p99':>8} {'max':>8} (µs or bytes, p50/p99 of the last {self.ring_size})")
+        for stage, name in enumerate(STAGE_NAMES):
+            count = self.counts[stage]
+            if not count:
+                continue
+            print(
+                f"{name:8} {count:8d} {self.mins[stage]:8d} {self.percentile(stage, 50):8d} "
+                f"{self.percentile(stage, 99):8d} {self.maxs[stage]:8d}"
+            )
+            start = stage * BUCKETS
+            buckets = [
+                f"<{1 << bucket}:{self.histograms[start + bucket]}"
+                for bucket in range(BUCKETS) if self.histograms[start + bucket]
+            ]
+            print("         " + " ".join(buckets))
+        for report in self.reports:
+            report()
+        if hasattr(gc, 'mem_free'):  # Not on the host
+            print(f"free memory: {gc.mem_free()}")
+
+    def poll_console(self) -> None:
+        """
+        Handles the console commands, without blocking:
+        - d: dumps the statistics
+        - r: resets the statistics
+        """
+        console = self._console
+        if console is None or not console.in_waiting:
+            return
+        for byte in console.read(console.in_waiting):
+            if byte == 0x0A or byte == 0x0D:  # End of line
+                self._run_command(self._command[:self._command_len])
+                self._command_len = 0
+            elif self._command_len < len(self._command):
+                self._command[self._command_len] = byte
+                self._command_len += 1
+
+    def _run_command(self, command: bytes) -> None:
+        command = command.strip()
+        if command in (b'd', b'dump'):
+            self.dump()
+        elif command in (b'r', b'reset'):
+            self.reset()
+            print("Statistics reset")
+        elif command:
+            print("Commands: d(ump), r(eset)")
@@ -0,0 +1,304 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import time
+
+import displayio
+from glyphcells import GlyphCells, GlyphSheet
+from midirouter import MCU, MIDIRouter
+
+# Control Change, channel 1: B0 4x cc
+DISPLAY_CC = 0xB0
+TIMECODE_FIRST = 0x40  # Rightmost timecode/BBT digit
+TIMECODE_LAST = 0x49  # Leftmost timecode/BBT digit
+ASSIGNMENT_FIRST = 0x4A  # Right assignment digit
+ASSIGNMENT_LAST = 0x4B  # Left assignment digit
+# Channel Pressure, channel 1: D0 sv (s: strip, v: level or overload command)
+METER = 0xD0
+BLANK = 0x20  # Space character value
+
+DIGITS = 10
+CHARS = 12  # Timecode then assignment
+DECIMAL_POINT = 0x40  # Set in a character value
+STRIPS = 8
+MAX_LEVEL = 12
+OVERLOAD_SET = 0x0E
+OVERLOAD_CLEAR = 0x0F
+
+
+def char_code(value: int) -> int:
+    """
+    ASCII code of an MCU 7-segment character value.
+    """
+    value &= 0x3F
+    return value + 0x40 if value < 0x20 else value  # 0x00-0x1F are '@' to '_'
+
+
+class MCUDecoder:
+    """
+    A Mackie Control Universal timecode/BBT display, assignment display and meters decoder.
+
+    Each display message names a single character position:
+    the 10 timecode and 2 assignment characters are kept in a fixed buffer
+    with a dirty bit per character so that only the named cells get redrawn.
+
+    Meters decay by themselves as specified, one level per DECAY_INTERVAL.
+
+    Channel 1 controllers 0x40 to 0x4B are also standard controllers (pedals, sound controllers...).
+    MCU is only detected when most timecode positions are written within DETECT_WINDOW,
+    as hosts do when they (re)draw the whole display.
+    Once a host was detected, a couple of changing digits are enough to detect it again:
+    after a stop, playback resumes with only the rightmost digits changing.
+
+    Hosts send nothing while the transport is stopped.
+    A static display only times out once blanked (hosts clear it when closing)
+    or after idle_timeout seconds without messages.
+    """
+
+    DECAY_INTERVAL = 300000000  # ns
+    DETECT_WINDOW = 1000000000  # ns
+    DETECT_POSITIONS = 8  # Distinct timecode positions within DETECT_WINDOW
+    REDETECT_POSITIONS = 2  # Distinct timecode positions within DETECT_WINDOW, once detected before
+
+    def __init__(self, timeout: int = 5, idle_timeout: int = 600) -> None:
+        self.chars = bytearray(CHARS)  # Rightmost first. Values may have DECIMAL_POINT set.
+        self.dirty_chars: int = 0  # One bit per character
+        self.meters = bytearray(STRIPS)
+        self.overloads: int = 0  # One bit per strip
+        self.dirty_meters: int = 0  # One bit per strip
+
+        # Timecode positions received since _seen_ts, one bit per position
+        self._seen: int = 0
+        self._seen_count: int = 0
+        self._seen_ts: int = 0
+        self._detected: bool = False
+        self._known: bool = False  # Detected at least once
+        self._next_decay: int = 0
+
+        # Timestamps
+        self._prev_msg_ts: int = time.monotonic_ns()  # Last display message
+        self._timeout: float = timeout * 1e9  # Converts secs to nanoseconds
+        self._idle_timeout: float = idle_timeout * 1e9
+
+    @property
+    def detected(self) -> bool:
+        """
+        MCU display traffic was received
+        """
+        return self._detected
+
+    @property
+    def timedout(self) -> bool:
+        """
+        Checks if we recently received MCU messages or still show a stopped host's display
+        """
+        if self._expired(time.monotonic_ns()):
+            self._detected = False
+            return True
+        return False
+
+    def _expired(self, now: int) -> bool:
+        silence = now - self._prev_msg_ts
+        if silence <= self._timeout:
+            return False
+        if silence > self._idle_timeout:
+            return True
+        chars = self.chars
+        for position in range(DIGITS):
+            if chars[position] & 0x3F != BLANK:
+                return False  # Static display: stopped
+        return True
+
+    def control_change(self, control: int, value: int, ts: int) -> bool:
+        """
+        Interprets a Control Change.
+
+        Returns True if it was a display message.
+        """
+        if not TIMECODE_FIRST <= control <= ASSIGNMENT_LAST:
+            return False
+        if self._detected and self._expired(ts):
+            self._detected = False  # Whatever the mode, timedout may not have been checked
+        self._prev_msg_ts = ts
+        position = control - TIMECODE_FIRST
+        if not self._detected and position < DIGITS:
+            if ts > self._seen_ts + self.DETECT_WINDOW:
+                self._seen = 0
+                self._seen_count = 0
+                self._seen_ts = ts
+            bit = 1 << position
+            if not self._seen & bit:
+                self._seen |= bit
+                self._seen_count += 1
+                if self._seen_count >= (self.REDETECT_POSITIONS if self._known else self.DETECT_POSITIONS):
+                    self._detected = True
+                    self._known = True
+        if self.chars[position] != value:
+            self.chars[position] = value
+            self.dirty_chars |= 1 << position
+        return True
+
+    def meter(self, value: int, ts: int) -> None:
+        """
+        Interprets a meter message data byte. Ignored until MCU is detected.
+        """
+        strip = value >> 4
+        if strip >= STRIPS or not self._detected:
+            return  # Channel pressure from a keyboard
+        level = value & 0x0F
+        bit = 1 << strip
+        if level == OVERLOAD_SET:
+            self.overloads |= bit
+        elif level == OVERLOAD_CLEAR:
+            self.overloads &= ~bit
+        else:
+            if level > MAX_LEVEL:
+                level = MAX_LEVEL
+            if self.meters[strip] == level:
+                return
+            self.meters[strip] = level
+        self.dirty_meters |= bit
+
+    def decay(self, now: int) -> None:
+        """
+        Lowers every meter by one level per DECAY_INTERVAL.
+        """
+        if now < self._next_decay:
+            return
+        self._next_decay = now + self.DECAY_INTERVAL
+        meters = self.meters
+        for strip in range(STRIPS):
+            if meters[strip]:
+                meters[strip] -= 1
+                self.dirty_meters |= 1 << strip
+
+    def register(self, router: MIDIRouter) -> None:
+        """
+        Registers the display and meters handlers.
+
+        Only detected display messages count as a change:
+        channel 1 controllers and channel pressure are common on keyboards.
+        """
+        router.register(DISPLAY_CC, self._on_control_change, MCU)
+        router.register(METER, self._on_meter, MCU)
+
+    def _on_control_change(self, control: int, value: int, ts: int) -> bool:
+        return self.control_change(control, value, ts) and self.detected
+
+    def _on_meter(self, value: int, _, ts: int) -> bool:
+        self.meter(value, ts)
+        return False
+
+
+class MCUDisplay(displayio.Group):
+    """
+    Renders the MCU displays and meters.
+
+    The 10 characters timecode/BBT display does not fit a single line:
+    the leftmost 3 characters share the top line with the assignment display,
+    the other 7 are on the second line.
+    The font only has digits: letters are blank.
+
+    Meters are a TileGrid with one precomputed tile per level and overload state.
+    """
+
+    METER_WIDTH = 7
+    METER_SPACING = 8
+
+    def __init__(self, sheet: GlyphSheet, palette: displayio.Palette, width: int, height: int) -> None:
+        super().__init__()
+
+        self._assignment = GlyphCells(sheet, '00', palette[1], x=1)
+        self._upper = GlyphCells(sheet, '000.', palette[1])
+        self._upper.x = width - 1 - self._upper.width
+        self._lower = GlyphCells(sheet, '00.00.000', palette[1])
+        self._lower.x = width // 2 - self._lower.width // 2
+        self._lower.y = self._upper.height
+        labels = (self._upper, self._lower, self._assignment)
+
+        # Label and cell by character position (rightmost first), then decimal point label and cell
+        self._labels = (self._lower, self._lower, self._lower, self._lower, self._lower,
+                        self._lower, self._lower, self._upper, self._upper, self._upper,
+                        self._assignment, self._assignment)
+        self._cells = bytes((8, 7, 6, 4, 3, 1, 0, 2, 1, 0, 1, 0))
+        self._point_labels = (None, None, None, self._lower, None, self._lower,
+                              None, self._upper, None, None, None, None)
+        self._point_cells = bytes((0, 0, 0, 5, 0, 2, 0, 3, 0, 0, 0, 0))
+
+        self._char_tiles = bytearray(64)
+        for value in range(64):
+            self._char_tiles[value] = sheet.tile(chr(char_code(value)))
+        self._point_tile = sheet.tile('.')
+        self._blank_tile = sheet.tile(' ')
+
+        # Meter tiles: levels, then levels with the overload segment lit.
+        # Segments use the palette indexes: red (1) overload, yellow (2) and green (3).
+        meter_height = height - 2 * self._upper.height
+        tiles = MAX_LEVEL + 1
+        bitmap = displayio.Bitmap(self.METER_SPACING * tiles * 2, meter_height, 4)
+        for overload in range(2):
+            for level in range(tiles):
+                tile_x = (overload * tiles + level) * self.METER_SPACING
+                lit = (level * (meter_height - 1) + MAX_LEVEL - 1) // MAX_LEVEL  # Top row is for overload
+                for row in range(lit):
+                    value = 2 if level >= MAX_LEVEL - 3 and row >= lit - 2 else 3
+                    for x in range(self.METER_WIDTH):
+                        bitmap[tile_x + x, meter_height - 1 - row] = value
+                if overload:
+                    for x in range(self.METER_WIDTH):
+                        bitmap[tile_x + x, 0] = 1
+        self._meter_grid = displayio.TileGrid(
+            bitmap,
+            pixel_shader=palette,
+            width=STRIPS,
+            height=1,
+            tile_width=self.METER_SPACING,
+            tile_height=meter_height,
+            x=(width - STRIPS * self.METER_SPACING) // 2,
+            y=height - meter_height,
+        )
+
+        for label in labels:
+            self.append(label)
+        self.append(self._meter_grid)
+
+    @property
+    def color(self) -> int:
+        return self._lower.color
+
+    @color.setter
+    def color(self, value: int) -> None:
+        self._assignment.color = value
+        self._upper.color = value
+        self._lower.color = value
+
+    def update(self, mcu: MCUDecoder) -> None:
+        """
+        Applies every pending change of the decoder in one go.
+        """
+        dirty = mcu.dirty_chars
+        if dirty:
+            chars = mcu.chars
+            for position in range(CHARS):
+                if dirty & (1 << position):
+                    value = chars[position]
+                    self._labels[position].set_tile(self._cells[position], self._char_tiles[value & 0x3F])
+                    point_label = self._point_labels[position]
+                    if point_label is not None:
+                        point_label.set_tile(
+                            self._point_cells[position],
+                            self._point_tile if value & DECIMAL_POINT else self._blank_tile
+                        )
+            mcu.dirty_chars = 0
+
+        dirty = mcu.dirty_meters
+        if dirty:
+            meters = mcu.meters
+            overloads = mcu.overloads
+            grid = self._meter_grid
+            for strip in range(STRIPS):
+                if dirty & (1 << strip):
+                    tile = meters[strip]
+                    if overloads & (1 << strip):
+                        tile += MAX_LEVEL + 1
+                    grid[strip] = tile
+            mcu.dirty_meters = 0
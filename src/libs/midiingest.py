@@ -0,0 +1,87 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+from array import array
+
+from midirouter import CLOCK, HUI, MCU, MMC, MTC, MIDIRouter
+
+BATCH_BUCKETS = 8  # Batch sizes histogram: 1, 2-3, 4-7, 8-15, 16-31, 32-63, 64-127, 128+
+
+
+class MIDIIngest:
+    """
+    Drains all pending MIDI input once per main loop iteration.
+
+    Messages are dispatched in order by the MIDI router to the subsystems that registered for them
+    and their results are coalesced so that the display is only updated once
+    with the final state, however many frames arrived together.
+
+    Accepts either a RawMTCInput or an AdafruitMIDIInput.
+    """
+
+    def __init__(self, midi, router: MIDIRouter, max_reads: int = 16) -> None:
+        self._midi = midi
+        self._router = router
+        self._max_reads = max_reads  # Bounds the time spent draining a flooded bus
+
+        # Coalesced results of the last drain
+        self.is_mtc: bool = False
+        self.is_frame: bool = False
+        self.more: bool = False  # Stopped at the reads limit with input still pending
+        self.is_clock: bool = False  # Beat clock messages received
+        self.is_position: bool = False  # Beat clock song position or transport changed
+        self.is_hui: bool = False  # HUI time display, ping or meters received
+        self.is_mcu: bool = False  # MCU display messages received
+
+        # Statistics
+        self.batches: int = 0  # Drains that ingested at least one MTC message
+        self.messages: int = 0  # MTC messages ingested
+        self.frames: int = 0  # Frame updates received
+        self.coalesced: int = 0  # Frame updates superseded before being displayed
+        self.last_batch: int = 0  # MTC messages ingested by the last drain
+        self.max_batch: int = 0
+        self.batch_sizes = array('L', [0] * BATCH_BUCKETS)
+
+    def drain(self, ts: int) -> int:
+        """
+        Ingests every pending message.
+
+        Returns the number of MTC messages ingested.
+        """
+        router = self._router
+        router.round()
+
+        midi = self._midi
+        for _ in range(self._max_reads):
+            midi.poll(ts)
+            more = midi.more
+            if not more:
+                break
+
+        received = router.received
+        changed = router.changed
+        messages = received[MTC]  # Only Quarter and Full Frames switch modes
+        frames = changed[MTC] + changed[MMC]
+        self.is_mtc = messages > 0
+        self.is_clock = received[CLOCK] > 0
+        self.is_position = changed[CLOCK] > 0
+        self.is_hui = changed[HUI] > 0
+        self.is_mcu = changed[MCU] > 0
+        self.more = more
+        self.is_frame = frames > 0
+        self.last_batch = messages
+
+        if messages:
+            self.batches += 1
+            self.messages += messages
+            self.frames += frames
+            if frames > 1:
+                self.coalesced += frames - 1
+            if messages > self.max_batch:
+                self.max_batch = messages
+            bucket = 0
+            while messages > 1 and bucket < BATCH_BUCKETS - 1:
+                messages >>= 1
+                bucket += 1
+            self.batch_sizes[bucket] += 1
+
+        return self.last_batch
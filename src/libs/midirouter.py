@@ -0,0 +1,178 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+from array import array
+
+# Status bytes
+SYSEX_START = 0xF0
+QUARTER_FRAME = 0xF1
+SONG_POSITION = 0xF2
+SYSEX_END = 0xF7
+TIMING_CLOCK = 0xF8
+START = 0xFA
+CONTINUE = 0xFB
+STOP = 0xFC
+
+# Wildcard in SysEx prefixes. Never matches a data byte otherwise.
+ANY = 0x80
+
+# Subsystems. Messages are accounted per subsystem for each dispatch round.
+MTC = 0
+CLOCK = 1
+HUI = 2
+MCU = 3
+MMC = 4  # MIDI Machine Control and MTC NAK: transport of an existing MTC session only
+SUBSYSTEMS = 5
+
+
+class MIDIRouter:
+    """
+    Dispatches MIDI messages by status byte through a precomputed handlers table.
+
+    Subsystems register handlers for the status bytes and SysEx prefixes they need.
+    Everything else is dropped by a single table lookup.
+
+    Handlers get the data bytes (0 when absent) and the timestamp:
+    handler(data1, data2, ts) for channel, system common and real time messages
+    and handler(buf, start, end, ts) for SysEx, buf[start:end] holding the bytes between F0 and F7.
+    They return True when their state changed.
+
+    SysEx can be filtered while streaming: a bitmask of the prefixes still matching
+    is narrowed down byte by byte so that a parser can stop buffering
+    unwanted or oversized messages as early as their first bytes.
+
+    Each dispatch round, the messages received and the changes by subsystem are counted
+    so that the caller can coalesce the results.
+    """
+
+    def __init__(self) -> None:
+        self._handlers = [None] * 256
+        self._subsystems = bytearray(256)
+        self._sysex = []  # (prefix, handler, subsystem, max_len)
+        self.sysex_all: int = 0  # Candidates mask of a new SysEx message: one bit per prefix
+        self.sysex_max_len: int = 0  # Longest SysEx any handler accepts, without F0 and F7
+
+        # Current round
+        self.received = array('H', [0] * SUBSYSTEMS)
+        self.changed = array('H', [0] * SUBSYSTEMS)
+
+        # Diagnostics
+        self.counts = array('L', [0] * 256)  # Dispatched messages by status byte
+        self.sysex_counts = array('L')  # Dispatched SysEx by registered prefix
+        self.dropped: int = 0  # Messages nobody registered for
+        self.oversized: int = 0  # SysEx longer than their handler accepts
+
+    def register(self, status: int, handler, subsystem: int) -> None:
+        """
+        Registers the handler of a status byte. Channel messages are registered per channel.
+        """
+        if self._handlers[status] is not None:
+            raise ValueError(f"Status {status:02X} already registered")
+        self._handlers[status] = handler
+        self._subsystems[status] = subsystem
+
+    def register_sysex(self, prefix: bytes, handler, subsystem: int, max_len: int) -> None:
+        """
+        Registers the handler of SysEx messages starting with prefix (after F0). ANY matches any byte.
+
+        Messages longer than max_len bytes (without F0 and F7) are skipped.
+        Prefixes are tried in registration order.
+        """
+        self.sysex_all |= 1 << len(self._sysex)
+        if max_len > self.sysex_max_len:
+            self.sysex_max_len = max_len
+        self._sysex.append((prefix, handler, subsystem, max_len))
+        self.sysex_counts.append(0)
+
+    def registered(self, status: int) -> bool:
+        """
+        Somebody registered for the status byte.
+        """
+        return self._handlers[status] is not None
+
+    def round(self) -> None:
+        """
+        Starts a new dispatch round.
+        """
+        received = self.received
+        changed = self.changed
+        for subsystem in range(SUBSYSTEMS):
+            received[subsystem] = 0
+            changed[subsystem] = 0
+
+    def dispatch(self, status: int, data1: int, data2: int, ts: int) -> None:
+        """
+        Dispatches a channel, system common or real time message.
+        """
+        handler = self._handlers[status]
+        if handler is None:
+            self.dropped += 1
+            return
+        self.counts[status] += 1
+        subsystem = self._subsystems[status]
+        self.received[subsystem] += 1
+        if handler(data1, data2, ts):
+            self.changed[subsystem] += 1
+
+    def sysex_filter(self, candidates: int, position: int, byte: int) -> int:
+        """
+        Narrows down the candidates mask of a SysEx message with its data byte at position.
+
+        Accounts for the message once no candidate is left.
+        """
+        oversized = False
+        sysex = self._sysex
+        for index in range(len(sysex)):
+            bit = 1 << index
+            if candidates & bit:
+                prefix, _, _, max_len = sysex[index]
+                if position >= max_len:
+                    candidates &= ~bit
+                    oversized = True
+                elif position < len(prefix) and prefix[position] != ANY and prefix[position] != byte:
+                    candidates &= ~bit
+        if not candidates:
+            if oversized:
+                self.oversized += 1
+            else:
+                self.dropped += 1
+        return candidates
+
+    def dispatch_filtered(self, candidates: int, buf, start: int, end: int, ts: int) -> None:
+        """
+        Dispatches the complete SysEx message held in buf[start:end] to the first candidate left.
+        """
+        sysex = self._sysex
+        for index in range(len(sysex)):
+            if candidates & (1 << index):
+                prefix, handler, subsystem, _ = sysex[index]
+                if len(prefix) > end - start:
+                    continue  # Ended before the prefix did
+                self.counts[SYSEX_START] += 1
+                self.sysex_counts[index] += 1
+                self.received[subsystem] += 1
+                if handler(buf, start, end, ts):
+                    self.changed[subsystem] += 1
+                return
+        self.dropped += 1
+
+    def dispatch_sysex(self, buf, start: int, end: int, ts: int) -> None:
+        """
+        Dispatches the SysEx message held in buf[start:end], without the F0 and F7 bytes.
+        """
+        candidates = self.sysex_all
+        for position in range(end - start):
+            candidates = self.sysex_filter(candidates, position, buf[start + position])
+            if not candidates:
+                return
+        self.dispatch_filtered(candidates, buf, start, end, ts)
+
+    def report(self) -> None:
+        """
+        Prints the message counts.
+        """
+        counts = ", ".join(f"{status:02X}: {self.counts[status]}" for status in range(256) if self.counts[status])
+        print(f"MIDI: {counts or 'none'}, {self.dropped} dropped, {self.oversized} oversized SysEx")
+        for index in range(len(self._sysex)):
+            prefix = self._sysex[index][0]
+            prefix = ' '.join(f'{b:02X}' if b != ANY else 'xx' for b in prefix)
+            print(f"MIDI: SysEx {prefix}: {self.sysex_counts[index]}")
@@ -2,9 +2,65 @@
 # SPDX-License-Identifier: MIT
 import time
 
-import adafruit_midi
-from adafruit_midi.mtc_quarter_frame import MtcQuarterFrame
-from adafruit_midi.system_exclusive import SystemExclusive
+from midirouter import ANY, MMC, MTC, QUARTER_FRAME, MIDIRouter
+from mtcstats import MTCStats
+from timecode import FRAMERATES, RATE_23976, RATE_2997_NDF, Timecode
+
+# Decoding tables.
+# Indexed by the combined nibbles byte (Quarter Frames) or the raw byte (Full Frame).
+# Hold the decoded count or INVALID so that the hot path neither allocates nor raises.
+# Valid counts never set the MSB so OR-ing decoded values detects any INVALID one.
+INVALID = 0xFF
+
+# Frame count: xxx yyyyy (0-29)
+_FRM_TABLE = bytes((b & 0x1F) if (b & 0x1F) < 30 else INVALID for b in range(256))
+# Seconds count: xx yyyyyy (0-59)
+_SECS_TABLE = bytes((b & 0x3F) if (b & 0x3F) < 60 else INVALID for b in range(256))
+# Minutes count: xx yyyyyy (0-59)
+_MINS_TABLE = _SECS_TABLE
+# Hours count: x yy zzzzz (0-23)
+_HRS_TABLE = bytes((b & 0x1F) if (b & 0x1F) < 24 else INVALID for b in range(256))
+# Time Code Type: x yy zzzzz. Also the Timecode rate code.
+_TC_TYPE_TABLE = bytes((b >> 5) & 0b11 for b in range(256))
+# SysEx prefixes and lengths, without the SysEx start and end bytes
+# MTC Full Frame: F0 7F <device ID> 01 01 hr mn sc fr F7
+FF_PREFIX = bytes((0x7F, ANY, 0x01, 0x01))
+FF_LEN = 8
+# NAK: F0 7E <device ID> 7E pp F7
+NAK_PREFIX = bytes((0x7E, ANY, 0x7E))
+NAK_LEN = 4
+# MIDI Machine Control command: F0 7F <device ID> 06 <command> ... F7
+MMC_PREFIX = bytes((0x7F, ANY, 0x06))
+MMC_MAX_LEN = 11  # Locate: F0 7F <device ID> 06 44 06 01 hr mn sc fr st F7
+MMC_STOP = 0x01
+MMC_PAUSE = 0x09
+MMC_LOCATE = 0x44
+
+# Timecode rate code of a pulled down source by Time Code Type. No pull-down variant for 25 and 29.97 DF.
+_PULLDOWN_RATES = bytes((RATE_23976, 1, 2, RATE_2997_NDF))
+
+# Direction detected from the previous to the current Quarter Frame type.
+# Indexed by previous type * 8 + current type.
+# The extra last row is used when there is no previous Quarter Frame.
+_NO_QF = 8
+
+
+def _qf_direction(prev: int, cur: int) -> int:
+    if prev == _NO_QF:
+        return 0  # Direction.UNKNOWN
+    delta = cur - prev
+    if delta == -7:
+        return 1  # Direction.FORWARD
+    if delta == 7:
+        return -1  # Direction.BACKWARD
+    return delta
+
+
+_DIRECTION_TABLE = tuple(_qf_direction(prev, cur) for prev in range(_NO_QF + 1) for cur in range(8))
+
+# adafruit_midi message types, imported by the first midi() call: adafruit_midi is optional
+_MtcQuarterFrame = None
+_SystemExclusive = None
 
 
 # class Direction(IntEnum):
@@ -12,19 +68,6 @@ from adafruit_midi.system_exclusive import SystemExclusive
 #    FORWARD = 1
 #    BACKWARD = -1
 
-# Profiling
-def timed_function(f, *args, **kwargs):
-    myname = str(f).split(' ')[1]
-
-    def new_func(*args, **kwargs):
-        t = time.monotonic_ns()
-        result = f(*args, **kwargs)
-        delta = time.monotonic_ns() - t
-        print('Function {} Time = {:6.3f}ms'.format(myname, delta / 1000))
-        return result
-
-    return new_func
-
 
 class MTCFrameCounter:
     """
@@ -48,45 +91,40 @@ class MTCFrameCounter:
     #   - [x] Display FPS
     # - [x] update display for every frame at 0 and 4 QF
     #       (Respectively +-2 or +-3 frame depending on the direction)
-    # - [ ] unlock/unrun on NAK (SysEx F0 7E <device ID> 7E pp F7 with pp == packet number)
+    # - [x] unlock/unrun on NAK (SysEx F0 7E <device ID> 7E pp F7 with pp == packet number)
+    # - [x] Stop on MMC Stop/Pause, jump on MMC Locate
     # - [ ] Decode SMPTE user bits?
     # - [ ] Decode MIDI Cueing messages?
-    # - [ ] Write tests!!!
+    # - [x] Freewheel across dropouts
+    # - [x] Jitter, drift and lock quality
+    # - [x] Discriminate pull-down rates (23.976, 29.97 NDF) by timing
+    # - [x] Write tests!!!
 
-    RUNNING_TIMEOUT = 1 * 1e9  # 1 second
+    RUNNING_TIMEOUT = 1 * 1e9  # 1 second. Also bounds freewheeling.
+
+    # Pull-down runs 1000 ppm slow. Hysteresis thresholds in ppm.
+    PULLDOWN_ENTER = -600
+    PULLDOWN_LEAVE = -400
+
+    @property
+    def hour(self) -> int:
+        return self.tc.hours
+
+    @property
+    def minute(self) -> int:
+        return self.tc.minutes
+
+    @property
+    def second(self) -> int:
+        return self.tc.seconds
 
     @property
     def frame(self) -> int:
-        return self._frame
-
-    @frame.setter
-    #    @timed_function
-    def frame(self, value: int) -> None:
-        # FIXME: duplicated code. Use a Timecode object instead?
-        framerate_int = int(round(self.framerate))  # FIXME: Naive. Probably only works with NDF. Use TimeCode lib!
-        if value < 0:  # Underflow
-            value += framerate_int
-            self.second -= 1
-            if self.second < 0:
-                self.second += 60
-                self.minute -= 1
-            if self.minute < 0:
-                self.minute += 60
-                self.hour -= 1
-            if self.hour < 0:
-                self.hour += 24
-        if value > framerate_int:  # Overflow
-            value -= framerate_int
-            self.second += 1
-            if self.second > 60:
-                self.second -= 60
-                self.minute += 1
-            if self.minute > 60:
-                self.minute -= 60
-                self.hour += 1
-            if self.hour > 24:
-                self.hour -= 24
-        self._frame = value
+        return self.tc.frames
+
+    @property
+    def framerate(self) -> float:
+        return self.tc.framerate
 
     @property
     def direction(self) -> int:
@@ -96,14 +134,52 @@ class MTCFrameCounter:
     def direction(self, value: int) -> None:
         self._uf = 0  # Reset uncountable frames
         self._rst_qf_acc()
+        self._boundary_ts = 0  # Restart frame prediction
+        self._predicted = 0
         self._direction = value
 
+    @property
+    def freewheeling(self) -> bool:
+        """
+        Frames are currently extrapolated, Quarter Frames are late or lost
+        """
+        return self._predicted > 0
+
+    @property
+    def quality(self) -> int:
+        """
+        Lock quality: 0 (unlocked), 1 (freewheeling or poor timing) to 3 (good)
+        """
+        if not self.locked:
+            return 0
+        if self.freewheeling:
+            return 1
+        return self.stats.quality(self._qf_period)
+
+    @property
+    def drift(self) -> float:
+        """
+        Source rate relative to the local clock in ppm
+        """
+        return self.stats.drift(self.tc.framerate)
+
+    @property
+    def qf_period(self) -> int:
+        """
+        Measured Quarter Frame period in nanoseconds. 0 until measured.
+        """
+        return self._qf_period
+
     @property
     def timecode(self) -> str:
         """
         Formats human readable timecode
+
+        Drop frame separates the frames with a '.' like the ';' of SMPTE displays.
         """
-        return f"{self.hour:02d}:{self.minute:02d}:{self.second:02d}:{self.frame:02d}"
+        tc = self.tc
+        separator = '.' if tc.drop_frame else ':'
+        return f"{tc.hours:02d}:{tc.minutes:02d}:{tc.seconds:02d}{separator}{tc.frames:02d}"
 
     @property
     def timedout(self) -> bool:
@@ -128,25 +204,18 @@ class MTCFrameCounter:
 
         return timed_out
 
-    def __init__(self, timeout=30) -> None:
+    def __init__(self, timeout=30, freewheel: int = 20) -> None:
         # Internal timecode counter
-        # TODO: move to a TimeCode object?
-        self.hour: int = 0
-        self.minute: int = 0
-        self.second: int = 0
-        self._frame: int = 0
+        self.tc: Timecode = Timecode()
 
         # Uncountable frames.
         # Used while the direction is still unknown.
         self._uf: int = 0
 
-        # Metadata
-        self.framerate: float = 0.0
-
         self._direction: int = 0  # Direction.UNKNOWN
 
         # Allows detecting direction
-        self._prev_qf_type: None | int = None
+        self._prev_qf_type: int = _NO_QF
 
         # Transport running state
         self.running: bool = False
@@ -158,288 +227,304 @@ class MTCFrameCounter:
         self.locked: bool = False
 
         # Quarter frame MTC messages accumulator.
-        # Store up to 4 frames (16 quarter frames) worth of data to allow syncing.
-        self._qf_acc: [None | int] = [
-            None,  # Frame count LS nibble
-            None,  # Frame count MS nibble
-            None,  # Seconds count LS nibble
-            None,  # Seconds count MS nibble
-            None,  # Minutes count LS nibble
-            None,  # Minutes count MS nibble
-            None,  # Hours count LS nibble
-            None,  # Hours count MS nibble and SMPTE Type
-        ]
+        # Store up to 2 frames (8 quarter frames) worth of data to allow syncing.
+        # Indexed by message type:
+        # 0. Frame count LS nibble
+        # 1. Frame count MS nibble
+        # 2. Seconds count LS nibble
+        # 3. Seconds count MS nibble
+        # 4. Minutes count LS nibble
+        # 5. Minutes count MS nibble
+        # 6. Hours count LS nibble
+        # 7. Hours count MS nibble and SMPTE Type
+        self._qf_acc = bytearray(8)
+        self._qf_mask: int = 0  # One bit per received message type
 
         # Timestamps
         self._prev_msg_ts: int = time.monotonic_ns()
         self._timeout: float = timeout * 1e9  # Converts secs to nanoseconds
+        self._session: bool = False  # Quarter Frames or Full Frames were received
+
+        # Frame prediction
+        self._prev_qf_ts: int = 0
+        self._qf_period: int = 0  # ns, smoothed
+        self._boundary_ts: int = 0  # Last received frame boundary
+        self._predicted: int = 0  # Frames extrapolated since the last received frame boundary
+        self._freewheel: int = freewheel  # Frames extrapolated before unlocking
+
+        # Timing quality
+        self.stats: MTCStats = MTCStats()
+
+        # Frame rate discrimination
+        self.pulldown: bool = False
 
     @staticmethod
-    def _is_ff_msg(msg: SystemExclusive) -> bool:
+    def _is_ff_msg(msg) -> bool:
         """
         Determines if a SysEx message contains MTC Full Frame
         """
         return len(msg.data) == 7 and msg.data[1:3] == b'\x01\x01'
 
-    @staticmethod
-    #    @timed_function
-    def _dec_hrs(hrs: int) -> (int, int):
+    def _rst_qf_acc(self) -> None:
         """
-        Decode MTC hours.
-
-        Hours count: x yy zzzzz
-        x: always 0 and receiver should ignore!
-        yy: Time Code Type
-        zzzzz: hours Count (0-23)
+        Resets the Quarter Frame Accumulator to a known state.
         """
-        hrs = hrs & 0b01111111  # Always ignore first bit
-        tc_type = hrs >> 5
-        if tc_type not in range(4):
-            raise ValueError("Invalid timecode type")
-        hrs_cnt = hrs & 0b00011111
-        if hrs_cnt not in range(0, 24):
-            raise ValueError("Invalid hour count")
+        self._qf_mask = 0
 
-        framerate = [24, 25, 29.97, 30][tc_type]
+    def quarter_frame(self, qf_type: int, value: int, ts: int) -> bool:
+        """
+        Interprets a decoded MTC Quarter Frame.
 
-        return framerate, hrs_cnt
+        Returns True at frame boundaries.
 
-    @staticmethod
-    #    @timed_function
-    def _dec_mins(mins: int) -> int:
+        FIXME: Time sensitive! We need to handle this in less than a 4th of 30th of a second (~8.33 ms)
         """
-        Decode MTC minutes.
+        is_frame = False
 
-        Minutes count: xx yyyyyy
-        xx: undefined and reserved for future use receiver should ignore!
-        yyyyyy: mins count (0-59)
-        """
-        mins_cnt = mins & 0b00111111
-        if mins_cnt not in range(0, 60):
-            raise ValueError("Invalid minute count")
+        self._prev_msg_ts = ts
+        self._session = True
+
+        # Time is considered running on first QF after FF
+        if self._rcv_ff and not self.running:
+            self._rcv_ff = False
+            self.running = True
+
+        # Detect direction
+        direction = _DIRECTION_TABLE[self._prev_qf_type * 8 + qf_type]
+        if direction > 1 or direction < -1:
+            # Lost Quarter Frames: keep the direction but restart the sequence
+            self._rst_qf_acc()
+            direction = self._direction
+        elif self._direction != direction:
+            self.direction = direction
+        self._prev_qf_type = qf_type  # Allows detecting direction change
+
+        # Track the Quarter Frame period between consecutive messages
+        period = self._qf_period
+        self.stats.quarter_frame(qf_type, ts, direction, period)
+        if direction and self._prev_qf_ts:
+            dt = ts - self._prev_qf_ts
+            if not period:
+                self._qf_period = dt
+            elif 0 < dt < period << 1:  # Not across a dropout
+                self._qf_period = period + ((dt - period) >> 3)
+        self._prev_qf_ts = ts
+
+        # Update count at frame boundaries (1st and 5th quarter frame)
+        if not qf_type & 0b11:
+            is_frame = True
+            if direction:  # Not Direction.UNKNOWN
+                frames = self._uf + 1
+                if self._boundary_ts and period:
+                    # Count from the elapsed time, rounded, to catch up on lost frame boundaries
+                    frames = (ts - self._boundary_ts + (period << 1)) // (period << 2)
+                    if frames < 1:
+                        frames = 1
+                frames -= self._predicted  # Already counted while freewheeling
+                if frames:
+                    self.tc.add(frames if direction > 0 else -frames)
+                self._uf = 0  # Reset uncountable frames
+                self._boundary_ts = ts
+                self._predicted = 0
+            else:
+                self._uf += 1  # Store for later use
+
+        # Record received QF
+        self._qf_acc[qf_type] = value
+        self._qf_mask |= 1 << qf_type
+
+        # Verify if we’re locked every 8-message sequences (2 frames)
+        if (
+                direction == 1 and qf_type == 7  # Direction.FORWARD
+        ) or (
+                direction == -1 and qf_type == 0  # Direction.BACKWARD
+        ):
+            # We need a full set of 8 messages
+            if self._qf_mask == 0xFF:
+                # MTC Quarter Frame uses the same format as MTC Full messages
+                # They are received in the reverse order
+                acc = self._qf_acc
+                hrs = acc[6] | acc[7] << 4
+                fr = _FRM_TABLE[acc[0] | acc[1] << 4]
+                sec = _SECS_TABLE[acc[2] | acc[3] << 4]
+                mins = _MINS_TABLE[acc[4] | acc[5] << 4]
+                hr = _HRS_TABLE[hrs]
+
+                if not (fr | sec | mins | hr) & 0x80:  # All valid
+                    self.tc.set(hr, mins, sec, fr, self._rate(_TC_TYPE_TABLE[hrs]))
 
-        return mins_cnt
+                    # We need to account for a 2 frame offset following the direction
+                    # before comparing since the first QF message is 2 frames old at this time (We received 8 of them).
+                    self.tc.add(2)
 
-    @staticmethod
-    #    @timed_function
-    def _dec_secs(secs: int) -> int:
+                    self.running = True
+                    self.locked = True
+                else:
+                    self.stats.invalid += 1
+                self._rst_qf_acc()
+
+        return is_frame
+
+    def _rate(self, tc_type: int) -> int:
         """
-        Decode MTC seconds.
+        Discriminates the actual rate of a Time Code Type from the measured source timing.
 
-        Seconds count: xx yyyyy
-        xx: undefined and reserved for future use receiver should ignore!
-        yyyyyy: secs count (0-59)
+        Only from complete drift windows: the label stays nominal until the first one
+        and only changes when a new window disagrees.
+        """
+        stats = self.stats
+        if stats.settled and (tc_type == 0 or tc_type == 3):
+            # Relative to the integer rate
+            drift = stats.drift(FRAMERATES[tc_type])
+            if self.pulldown:
+                self.pulldown = drift < self.PULLDOWN_LEAVE
+            else:
+                self.pulldown = drift < self.PULLDOWN_ENTER
+        return _PULLDOWN_RATES[tc_type] if self.pulldown else tc_type
+
+    def update(self, now: int) -> bool:
         """
-        secs_cnt = secs & 0b00111111
-        if secs_cnt not in range(0, 60):
-            raise ValueError("Invalid secs count")
+        Extrapolates the frame count from the measured Quarter Frame period
+        while the next frame boundary message is late or lost.
 
-        return secs_cnt
+        Unlocks once freewheeling for more than the configured number of frames,
+        back to the last frame actually received: the source most likely stopped there.
 
-    @staticmethod
-    #    @timed_function
-    def _dec_frm(frame: int) -> int:
+        Returns True when a predicted frame boundary was crossed or the prediction was undone.
         """
-        Decode MTC frames.
+        period = self._qf_period
+        if not (self.running and self._direction and period and self._boundary_ts):
+            return False
+
+        frames = (now - self._boundary_ts) // (period << 2)
+        if frames <= self._predicted:
+            return False
 
-        Frame count: xxx yyyyy
-        xxx: undefined and reserved for future use receiver should ignore!
-        yyyyy: Frame count (0-29)
+        if frames > self._freewheel:
+            predicted = self._predicted
+            self.tc.add(-predicted if self._direction > 0 else predicted)
+            self.locked = False
+            self.running = False
+            self._boundary_ts = 0
+            self._predicted = 0
+            return predicted > 0
+
+        step = frames - self._predicted
+        self.tc.add(step if self._direction > 0 else -step)
+        self._predicted = frames
+        return True
+
+    def full_frame(self, hrs: int, mins: int, secs: int, frm: int, ts: int) -> bool:
         """
-        frm_cnt = frame & 0b00011111
-        if frm_cnt not in range(0, 30):
-            raise ValueError("Invalid frame count")
+        Interprets the raw time fields of an MTC Full Frame message.
 
-        return frm_cnt
+        Returns False if the fields are invalid.
+        """
+        # Decode
+        hr = _HRS_TABLE[hrs]
+        mn = _MINS_TABLE[mins]
+        sc = _SECS_TABLE[secs]
+        fr = _FRM_TABLE[frm]
+        if (hr | mn | sc | fr) & 0x80:  # Any INVALID
+            return False
+
+        self._prev_msg_ts = ts
+        self._session = True
+
+        # Populate counter
+        self.tc.set(hr, mn, sc, fr, self._rate(_TC_TYPE_TABLE[hrs]))
+
+        # Update state
+        self._rcv_ff = True
+        self._prev_qf_type = _NO_QF
+        self.stats.restart()
+        self.running = False
+        self.direction = 0  # Direction.UNKNOWN
+
+        return True
+
+    def in_session(self, ts: int) -> bool:
+        """
+        Quarter Frames or Full Frames were received and did not time out.
+        """
+        return self._session and ts <= self._prev_msg_ts + self._timeout
 
-    #    @timed_function
-    def _rst_qf_acc(self) -> None:
+    def stop(self, ts: int) -> bool:
         """
-        Resets the Quarter Frame Accumulator to a known state.
+        Unlocks and stops right away instead of freewheeling past the stop point.
         """
-        self._qf_acc = [None] * 8
-
-#     #    @timed_function
-#     def _mtc_full(self, msg: SystemExclusive, ts: int) -> None:
-#         """
-#         Interprets MTC Full Messages
-#         """
-#         self._prev_msg_ts = ts
-#
-#         # Decode and populate counter
-#         self.framerate, self.hour = self._dec_hrs(msg.data[3])
-#         self.minute = self._dec_mins(msg.data[4])
-#         self.second = self._dec_secs(msg.data[5])
-#         self._frame = self._dec_frm(msg.data[6])
-#
-#         # Update state
-#         self._rcv_ff = True
-#         self._prev_qf_type = None
-#         self.running = False
-#         self.direction = 0  # Direction.UNKNOWN
-#
-# #    @timed_function
-#     def _mtc_qf(self, msg: MtcQuarterFrame, ts: int) -> None:
-#         """
-#         Interprets MTC Quarter Frame Messages
-#
-#         FIXME: Time sensitive! We need to handle this in less than a 4th of 30th of a second (~8.33 ms)
-#         """
-#         self._prev_msg_ts = ts
-#
-#         # Time is considered running on first QF after FF
-#         if self._rcv_ff and not self.running:
-#             self._rcv_ff = False
-#             self.running = True
-#
-#         # Detect direction
-#         direction = 0
-#         if self._prev_qf_type is not None:
-#             direction = msg.type - self._prev_qf_type
-#             direction = (1 if direction == -7 else direction)
-#             direction = (-1 if direction == 7 else direction)
-#             #print(f"Direction: {direction}")
-#             if self.direction != direction:
-#                 self.direction = direction
-#         self._prev_qf_type = msg.type  # Allows detecting direction change
-#
-#         # Update count at frame boundaries (1st and 5th quarter frame)
-#         if msg.type in (0, 4):
-#             if direction is not 0:  # Direction.UNKNOWN
-#                 self.frame += direction * (self._uf + 1)
-#                 self._uf = 0  # Reset uncountable frames
-#             else:
-#                 self._uf += 1  # Store for later use
-#
-#         # Record received QF
-#         self._qf_acc[msg.type] = msg.value
-#
-#         # Verify if we’re locked every 8-message sequences (2 frames)
-#         if (
-#                 direction == 1 and msg.type == 7  # Direction.FORWARD
-#         ) or (
-#                 direction == -1 and msg.type == 0  # Direction.BACKWARD
-#         ):
-#             self._qf_sync()
-#
-#     #    @timed_function
-#     def _qf_sync(self) -> None:
-#         """
-#         Checks received Quarter Frame data against our Internal Counter and locks if good.
-#         """
-#         # We need a full set of 8 messages
-#         if None in self._qf_acc:
-#             self.locked = False
-#         else:
-#             # MTC Quarter Frame uses the same format as MTC Full messages
-#             # They are received in the reverse order
-#             fr = self._dec_frm(self._qf_acc[0] + self._qf_acc[1] * 16)
-#             self.second = self._dec_secs(self._qf_acc[2] + self._qf_acc[3] * 16)
-#             self.minute = self._dec_mins(self._qf_acc[4] + self._qf_acc[5] * 16)
-#             self.framerate, self.hour = self._dec_hrs(self._qf_acc[6] + self._qf_acc[7] * 16)
-#
-#             # We need to account for a 2 frame offset following the direction
-#             # before comparing since the first QF message is 2 frames old at this time (We received 8 of them).
-#             self.frame = fr + 2
-#
-#             self.running = True
-#             self.locked = True
-#             self._rst_qf_acc()
-
-    #    @timed_function
-    def midi(self, msg: adafruit_midi.MIDIMessage, ts: int) -> (bool, bool):
-        """
-        Interprets MTC messages and feeds the counter.
-        """
-        is_mtc = False
-        is_frame = False
+        self._prev_msg_ts = ts
+        self._prev_qf_type = _NO_QF
+        self.stats.restart()
+        self.locked = False
+        self.running = False
+        self.direction = 0  # Direction.UNKNOWN
+        return True
+
+    def report(self) -> None:
+        """
+        Prints the timing statistics.
+        """
+        self.stats.report(self.tc.framerate)
 
-        # Quarter frame
-        if isinstance(msg, MtcQuarterFrame):
-            # self._mtc_qf(msg, ts)
-
-            # --- UNROLL TEST
-            self._prev_msg_ts = ts
-
-            # Time is considered running on first QF after FF
-            if self._rcv_ff and not self.running:
-                self._rcv_ff = False
-                self.running = True
-
-            # Detect direction
-            direction = 0
-            if self._prev_qf_type is not None:
-                direction = msg.type - self._prev_qf_type
-                if direction not in(-1, 1):
-                    if direction == -7:
-                        direction = 1
-                    elif direction == 7:
-                        direction = -1
-                # print(f"Direction: {direction}")
-                if self.direction != direction:
-                    self.direction = direction
-            self._prev_qf_type = msg.type  # Allows detecting direction change
-
-            # Update count at frame boundaries (1st and 5th quarter frame)
-            if msg.type in (0, 4):
-                is_frame = True
-                if direction is not 0:  # Direction.UNKNOWN
-                    self.frame += direction * (self._uf + 1)
-                    self._uf = 0  # Reset uncountable frames
-                else:
-                    self._uf += 1  # Store for later use
-
-            # Record received QF
-            self._qf_acc[msg.type] = msg.value
-
-            # Verify if we’re locked every 8-message sequences (2 frames)
-            if (
-                    direction == 1 and msg.type == 7  # Direction.FORWARD
-            ) or (
-                    direction == -1 and msg.type == 0  # Direction.BACKWARD
-            ):
-                # We need a full set of 8 messages
-                if None not in self._qf_acc:
-                    # MTC Quarter Frame uses the same format as MTC Full messages
-                    # They are received in the reverse order
-                    fr = self._dec_frm(self._qf_acc[0] + self._qf_acc[1] * 16)
-                    self.second = self._dec_secs(self._qf_acc[2] + self._qf_acc[3] * 16)
-                    self.minute = self._dec_mins(self._qf_acc[4] + self._qf_acc[5] * 16)
-                    self.framerate, self.hour = self._dec_hrs(self._qf_acc[6] + self._qf_acc[7] * 16)
+    def register(self, router: MIDIRouter) -> None:
+        """
+        Registers the Quarter Frame, Full Frame, NAK and MMC handlers.
 
-                    # We need to account for a 2 frame offset following the direction
-                    # before comparing since the first QF message is 2 frames old at this time (We received 8 of them).
-                    self.frame = fr + 2
+        NAK and MMC only stop or locate an existing session:
+        they are accounted apart so that they never count as MTC traffic on their own.
+        """
+        router.register(QUARTER_FRAME, self._on_quarter_frame, MTC)
+        router.register_sysex(FF_PREFIX, self._on_full_frame, MTC, FF_LEN)
+        router.register_sysex(NAK_PREFIX, self._on_nak, MMC, NAK_LEN)
+        router.register_sysex(MMC_PREFIX, self._on_mmc, MMC, MMC_MAX_LEN)
+
+    def _on_quarter_frame(self, data: int, _, ts: int) -> bool:
+        return self.quarter_frame(data >> 4, data & 0x0F, ts)
+
+    def _on_full_frame(self, buf, start: int, end: int, ts: int) -> bool:
+        if end - start != FF_LEN:
+            return False
+        return self.full_frame(buf[start + 4], buf[start + 5], buf[start + 6], buf[start + 7], ts)
+
+    def _on_nak(self, buf, start: int, end: int, ts: int) -> bool:
+        if end - start != NAK_LEN or not self.in_session(ts):
+            return False
+        return self.stop(ts)
+
+    def _on_mmc(self, buf, start: int, end: int, ts: int) -> bool:
+        if end - start < 4 or not self.in_session(ts):
+            return False
+        command = buf[start + 3]
+        if command == MMC_STOP or command == MMC_PAUSE:
+            return self.stop(ts)
+        if (
+                command == MMC_LOCATE and end - start == MMC_MAX_LEN
+                and buf[start + 4] == 0x06 and buf[start + 5] == 0x01  # Target
+        ):
+            return self.full_frame(buf[start + 6], buf[start + 7], buf[start + 8], buf[start + 9], ts)
+        return False
+
+    def midi(self, msg, ts: int) -> (bool, bool):
+        """
+        Interprets MTC adafruit_midi messages and feeds the counter.
 
-                    self.running = True
-                    self.locked = True
-                    self._rst_qf_acc()
-            # ---
+        Only used by the benchmark: the firmware goes through the MIDI router.
+        """
+        global _MtcQuarterFrame, _SystemExclusive
+        if _MtcQuarterFrame is None:
+            from adafruit_midi.mtc_quarter_frame import MtcQuarterFrame
+            from adafruit_midi.system_exclusive import SystemExclusive
+            _MtcQuarterFrame = MtcQuarterFrame
+            _SystemExclusive = SystemExclusive
 
-            is_mtc = True
+        # Quarter frame
+        if isinstance(msg, _MtcQuarterFrame):
+            return True, self.quarter_frame(msg.type, msg.value, ts)
 
         # Full frame
-        elif isinstance(msg, SystemExclusive) and self._is_ff_msg(msg):
-            #self._mtc_full(msg, ts)
-
-            # --- UNROLL TEST
-            self._prev_msg_ts = ts
-
-            # Decode and populate counter
-            self.framerate, self.hour = self._dec_hrs(msg.data[3])
-            self.minute = self._dec_mins(msg.data[4])
-            self.second = self._dec_secs(msg.data[5])
-            self._frame = self._dec_frm(msg.data[6])
-
-            # Update state
-            self._rcv_ff = True
-            self._prev_qf_type = None
-            self.running = False
-            self.direction = 0  # Direction.UNKNOWN
-            # ---
-
-            is_frame = True
-            is_mtc = True
+        if isinstance(msg, _SystemExclusive) and self._is_ff_msg(msg):
+            return True, self.full_frame(msg.data[3], msg.data[4], msg.data[5], msg.data[6], ts)
 
         # FIXME: NAK means synchronization is dropped
 
@@ -447,4 +532,4 @@ class MTCFrameCounter:
         #else:
         #    print(f"Not an MTC MIDI message: {repr(msg)}")
 
-        return is_mtc, is_frame
+        return False, False
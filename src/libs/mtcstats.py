@@ -0,0 +1,163 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+
+# Quarter Frames per drift measurement window (~10 s at 30 fps)
+DRIFT_WINDOW = 4 * 30 * 10
+# Longest gap in Quarter Frames a drift measurement continues across (~1 s at 30 fps)
+MAX_GAP = 4 * 30
+
+
+class MTCStats:
+    """
+    Incoming MTC timing quality estimator.
+
+    Runs on the Quarter Frame timestamps with constant state:
+    - jitter: smoothed absolute deviation of the inter-arrival time from the measured period (RFC 3550 style)
+    - drift: source rate relative to the local monotonic clock, in ppm, measured over fixed windows
+    - missed, out of order and invalid Quarter Frames counts
+
+    Quarter Frames drained together share a timestamp, which is only right for the last one:
+    the jitter of such a batch is sampled once, over the whole batch.
+    """
+
+    JITTER_SHIFT = 4  # Smoothing: 1/16
+
+    def __init__(self) -> None:
+        self.quarter_frames: int = 0
+        self.missed: int = 0
+        self.out_of_order: int = 0
+        self.invalid: int = 0
+
+        self.jitter: int = 0  # ns
+        self._batch_jitter: int = 0  # Before the Quarter Frames sharing the last timestamp
+        self._batch_start: int = 0  # Timestamp preceding the batch
+        self._batch_qfs: int = 0
+
+        self._prev_type: int = -1
+        self._prev_ts: int = 0
+
+        # Drift measurement spans
+        self._span_start: int = 0
+        self._span_qfs: int = 0
+        self._last_span_ns: int = 0  # Last complete window
+        self._last_span_qfs: int = 0
+
+    def reset(self) -> None:
+        self.__init__()
+
+    def restart(self) -> None:
+        """
+        Restarts the sequence tracking, e.g. after a locate.
+        """
+        self._prev_type = -1
+        self._span_qfs = 0
+
+    def quarter_frame(self, qf_type: int, ts: int, direction: int, period: int) -> None:
+        """
+        Accounts for a Quarter Frame received at ts with the current direction and measured period.
+        """
+        self.quarter_frames += 1
+        prev_type = self._prev_type
+        prev_ts = self._prev_ts
+        self._prev_type = qf_type
+        self._prev_ts = ts
+        batch_qfs = self._batch_qfs
+        self._batch_qfs = 0  # Unless sampled below
+
+        if prev_type < 0 or not direction:
+            self._span_qfs = 0
+            return
+
+        # Quarter Frame types elapsed in the current direction
+        step = ((qf_type - prev_type) * direction) & 0b111
+        if step == 7:
+            # Direction change
+            self._span_qfs = 0
+            return
+
+        elapsed = step  # Quarter Frame periods
+        dt = ts - prev_ts
+        late = period and dt > period + (period >> 1)
+        if late:
+            # Whole lost sequences do not show in the types: count them from the time
+            elapsed += ((dt - step * period + (period << 2)) // (period << 3)) << 3
+        if not elapsed or (not late and step > 4):
+            # Repeated or late message
+            self.out_of_order += 1
+            return
+        if elapsed > 1:
+            self.missed += elapsed - 1
+        elif period and (dt or batch_qfs):
+            if dt:
+                self._batch_jitter = self.jitter
+                self._batch_start = prev_ts
+                self._batch_qfs = 1
+                deviation = dt - period
+            else:
+                # Drained together with the previous one: undo its late sample
+                self.jitter = self._batch_jitter
+                self._batch_qfs = batch_qfs + 1
+                deviation = ts - self._batch_start - self._batch_qfs * period
+            if deviation < 0:
+                deviation = -deviation
+            self.jitter += (deviation - self.jitter) >> self.JITTER_SHIFT
+
+        if elapsed > MAX_GAP:
+            self._span_qfs = 0
+        if not self._span_qfs:
+            self._span_start = ts
+            self._span_qfs = 1
+            return
+        self._span_qfs += elapsed
+        if self._span_qfs > DRIFT_WINDOW:
+            self._last_span_ns = ts - self._span_start
+            self._last_span_qfs = self._span_qfs - 1
+            self._span_start = ts
+            self._span_qfs = 1
+
+    @property
+    def settled(self) -> bool:
+        """
+        A complete window was measured: the drift is accurate enough to classify rates.
+
+        Over shorter spans, each ms of timestamp jitter weighs thousands of ppm.
+        """
+        return self._last_span_qfs > 0
+
+    def drift(self, framerate: float) -> float:
+        """
+        Source rate relative to the local clock in ppm. Positive when the source runs fast.
+
+        Uses the last complete window or the current one until there is one.
+        """
+        span_ns = self._last_span_ns
+        qfs = self._last_span_qfs
+        if not qfs:
+            if self._span_qfs < 2:
+                return 0.0
+            span_ns = self._prev_ts - self._span_start
+            qfs = self._span_qfs - 1
+        if span_ns <= 0:
+            return 0.0
+        expected_ns = qfs * 250000000 / framerate  # Nominal Quarter Frame period is 1 / 4 frame
+        return (expected_ns - span_ns) * 1000000 / span_ns
+
+    def quality(self, period: int) -> int:
+        """
+        Timing quality from the jitter relative to the period: 1 (poor) to 3 (good).
+        """
+        jitter = self.jitter
+        if jitter * 20 < period:  # < 5%
+            return 3
+        if jitter * 4 < period:  # < 25%
+            return 2
+        return 1
+
+    def report(self, framerate: float) -> None:
+        """
+        Prints the statistics.
+        """
+        print(
+            f"MTC: {self.quarter_frames} QF, {self.missed} missed, {self.out_of_order} out of order, "
+            f"{self.invalid} invalid, jitter {self.jitter // 1000} µs, drift {self.drift(framerate):.1f} ppm"
+        )
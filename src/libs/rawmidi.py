@@ -0,0 +1,128 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+from midirouter import SYSEX_END, SYSEX_START, MIDIRouter
+
+# Data bytes following a channel status byte, indexed by its high nibble
+_CHANNEL_DATA_LEN = b'\x00\x00\x00\x00\x00\x00\x00\x00\x02\x02\x02\x02\x01\x01\x02\x00'
+
+# Data bytes following a system common status byte, indexed by its low nibble
+_COMMON_DATA_LEN = b'\x00\x01\x02\x01\x00\x00\x00\x00'
+
+
+class RawMTCInput:
+    """
+    A zero-allocation MIDI input.
+
+    Reads the raw bytes of a USB MIDI port into a preallocated buffer
+    and parses them directly on the integers, bypassing adafruit_midi message objects construction.
+
+    Complete messages are handed to a MIDIRouter as status and data bytes:
+    MTC, beat clock, HUI and MCU only get what they registered for.
+
+    SysEx is reassembled in a small fixed buffer, sized for the longest registered message,
+    and filtered by the router as it streams in: dumps and other unwanted messages
+    are skipped byte by byte from the first byte that does not match a registered prefix.
+
+    Other traffic is skipped while honoring running status.
+    The router must have every handler registered beforehand.
+    """
+
+    def __init__(self, midi_in, router: MIDIRouter, in_buf_size: int = 64) -> None:
+        self._midi_in = midi_in
+        self._router = router
+
+        self._in_buf = bytearray(in_buf_size)
+        self._sysex_buf = bytearray(router.sysex_max_len)
+
+        # Parser state
+        self._status: int = 0  # Current (running) status
+        self._data_len: int = 0  # Expected data bytes for the current status
+        self._data_cnt: int = 0  # Received data bytes for the current status
+        self._data1: int = 0  # First data byte of a two bytes message
+        self._sysex_cnt: int = -1  # Received SysEx data bytes. -1 when outside SysEx.
+        self._candidates: int = 0  # SysEx prefixes still matching. 0 when skipping.
+
+        # Result of the last poll
+        self.more: bool = False  # The input buffer was filled, more bytes may be pending
+
+    def poll(self, ts: int) -> int:
+        """
+        Reads and interprets all available bytes.
+
+        Returns the number of bytes read.
+        """
+        nbytes = self._midi_in.readinto(self._in_buf)
+        if not nbytes:
+            self.more = False
+            return 0
+        self.more = nbytes == len(self._in_buf)
+
+        buf = self._in_buf
+        for i in range(nbytes):
+            self._parse(buf[i], ts)
+
+        return nbytes
+
+    def _parse(self, byte: int, ts: int) -> None:
+        """
+        Feeds one byte to the parser state machine.
+        """
+        if byte >= 0xF8:
+            # System Real Time may appear anywhere, even inside SysEx
+            self._router.dispatch(byte, 0, 0, ts)
+            return
+
+        if byte & 0x80:
+            if byte == SYSEX_END:
+                if self._sysex_cnt >= 0 and self._candidates:
+                    self._router.dispatch_filtered(self._candidates, self._sysex_buf, 0, self._sysex_cnt, ts)
+                self._sysex_cnt = -1
+                self._status = 0
+                return
+
+            self._sysex_cnt = -1  # Any other status byte terminates SysEx
+
+            if byte == SYSEX_START:
+                self._sysex_cnt = 0
+                self._candidates = self._router.sysex_all
+                self._status = 0
+            elif byte < 0xF0:
+                self._status = byte
+                self._data_len = _CHANNEL_DATA_LEN[byte >> 4]
+            else:
+                # System common cancels running status
+                self._status = byte
+                self._data_len = _COMMON_DATA_LEN[byte & 0x0F]
+                if not self._data_len:
+                    self._router.dispatch(byte, 0, 0, ts)
+                    self._status = 0
+            self._data_cnt = 0
+            return
+
+        # Data byte
+        if self._sysex_cnt >= 0:
+            if self._candidates:
+                self._candidates = self._router.sysex_filter(self._candidates, self._sysex_cnt, byte)
+                if self._candidates:
+                    self._sysex_buf[self._sysex_cnt] = byte
+            self._sysex_cnt += 1
+            return
+
+        if not self._status:
+            return  # Orphan data byte
+
+        self._data_cnt += 1
+        if self._data_cnt < self._data_len:
+            self._data1 = byte
+            return
+
+        # Message complete
+        if self._data_len == 1:
+            self._router.dispatch(self._status, byte, 0, ts)
+        else:
+            self._router.dispatch(self._status, self._data1, byte, ts)
+
+        if self._status < 0xF0:
+            self._data_cnt = 0  # Running status
+        else:
+            self._status = 0
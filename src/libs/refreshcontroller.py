@@ -0,0 +1,76 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import time
+
+
+class RefreshController:
+    """
+    Commits the display refreshes explicitly, once a whole frame was drawn.
+
+    displayio auto refresh runs on its own schedule:
+    a refresh can land between two changes of the same frame (e.g. a label color and its digits) or late.
+    Instead, auto refresh is turned off, drawing code reports its changes with invalidate()
+    and the display task calls commit() once done drawing:
+    at most one refresh per pass, none when nothing changed and no more than max_fps per second.
+    A commit held back by the cap stays pending until a later pass.
+
+    Optionally records the latency from the first change to the end of its refresh, in ns.
+    """
+
+    def __init__(self, display, max_fps: int = 60, record=None) -> None:
+        display.auto_refresh = False
+        self._display = display
+        self._interval: int = 1000000000 // max_fps  # ns
+        self._next: int = 0
+        self._pending: bool = True  # Whatever was drawn before is shown first
+        self._record = record
+        self._changed: int = time.monotonic_ns() if record is not None else 0
+
+        # Metrics
+        self.refreshes: int = 0
+        self.held: int = 0  # Passes held back by the cap
+
+    @property
+    def pending(self) -> bool:
+        """
+        Changes are waiting for a refresh
+        """
+        return self._pending
+
+    def invalidate(self) -> None:
+        """
+        Reports a change to the displayed content.
+        """
+        if self._pending:
+            return
+        self._pending = True
+        if self._record is not None:
+            self._changed = time.monotonic_ns()
+
+    def commit(self, now: int) -> bool:
+        """
+        Refreshes the display if anything changed and the cap allows it.
+
+        Returns True if the display was refreshed.
+        """
+        if not self._pending:
+            return False
+        if now < self._next:
+            self.held += 1
+            return False
+        # Capped here: no target frame rate so that displayio never waits nor skips.
+        # Older defaults (target 60, minimum 1) would drop our slower refreshes.
+        if not self._display.refresh(target_frames_per_second=None, minimum_frames_per_second=0):
+            return False  # Still pending
+        self._pending = False
+        self._next = now + self._interval
+        self.refreshes += 1
+        if self._record is not None:
+            self._record(time.monotonic_ns() - self._changed)
+        return True
+
+    def report(self) -> None:
+        """
+        Prints the refresh counts.
+        """
+        print(f"Display: {self.refreshes} refreshes, {self.held} passes held back by the cap")
@@ -0,0 +1,118 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import time
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+    print("asyncio unavailable, using a plain loop...")
+    print("Install adafruit-circuitpython-asyncio for cooperative scheduling.")
+
+# Priorities. Lower runs first.
+PRIORITY_MIDI = 0
+PRIORITY_DISPLAY = 1
+PRIORITY_BUTTONS = 2
+PRIORITY_SYNC = 3
+
+MAX_DEFER = 8  # Consecutive yields a task grants to busier higher priority tasks
+
+
+class Task:
+    """
+    A main loop step run periodically.
+
+    The step is called with the current time.monotonic_ns() timestamp.
+    It returns True when it still has pending work (e.g. more MIDI input to drain)
+    which makes lower priority tasks give way.
+    """
+
+    def __init__(self, step, interval: int, priority: int, name: str) -> None:
+        self.step = step
+        self.interval: int = interval  # ms. 0 runs on every scheduler pass.
+        self.priority: int = priority
+        self.name: str = name
+
+        self.next_run: int = 0  # ns
+        self.busy: bool = False  # The last run reported pending work
+        self.runs: int = 0
+        self.deferrals: int = 0
+
+
+class Runtime:
+    """
+    A cooperative scheduler for the main loop steps.
+
+    Every step runs as its own asyncio task with an explicit yield point after each run.
+    Tasks of lower priority defer for a bounded number of passes
+    while a higher priority task reports pending work.
+
+    Falls back to a plain loop calling due steps by priority when asyncio is unavailable.
+    Only uses the standard asyncio API so that it runs under CPython too.
+    """
+
+    def __init__(self) -> None:
+        self.tasks: [Task] = []
+        self._busy: int = 0  # One bit per priority with pending work
+        self._busy_tasks = bytearray(8)  # Busy tasks by priority: tasks sharing a priority don't clear each other
+
+    def add(self, step, interval: int = 0, priority: int = PRIORITY_MIDI, name: str = None) -> Task:
+        task = Task(step, interval, priority, name or step.__name__)
+        self.tasks.append(task)
+        self.tasks.sort(key=lambda t: t.priority)
+        return task
+
+    def _yielding(self, task: Task) -> bool:
+        """
+        Checks whether the task should give way to a busier higher priority task.
+        """
+        if self._busy & ((1 << task.priority) - 1) and task.deferrals < MAX_DEFER:
+            task.deferrals += 1
+            return True
+        task.deferrals = 0
+        return False
+
+    def _step(self, task: Task, now: int) -> None:
+        task.runs += 1
+        busy = bool(task.step(now))
+        if busy == task.busy:
+            return
+        task.busy = busy
+        priority = task.priority
+        if busy:
+            self._busy_tasks[priority] += 1
+            self._busy |= 1 << priority
+        else:
+            self._busy_tasks[priority] -= 1
+            if not self._busy_tasks[priority]:
+                self._busy &= ~(1 << priority)
+
+    async def _run(self, task: Task) -> None:
+        interval = task.interval / 1000  # asyncio sleeps in seconds
+        while True:
+            if self._yielding(task):
+                await asyncio.sleep(0)
+                continue
+            self._step(task, time.monotonic_ns())
+            await asyncio.sleep(interval)
+
+    async def _main(self) -> None:
+        await asyncio.gather(*[asyncio.create_task(self._run(task)) for task in self.tasks])
+
+    def _loop(self) -> None:
+        while True:
+            for task in self.tasks:
+                now = time.monotonic_ns()
+                if now < task.next_run or self._yielding(task):
+                    continue
+                task.next_run = now + task.interval * 1000000
+                self._step(task, now)
+
+    def run(self) -> None:
+        """
+        Runs the tasks forever.
+        """
+        if asyncio is None:
+            self._loop()
+        else:
+            asyncio.run(self._main())
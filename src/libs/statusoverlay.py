@@ -0,0 +1,84 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import displayio
+from glyphcells import GlyphCells, GlyphSheet
+
+# States. Also the palette index of their color.
+STOPPED = 1  # Red
+RUNNING = 2  # Yellow
+LOCKED = 3  # Green
+
+# Direction tiles
+_DOT = 0
+_FORWARD = 1
+_REVERSE = 2
+
+
+class StatusOverlay(displayio.Group):
+    """
+    A status line: transport direction ('<', '>' or '·'), frame rate and state as the color.
+
+    The font has no arrows: direction tiles are drawn once at boot.
+    Every field is cached so that only the ones that changed get redrawn.
+    """
+
+    ARROW_SIZE = 5
+
+    def __init__(self, sheet: GlyphSheet, palette: displayio.Palette, width: int, height: int) -> None:
+        super().__init__()
+        self._colors = palette
+
+        self._rate = GlyphCells(sheet, '00.000', palette[STOPPED])
+        self._rate.x = width // 2 - self._rate.width // 2
+        self._rate.y = height - self._rate.height
+
+        size = self.ARROW_SIZE
+        middle = size // 2
+        bitmap = displayio.Bitmap(size * 3, size, 2)
+        bitmap[_DOT * size + middle, middle] = 1
+        for x in range(middle + 1):
+            for y in range(x, size - x):
+                bitmap[_FORWARD * size + x, y] = 1  # Narrows to the right
+                bitmap[_REVERSE * size + size - 1 - x, y] = 1  # Narrows to the left
+        self._arrow_palette = displayio.Palette(2)
+        self._arrow_palette.make_transparent(0)
+        self._arrow_palette[1] = palette[STOPPED]
+        self._arrow = displayio.TileGrid(
+            bitmap,
+            pixel_shader=self._arrow_palette,
+            tile_width=size,
+            tile_height=size,
+            default_tile=_DOT,
+            x=1,
+            y=height - self._rate.height // 2 - middle - 1,
+        )
+
+        self._direction: int = 0
+        self._rate_name: str = None
+        self._state: int = STOPPED
+
+        self.append(self._arrow)
+        self.append(self._rate)
+
+    def update(self, direction: int, rate_name: str, state: int) -> bool:
+        """
+        Shows the direction (-1 reverse, 0 unknown or stopped, 1 forward), the frame rate name and the state.
+
+        Returns True if anything changed.
+        """
+        changed = False
+        if direction != self._direction:
+            self._direction = direction
+            self._arrow[0] = _FORWARD if direction > 0 else _REVERSE if direction < 0 else _DOT
+            changed = True
+        if rate_name != self._rate_name:
+            self._rate_name = rate_name
+            self._rate.text = rate_name
+            changed = True
+        if state != self._state:
+            self._state = state
+            color = self._colors[state]
+            self._arrow_palette[1] = color
+            self._rate.color = color
+            changed = True
+        return changed
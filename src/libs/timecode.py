@@ -0,0 +1,163 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+
+# Rate codes. The first four match the MTC Time Code Type.
+RATE_24 = 0
+RATE_25 = 1
+RATE_2997_DF = 2
+RATE_30 = 3
+# Pull-down rates. Only told apart from their MTC Time Code Type by timing.
+RATE_23976 = 4
+RATE_2997_NDF = 5
+
+FRAMERATES = (24, 25, 29.97, 30, 23.976, 29.97)  # Indexed by rate code
+RATE_NAMES = ('24', '25', '29.97', '30', '23.976', '29.97')  # Indexed by rate code
+_FPS = (24, 25, 30, 30, 24, 30)  # Frame count base, indexed by rate code
+_DROP = (False, False, True, False, False, False)  # Drop frame, indexed by rate code
+
+# SMPTE drop frame: frames 0 and 1 are skipped every minute except every tenth minute
+_DF_FRAMES_PER_MIN = 30 * 60 - 2  # 1798
+_DF_FRAMES_PER_10MIN = _DF_FRAMES_PER_MIN * 10 + 2  # 17982
+
+_FRAMES_PER_DAY = tuple(
+    _DF_FRAMES_PER_10MIN * 6 * 24 if _DROP[rate] else _FPS[rate] * 60 * 60 * 24
+    for rate in range(len(_FPS))
+)
+
+
+class Timecode:
+    """
+    An SMPTE timecode stored as an absolute frame index since midnight and a rate code.
+
+    Arithmetic is a single integer operation wrapping at 24 hours.
+    Hours, minutes, seconds and frames are only derived when read after a change.
+    """
+
+    __slots__ = ('_index', '_rate', '_dirty', '_hours', '_minutes', '_seconds', '_frames')
+
+    def __init__(self, rate: int = RATE_30, index: int = 0) -> None:
+        self._rate: int = rate
+        self._index: int = index % _FRAMES_PER_DAY[rate]
+        self._dirty: bool = True
+        self._hours: int = 0
+        self._minutes: int = 0
+        self._seconds: int = 0
+        self._frames: int = 0
+
+    @property
+    def rate(self) -> int:
+        return self._rate
+
+    @rate.setter
+    def rate(self, value: int) -> None:
+        """
+        Changes the rate, keeping the time label.
+        """
+        if value != self._rate:
+            self.set(self.hours, self.minutes, self.seconds, self.frames, value)
+
+    @property
+    def framerate(self) -> float:
+        return FRAMERATES[self._rate]
+
+    @property
+    def drop_frame(self) -> bool:
+        return _DROP[self._rate]
+
+    @property
+    def index(self) -> int:
+        """
+        Absolute frame index since midnight
+        """
+        return self._index
+
+    @index.setter
+    def index(self, value: int) -> None:
+        self._index = value % _FRAMES_PER_DAY[self._rate]
+        self._dirty = True
+
+    @property
+    def hours(self) -> int:
+        if self._dirty:
+            self._split()
+        return self._hours
+
+    @property
+    def minutes(self) -> int:
+        if self._dirty:
+            self._split()
+        return self._minutes
+
+    @property
+    def seconds(self) -> int:
+        if self._dirty:
+            self._split()
+        return self._seconds
+
+    @property
+    def frames(self) -> int:
+        if self._dirty:
+            self._split()
+        return self._frames
+
+    def add(self, frames: int) -> None:
+        """
+        Moves by a signed number of frames, wrapping at 24 hours.
+        """
+        self._index = (self._index + frames) % _FRAMES_PER_DAY[self._rate]
+        self._dirty = True
+
+    def set(self, hours: int, minutes: int, seconds: int, frames: int, rate: int = None) -> None:
+        """
+        Sets the time from its fields, optionally changing the rate.
+
+        Labels skipped by drop frame are moved forward to the next valid frame.
+        """
+        if rate is not None:
+            self._rate = rate
+        fps = _FPS[self._rate]
+        drop = _DROP[self._rate]
+
+        if frames >= fps:
+            frames = fps - 1
+        if drop and frames < 2 and not seconds and minutes % 10:
+            frames = 2
+
+        index = ((hours * 60 + minutes) * 60 + seconds) * fps + frames
+        if drop:
+            total_minutes = hours * 60 + minutes
+            index -= 2 * (total_minutes - total_minutes // 10)
+
+        self._index = index % _FRAMES_PER_DAY[self._rate]
+
+        # Fields are already known unless we wrapped
+        self._hours = hours
+        self._minutes = minutes
+        self._seconds = seconds
+        self._frames = frames
+        self._dirty = index != self._index
+
+    def _split(self) -> None:
+        """
+        Derives the fields from the frame index.
+        """
+        index = self._index
+        fps = _FPS[self._rate]
+
+        # No divmod(): its tuple would be allocated on every frame
+        if _DROP[self._rate]:
+            rem = index % _DF_FRAMES_PER_10MIN
+            index += 18 * (index // _DF_FRAMES_PER_10MIN)
+            if rem > 1:
+                index += 2 * ((rem - 2) // _DF_FRAMES_PER_MIN)
+
+        self._frames = index % fps
+        index //= fps
+        self._seconds = index % 60
+        index //= 60
+        self._minutes = index % 60
+        self._hours = index // 60
+        self._dirty = False
+
+    def __str__(self) -> str:
+        return f"{self.hours:02d}:{self.minutes:02d}:{self.seconds:02d}:{self.frames:02d}"
@@ -0,0 +1,163 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import random
+from array import array
+
+from clockscheduler import ticks_diff
+
+# States
+IDLE = 0  # Waiting for the next synchronization
+CONNECT = 1  # Start connecting to the network
+CONNECTING = 2  # Waiting for the network
+SETTLE = 3  # Let network settle
+QUERY = 4  # Fetch the time
+APPLY = 5  # Update the clocks
+BACKOFF = 6  # Waiting before retrying
+
+STATE_NAMES = ('IDLE', 'CONNECT', 'CONNECTING', 'SETTLE', 'QUERY', 'APPLY', 'BACKOFF')
+
+
+class TimeSync:
+    """
+    An incremental, non-blocking, time synchronization state machine.
+
+    Each step() call advances by at most one small operation and never sleeps.
+    Failed attempts are retried with exponential backoff and jitter.
+
+    The network and clock operations are provided as callables:
+    - connect(): starts connecting, without waiting
+    - connected() -> bool
+    - query() -> bool: fetches the time into the board RTC, returns True on success
+    - apply(): propagates the board RTC time
+    """
+
+    CONNECT_TIMEOUT = 15000  # ms
+    SETTLE_TIME = 1000  # ms
+    BACKOFF_BASE = 5000  # ms
+    BACKOFF_MAX = 10 * 60 * 1000  # ms
+
+    def __init__(self, connect, connected, query, apply, ticks: int, interval: int = 60 * 60 * 24) -> None:
+        self._connect = connect
+        self._connected = connected
+        self._query = query
+        self._apply = apply
+        self._interval: int = interval * 1000  # Converts secs to ms
+
+        self.state: int = CONNECT  # Synchronize ASAP
+        self._state_ticks: int = ticks  # State entry time
+        self._wait: int = 0  # Backoff duration in ms
+        self._failures: int = 0  # Consecutive failures
+        self._last_sync: int = ticks
+
+        # Metrics
+        self.attempts: int = 0
+        self.successes: int = 0
+        self.failures: int = 0
+        self.state_time = array('L', [0] * len(STATE_NAMES))  # Total ms spent by state
+        self.state_entries = array('L', [0] * len(STATE_NAMES))
+        self.state_entries[CONNECT] = 1
+
+    @property
+    def busy(self) -> bool:
+        """
+        A synchronization is in progress
+        """
+        return self.state not in (IDLE, BACKOFF)
+
+    @property
+    def synced(self) -> bool:
+        """
+        At least one synchronization succeeded
+        """
+        return self.successes > 0
+
+    def request(self, ticks: int) -> None:
+        """
+        Synchronizes ASAP.
+        """
+        if self.state in (IDLE, BACKOFF):
+            self._enter(CONNECT, ticks)
+
+    def _enter(self, state: int, ticks: int) -> None:
+        self.state_time[self.state] += ticks_diff(ticks, self._state_ticks)
+        self.state_entries[state] += 1
+        self.state = state
+        self._state_ticks = ticks
+
+    def _fail(self, ticks: int) -> None:
+        self.failures += 1
+        self._failures += 1
+        delay = self.BACKOFF_BASE << min(self._failures - 1, 7)
+        if delay > self.BACKOFF_MAX:
+            delay = self.BACKOFF_MAX
+        # Jitter prevents retrying in lockstep with other devices after an outage
+        self._wait = delay // 2 + random.randint(0, delay // 2)
+        self._enter(BACKOFF, ticks)
+
+    def step(self, ticks: int) -> int:
+        """
+        Advances the state machine.
+
+        Returns the current state.
+        """
+        state = self.state
+        elapsed = ticks_diff(ticks, self._state_ticks)
+
+        if state == IDLE:
+            if ticks_diff(ticks, self._last_sync) >= self._interval:
+                self._enter(CONNECT, ticks)
+
+        elif state == CONNECT:
+            self.attempts += 1
+            if self._connected():
+                self._enter(QUERY, ticks)
+            else:
+                try:
+                    self._connect()
+                except (RuntimeError, OSError) as e:
+                    print("Unable to connect -", e)
+                    self._fail(ticks)
+                else:
+                    self._enter(CONNECTING, ticks)
+
+        elif state == CONNECTING:
+            if self._connected():
+                self._enter(SETTLE, ticks)
+            elif elapsed > self.CONNECT_TIMEOUT:
+                self._fail(ticks)
+
+        elif state == SETTLE:
+            if elapsed >= self.SETTLE_TIME:
+                self._enter(QUERY, ticks)
+
+        elif state == QUERY:
+            try:
+                valid = self._query()
+            except (RuntimeError, OSError) as e:
+                print("Unable to get time -", e)
+                valid = False
+            if valid:
+                self._enter(APPLY, ticks)
+            else:
+                self._fail(ticks)
+
+        elif state == APPLY:
+            self._apply()
+            self.successes += 1
+            self._failures = 0
+            self._last_sync = ticks
+            self._enter(IDLE, ticks)
+
+        elif state == BACKOFF:
+            if elapsed >= self._wait:
+                self._enter(CONNECT, ticks)
+
+        return self.state
+
+    def report(self) -> None:
+        """
+        Prints the synchronization metrics.
+        """
+        print(f"Time sync: {self.attempts} attempts, {self.successes} successes, {self.failures} failures")
+        for state, name in enumerate(STATE_NAMES):
+            print(f"  {name}: {self.state_entries[state]} entries, {self.state_time[state]} ms")
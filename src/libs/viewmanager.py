@@ -0,0 +1,46 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import displayio
+
+
+class ViewManager(displayio.Group):
+    """
+    Every view by mode, built once at boot and stacked in a single group.
+
+    Only the current view is visible.
+    Switching hides it and shows the next one: two attribute writes,
+    no group membership change and no allocation, whatever the views hold.
+    """
+
+    def __init__(self, mode: str) -> None:
+        super().__init__()
+        self._views = {}
+        self._mode: str = mode
+
+        self.switches: int = 0
+
+    def add(self, mode: str, view: displayio.Group) -> None:
+        """
+        Adds the view of a mode, hidden unless it is the current mode.
+        """
+        view.hidden = mode != self._mode
+        self._views[mode] = view
+        self.append(view)
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    def show(self, mode: str) -> bool:
+        """
+        Shows the view of a mode.
+
+        Returns True if it was not already shown.
+        """
+        if mode == self._mode:
+            return False
+        self._views[self._mode].hidden = True
+        self._views[mode].hidden = False
+        self._mode = mode
+        self.switches += 1
+        return True
@@ -0,0 +1,59 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Shared fixtures.
+
+The firmware libraries are imported from src/libs, like on the board.
+"""
+import os
+import sys
+
+import pytest
+
+from sim.core import FAKES_DIR, SRC_DIR, Simulator
+
+sys.path.insert(0, os.path.join(SRC_DIR, 'libs'))
+
+
+class Port:
+    """
+    A USB MIDI port stand-in: hands out queued bytes through readinto().
+    """
+
+    def __init__(self) -> None:
+        self.pending = bytearray()
+
+    def send(self, data: bytes) -> None:
+        self.pending.extend(data)
+
+    def readinto(self, buf) -> int:
+        nbytes = min(len(buf), len(self.pending))
+        buf[:nbytes] = self.pending[:nbytes]
+        del self.pending[:nbytes]
+        return nbytes
+
+
+@pytest.fixture
+def port() -> Port:
+    return Port()
+
+
+@pytest.fixture
+def fakes() -> None:
+    """
+    Makes the hardware stand-ins (displayio...) importable, for the libraries drawing on the display.
+
+    Whatever gets imported meanwhile is forgotten afterwards, like the simulator does for the firmware.
+    """
+    loaded_modules = set(sys.modules)
+    sys.path.insert(0, FAKES_DIR)
+    yield
+    sys.path.remove(FAKES_DIR)
+    for name in set(sys.modules) - loaded_modules:
+        del sys.modules[name]
+
+
+@pytest.fixture
+def sim() -> Simulator:
+    # Coarse passes: the scenarios last seconds of virtual time
+    return Simulator(pass_cost=1000000)
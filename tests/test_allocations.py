@@ -0,0 +1,109 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Steady state allocations of the main loop steps, on the whole firmware.
+
+CircuitPython has no reference counting: whatever a pass allocates is garbage to collect.
+CPython allocates and frees its large ints (e.g. timestamps) on the fly:
+that noise floor is about 100 to 400 bytes per pass, while any object built per pass
+(string, tuple, list, bitmap...) adds its size to every pass.
+"""
+import os
+import tracemalloc
+
+import pytest
+
+from sim import mtc
+from sim.core import SRC_DIR
+
+STEPS = ('midi_step', 'display_step')
+MEAN_BYTES = 256  # Per pass
+MAX_BYTES = 512  # Per pass
+LEAK_BYTES = 1024  # Retained by the firmware over the whole measurement
+
+
+class Allocations:
+    """
+    Measures the bytes allocated by each run of the main loop steps, from a timed action.
+
+    Retained memory is compared from a baseline taken a while after starting.
+    Passes that refresh the display, collect garbage or read the RTC are skipped:
+    the simulated display composes frames on the host and the RTC returns new time structures.
+    """
+
+    def __init__(self, sim) -> None:
+        self.sim = sim
+        self.passes = {name: [] for name in STEPS}
+        self.leaked = 0
+        self._snapshot = None
+
+    def start(self) -> None:
+        firmware = self.sim.firmware()
+        for task in firmware['runtime'].tasks:
+            if task.name in STEPS:
+                task.step = self._measured(task.step, self.passes[task.name], firmware)
+        tracemalloc.start()
+
+    def baseline(self) -> None:
+        # Once the state allocated before tracing started was replaced
+        self._snapshot = self._firmware_snapshot()
+
+    def stop(self) -> None:
+        snapshot = self._firmware_snapshot()
+        self.leaked = sum(stat.size_diff for stat in snapshot.compare_to(self._snapshot, 'filename'))
+        tracemalloc.stop()
+
+    @staticmethod
+    def _firmware_snapshot():
+        return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(True, SRC_DIR + os.sep + '*')])
+
+    @staticmethod
+    def _measured(step, passes: list, firmware: dict):
+        refresher = firmware['refresher']
+        collector = firmware['collector']
+
+        def measured(ts):
+            clock = firmware['clock']
+            state = (refresher.refreshes, collector.collections, clock.reads if clock else 0)
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = step(ts)
+            peak = tracemalloc.get_traced_memory()[1] - before
+            if state == (refresher.refreshes, collector.collections, clock.reads if clock else 0):
+                passes.append(peak)
+            return result
+
+        return measured
+
+
+@pytest.fixture
+def allocations(sim) -> Allocations:
+    allocations = Allocations(sim)
+    yield allocations
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def measure(sim, allocations: Allocations, start: float) -> None:
+    sim.at(start, allocations.start)
+    sim.at(start + 500, allocations.baseline)
+    sim.at(start + 3500, allocations.stop)
+    sim.run(start + 3501)
+    check(allocations)
+
+
+def check(allocations: Allocations) -> None:
+    for name, passes in allocations.passes.items():
+        assert len(passes) > 1000, name
+        assert sum(passes) / len(passes) < MEAN_BYTES, name
+        assert max(passes) < MAX_BYTES, name
+    assert allocations.leaked < LEAK_BYTES
+
+
+def test_mtc(sim, allocations):
+    sim.send_midi_stream(500, mtc.stream(start=(1, 0, 0, 0), frames=300))
+    measure(sim, allocations, 3000)
+
+
+def test_clock(sim, allocations):
+    measure(sim, allocations, 6000)  # Anchored to the RTC second edge
@@ -0,0 +1,77 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import pytest
+
+from beatclock import PPQN, BeatClock
+
+START_NS = 1000000000
+
+
+def tick_period(bpm: float) -> int:
+    return int(60000000000 / (bpm * PPQN))
+
+
+def play(clock: BeatClock, bpm: float, ticks: int, start: int = START_NS, batch: int = 1, every: int = 8) -> [float]:
+    """
+    Sends Timing Clocks at a tempo.
+
+    Every few ticks, a batch of them is drained together, sharing the timestamp of its last tick.
+    Returns the tempo estimate after each drain.
+    """
+    period = tick_period(bpm)
+    estimates = []
+    for index in range(ticks):
+        last = index
+        if index % every < batch:
+            last = index - index % every + batch - 1
+        clock.timing_clock(start + last * period)
+        if index == last:
+            estimates.append(clock.bpm)
+    return estimates
+
+
+def test_tempo():
+    clock = BeatClock()
+    estimates = play(clock, 120, 4 * PPQN)
+    assert estimates[-1] == pytest.approx(120, abs=0.01)
+
+
+@pytest.mark.parametrize('batch', [2, 3])
+def test_batched_ticks(batch):
+    clock = BeatClock()
+    play(clock, 120, 2 * PPQN)
+    estimates = play(clock, 120, 8 * PPQN, start=START_NS + 2 * PPQN * tick_period(120), batch=batch)
+    assert min(estimates) > 119.5
+    assert max(estimates) < 120.5
+
+
+def test_tempo_change():
+    clock = BeatClock()
+    play(clock, 120, 4 * PPQN)
+    estimates = play(clock, 90, 8 * PPQN, start=START_NS + 4 * PPQN * tick_period(120))
+    assert estimates[-1] == pytest.approx(90, abs=0.1)
+
+
+def test_transport():
+    clock = BeatClock(beats_per_bar=4)
+    clock.start(START_NS)
+    assert not clock.timing_clock(START_NS)  # Marks the start position
+    assert clock.ticks == 0
+    for index in range(PPQN * 5):
+        assert clock.timing_clock(START_NS + index + 1)
+    assert (clock.bar, clock.beat, clock.tick) == (2, 2, 0)
+
+    clock.stop(START_NS + 1000)
+    assert not clock.timing_clock(START_NS + 1001)
+    assert clock.ticks == PPQN * 5
+
+
+def test_song_position():
+    clock = BeatClock(beats_per_bar=3)
+    clock.song_position(4 * 7, START_NS)  # Sixteenths
+    assert (clock.bar, clock.beat, clock.tick) == (3, 2, 0)
+
+    clock.cont(START_NS)
+    clock.timing_clock(START_NS + 1)
+    clock.timing_clock(START_NS + 2)
+    assert (clock.bar, clock.beat, clock.tick) == (3, 2, 1)
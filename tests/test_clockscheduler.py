@@ -0,0 +1,134 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import calendar
+import time
+import types
+
+import pytest
+
+START = calendar.timegm((2022, 3, 14, 12, 0, 0))
+TICKS_PERIOD = 1 << 29
+
+
+class HardwareRTC:
+    """
+    A DS3231 stand-in running ms ahead of the ticks, counting reads.
+    """
+
+    def __init__(self, start: int = START, offset: int = 0) -> None:
+        self.start = start
+        self.offset = offset  # ms
+        self.ticks = 0
+        self.reads = 0
+
+    @property
+    def datetime(self) -> time.struct_time:
+        self.reads += 1
+        return time.gmtime(self.start + (self.ticks + self.offset) // 1000)
+
+
+@pytest.fixture
+def clockscheduler(fakes, monkeypatch):
+    import clockscheduler
+
+    # The board RTC is set from the hardware one
+    monkeypatch.setattr(clockscheduler, 'rtc', types.SimpleNamespace(RTC=types.SimpleNamespace))
+    return clockscheduler
+
+
+def run(clock, hwrtc: HardwareRTC, until: int, base: int = 0, step: int = 10) -> [(int, int, int)]:
+    """
+    Polls every step ms of hardware time.
+
+    Returns the (hardware time, edges, second) of the polls that reported any.
+    """
+    reported = []
+    while hwrtc.ticks < until:
+        hwrtc.ticks += step
+        edges = clock.poll((base + hwrtc.ticks) % TICKS_PERIOD)
+        if edges:
+            reported.append((hwrtc.ticks, edges, clock.second))
+    return reported
+
+
+def test_ticks_diff(clockscheduler):
+    ticks_diff = clockscheduler.ticks_diff
+    assert ticks_diff(5, 3) == 2
+    assert ticks_diff(3, 5) == -2
+    assert ticks_diff(2, TICKS_PERIOD - 3) == 5
+    assert ticks_diff(TICKS_PERIOD - 3, 2) == -5
+
+
+def test_first_poll(clockscheduler):
+    scheduler = clockscheduler.ClockScheduler
+    clock = scheduler(HardwareRTC(), 0)
+    assert clock.poll(0) == scheduler.ALL
+    assert (clock.year, clock.month, clock.day) == (2022, 3, 14)
+    assert (clock.hour, clock.minute, clock.second) == (12, 0, 0)
+    assert clock.poll(0) == 0
+
+
+@pytest.mark.parametrize('offset', [0, 300, 990])
+def test_second_edge(clockscheduler, offset):
+    """
+    Seconds follow the RTC ones, whenever the anchoring happened within the RTC second.
+    """
+    scheduler = clockscheduler.ClockScheduler
+    hwrtc = HardwareRTC(offset=offset)
+    clock = scheduler(hwrtc, 0)
+    clock.poll(0)
+
+    seconds = [(ticks, second) for ticks, edges, second in run(clock, hwrtc, 5000) if edges & scheduler.SECOND]
+    assert len(seconds) == 5
+    for ticks, second in seconds:
+        assert second == (ticks + offset) // 1000
+        assert (ticks + offset) % 1000 < scheduler.SEEK_INTERVAL + 10
+
+
+def test_blink(clockscheduler):
+    scheduler = clockscheduler.ClockScheduler
+    hwrtc = HardwareRTC()
+    clock = scheduler(hwrtc, 0)
+    clock.poll(0)
+
+    blinks = [ticks for ticks, edges, _ in run(clock, hwrtc, 3000) if edges & scheduler.BLINK]
+    assert len(blinks) == 6
+    assert clock.colon
+
+
+def test_rtc_reads(clockscheduler):
+    """
+    The RTC is only read while catching its second edge and when anchoring again.
+    """
+    hwrtc = HardwareRTC(offset=500)
+    clock = clockscheduler.ClockScheduler(hwrtc, 0, anchor_interval=10)
+    run(clock, hwrtc, 2000, step=1)
+    seek_reads = hwrtc.reads
+    assert seek_reads <= 1 + 1000 // clock.SEEK_INTERVAL + 1
+
+    run(clock, hwrtc, 10499, step=1)  # Anchored on the edge caught at 500 ms
+    assert hwrtc.reads == seek_reads
+
+    run(clock, hwrtc, 10500, step=1)
+    assert hwrtc.reads == seek_reads + 1
+    assert clock.reads == hwrtc.reads
+
+
+def test_ticks_wraparound(clockscheduler):
+    hwrtc = HardwareRTC()
+    base = TICKS_PERIOD - 2500
+    clock = clockscheduler.ClockScheduler(hwrtc, base)
+    run(clock, hwrtc, 5000, base=base)
+    assert clock.second == 5
+    assert hwrtc.reads < 30
+
+
+def test_midnight(clockscheduler):
+    scheduler = clockscheduler.ClockScheduler
+    hwrtc = HardwareRTC(start=calendar.timegm((2022, 3, 14, 23, 59, 58)))
+    clock = scheduler(hwrtc, 0)
+    clock.poll(0)
+
+    days = [ticks for ticks, edges, _ in run(clock, hwrtc, 3000) if edges & scheduler.DAY]
+    assert days == [2000]
+    assert (clock.day, clock.hour, clock.minute, clock.second) == (15, 0, 0, 1)
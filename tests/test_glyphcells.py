@@ -0,0 +1,152 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+The glyph cells are imported with the hardware stand-ins: they draw with displayio.
+"""
+import os
+
+import pytest
+
+from sim.core import SRC_DIR
+
+FONT = os.path.join(SRC_DIR, 'gt.bdf')
+TEMPLATE = '00:00:00:00'
+
+
+@pytest.fixture
+def glyphcells(fakes):
+    import glyphcells
+    return glyphcells
+
+
+@pytest.fixture
+def sheet(glyphcells):
+    from adafruit_bitmap_font import bitmap_font
+    return glyphcells.GlyphSheet(bitmap_font.load_font(FONT))
+
+
+@pytest.fixture
+def cells(glyphcells, sheet):
+    return glyphcells.GlyphCells(sheet, TEMPLATE, 0xFF0000)
+
+
+def tiles(cells) -> [int]:
+    return [grid[0] for grid in cells]
+
+
+def test_layout(sheet, cells):
+    assert len(cells) == len(TEMPLATE)
+    assert tiles(cells) == [sheet.tile(char) for char in TEMPLATE]
+    assert [grid.x for grid in cells][1:] == [
+        sum(sheet.advances[sheet.tile(char)] for char in TEMPLATE[:position]) for position in range(1, len(TEMPLATE))
+    ]
+    assert cells.width == sum(sheet.advances[sheet.tile(char)] for char in TEMPLATE)
+    assert cells.height == sheet.tile_height
+
+
+def test_text(sheet, cells):
+    cells.text = '01:23:45:06'
+    assert cells.text == '01:23:45:06'
+    assert tiles(cells) == [sheet.tile(char) for char in '01:23:45:06']
+
+
+def test_text_padding(sheet, cells):
+    cells.text = '1.5'
+    assert tiles(cells) == [sheet.tile(char) for char in '1.5'] + [0] * (len(TEMPLATE) - 3)
+
+
+def test_dirty_digits(cells, monkeypatch):
+    """
+    Only the positions that differ are written.
+    """
+    writes = []
+    grids = list(cells)
+    tile_grid = type(grids[0])
+    set_tile = tile_grid.__setitem__
+
+    def recording(grid, key, tile):
+        writes.append(grids.index(grid))
+        set_tile(grid, key, tile)
+
+    monkeypatch.setattr(tile_grid, '__setitem__', recording)
+
+    cells.text = '00:00:00:01'
+    assert writes == [10]
+    cells.text = '00:00:00:01'
+    assert writes == [10]
+    cells.text = '00:00:01:00'
+    assert writes == [10, 7, 10]
+
+
+def test_set_number(sheet, cells):
+    cells.text = TEMPLATE
+    cells.set_number(3, 42, 2)
+    cells.set_number(9, 123, 2)  # Higher digits dropped
+    assert tiles(cells) == [sheet.tile(char) for char in '00:42:00:23']
+    assert cells.text is None
+
+    cells.text = TEMPLATE  # Back from tiles to text
+    assert tiles(cells) == [sheet.tile(char) for char in TEMPLATE]
+
+
+def test_unknown_character(sheet, cells):
+    cells.text = '00:0X:00:00'
+    assert tiles(cells)[4] == 0  # Space
+
+
+def test_color(cells):
+    cells.color = 0x00FF00
+    assert cells.color == 0x00FF00
+
+
+@pytest.fixture
+def atlas(glyphcells, tmp_path) -> str:
+    from tools import glyphatlas
+
+    path = tmp_path / 'gt.atlas'
+    path.write_bytes(glyphatlas.compile_atlas(*glyphatlas.parse_bdf(FONT), glyphcells.CHARSET))
+    return str(path)
+
+
+def pixels(sheet) -> [int]:
+    bitmap = sheet.bitmap
+    return [bitmap[x, y] for y in range(bitmap.height) for x in range(bitmap.width)]
+
+
+@pytest.mark.parametrize('bitmaptools', [True, False])
+def test_atlas(glyphcells, sheet, atlas, bitmaptools, monkeypatch):
+    """
+    The precompiled atlas holds the very same sheet as the font rendering.
+    """
+    if not bitmaptools:
+        monkeypatch.setattr(glyphcells, 'bitmaptools', None)
+    loaded = glyphcells.GlyphSheet(atlas=atlas)
+    assert (loaded.tile_width, loaded.tile_height) == (sheet.tile_width, sheet.tile_height)
+    assert loaded.tiles == sheet.tiles
+    assert loaded.digits == sheet.digits
+    assert loaded.advances == sheet.advances
+    assert pixels(loaded) == pixels(sheet)
+
+
+def test_shipped_atlas(glyphcells):
+    sheet = glyphcells.GlyphSheet(atlas=os.path.join(SRC_DIR, 'gt.atlas'))
+    for char in glyphcells.CHARSET[1:]:
+        assert sheet.tile(char), char
+
+
+def test_not_an_atlas(glyphcells):
+    with pytest.raises(ValueError, match='not a glyph atlas'):
+        glyphcells.GlyphSheet(atlas=FONT)
+
+
+@pytest.mark.parametrize('size', [-1, 1])
+def test_corrupted_atlas(glyphcells, atlas, size):
+    """
+    Truncated or trailing data.
+    """
+    with open(atlas, 'rb') as f:
+        data = f.read()
+    with open(atlas, 'wb') as f:
+        f.write(data[:size] if size < 0 else data + bytes(size))
+    with pytest.raises(ValueError, match='corrupted'):
+        glyphcells.GlyphSheet(atlas=atlas)
@@ -0,0 +1,36 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+HUI auto-detection, on the whole firmware.
+"""
+
+HUI_PING = bytes((0x90, 0x00, 0x00))
+HUI_METER = bytes((0xA0, 0x00, 0x0C))  # Strip 0, left side, level 12
+HUI_TIMECODE = bytes((0xF0, 0x00, 0x00, 0x66, 0x05, 0x00, 0x11, 0x00, 0x00, 0x00, 0x01, 0x00, 0x00, 0x00, 0xF7))
+
+
+def test_keyboard_aftertouch_is_not_hui(sim):
+    sim.send_midi(500, bytes((0xA0, 0x3C, 0x28)))
+    sim.send_midi(600, bytes((0xA0, 0x3C, 0x00)))
+    ns = sim.run(1500)
+    assert ns['MODE'] == 'Clock'
+
+
+def test_hui_ping(sim):
+    sim.send_midi(500, HUI_PING)
+    sim.send_midi(600, HUI_METER)
+    ns = sim.run(1500)
+    assert ns['MODE'] == 'HUI'
+
+
+def test_hui_timecode(sim):
+    sim.send_midi(500, HUI_TIMECODE)
+    ns = sim.run(1500)
+    assert ns['MODE'] == 'HUI'
+
+
+def test_hui_note_is_not_ping(sim):
+    sim.send_midi(500, bytes((0x90, 0x00, 0x40)))
+    sim.send_midi(600, HUI_METER)
+    ns = sim.run(1500)
+    assert ns['MODE'] == 'Clock'
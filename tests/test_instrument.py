@@ -0,0 +1,158 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import pytest
+
+from instrument import ALLOC, BUCKETS, DISPLAY, GC, LOOP, MIDI, Instrument
+
+
+class Console:
+    """
+    A usb_cdc console stand-in with queued input.
+    """
+
+    def __init__(self, data: bytes = b'') -> None:
+        self.pending = bytearray(data)
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self.pending)
+
+    def read(self, size: int) -> bytes:
+        data = bytes(self.pending[:size])
+        del self.pending[:size]
+        return data
+
+
+@pytest.fixture
+def instrument() -> Instrument:
+    return Instrument(enabled=True, ring_size=8)
+
+
+def histogram(instrument: Instrument, stage: int) -> [int]:
+    return list(instrument.histograms[stage * BUCKETS:(stage + 1) * BUCKETS])
+
+
+def test_statistics(instrument):
+    for us in (0, 1, 2, 3, 1000):
+        instrument.record(MIDI, us * 1000)
+    assert instrument.counts[MIDI] == 5
+    assert instrument.mins[MIDI] == 0
+    assert instrument.maxs[MIDI] == 1000
+    assert histogram(instrument, MIDI)[:3] == [1, 1, 2]  # 0, 1, 2-3
+    assert histogram(instrument, MIDI)[10] == 1  # 512-1023
+    assert instrument.counts[DISPLAY] == 0
+
+
+def test_histogram_overflow(instrument):
+    instrument.add(MIDI, 1 << 30)
+    assert histogram(instrument, MIDI)[BUCKETS - 1] == 1
+
+
+def test_percentiles(instrument):
+    assert instrument.percentile(MIDI, 50) == 0
+    for value in range(1, 5):
+        instrument.add(MIDI, value)
+    assert instrument.percentile(MIDI, 50) == 2
+    assert instrument.percentile(MIDI, 99) == 4
+    assert instrument.percentile(MIDI, 0) == 1
+
+
+def test_recent_percentiles(instrument):
+    """
+    Percentiles only consider the ring buffer, all-time extremes are kept.
+    """
+    for value in range(100, 0, -1):
+        instrument.add(MIDI, value)
+    assert instrument.percentile(MIDI, 99) == 8
+    assert instrument.percentile(MIDI, 50) == 4
+    assert instrument.maxs[MIDI] == 100
+    assert instrument.mins[MIDI] == 1
+
+
+def test_disabled():
+    instrument = Instrument()
+
+    def step(ts):
+        return ts
+
+    assert instrument.wrap(step, MIDI) is step
+    assert instrument.recorder(MIDI) is None
+    instrument.collect()
+    assert instrument.counts[GC] == 0
+
+
+def test_wrap(instrument):
+    timed = instrument.wrap(lambda ts: ts + 1, DISPLAY)
+    assert timed(1) == 2
+    assert instrument.counts[DISPLAY] == 1
+
+    instrument.recorder(MIDI)(5000)
+    assert instrument.maxs[MIDI] == 5
+
+    instrument.collect()
+    assert instrument.counts[GC] == 1
+
+
+def test_lap(instrument):
+    instrument.lap(LOOP, 1000000)
+    assert instrument.counts[LOOP] == 0  # No previous lap
+    instrument.lap(LOOP, 3000000)
+    instrument.lap(LOOP, 4000000)
+    assert instrument.counts[LOOP] == 2
+    assert (instrument.mins[LOOP], instrument.maxs[LOOP]) == (1000, 2000)
+
+
+def test_allocations(instrument):
+    assert instrument._mem_alloc is None  # Not on the host
+    instrument.allocations()
+    assert instrument.counts[ALLOC] == 0
+
+    mem_alloc = iter((1000, 1200, 1300, 100, 400))
+    instrument._mem_alloc = lambda: next(mem_alloc)
+    for _ in range(5):
+        instrument.allocations()
+    assert instrument.counts[ALLOC] == 3  # The first pass has no reference and the collection is skipped
+    assert (instrument.mins[ALLOC], instrument.maxs[ALLOC]) == (100, 300)
+
+
+def test_reset(instrument):
+    instrument.add(MIDI, 10)
+    instrument.lap(LOOP, 1000)
+    instrument.reset()
+    assert instrument.counts[MIDI] == 0
+    assert histogram(instrument, MIDI) == [0] * BUCKETS
+    assert instrument.percentile(MIDI, 50) == 0
+    instrument.lap(LOOP, 2000)
+    assert instrument.counts[LOOP] == 0
+
+
+def test_dump(instrument, capsys):
+    instrument.add(MIDI, 3)
+    instrument.reports.append(lambda: print("extra report"))
+    instrument.dump()
+    out = capsys.readouterr().out
+    assert "MIDI" in out
+    assert "DISPLAY" not in out
+    assert "<4:1" in out
+    assert "extra report" in out
+
+
+def test_console(instrument, capsys):
+    instrument.add(MIDI, 3)
+    instrument._console = Console(b'du')
+    instrument.poll_console()
+    assert capsys.readouterr().out == ""  # Incomplete line
+
+    instrument._console.pending.extend(b'mp\r\nr\nhelp\n')
+    instrument.poll_console()
+    out = capsys.readouterr().out
+    assert "MIDI" in out
+    assert "Statistics reset" in out
+    assert "Commands:" in out
+    assert instrument.counts[MIDI] == 0
+
+
+def test_console_overflow(instrument, capsys):
+    instrument._console = Console(b'x' * 64 + b'\n')
+    instrument.poll_console()
+    assert "Commands:" in capsys.readouterr().out
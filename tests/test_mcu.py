@@ -0,0 +1,69 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+MCU auto-detection, on the whole firmware.
+"""
+
+
+def mcu_timecode(positions) -> bytes:
+    return bytes(byte for position in positions for byte in (0xB0, 0x40 + position, 0x30))
+
+
+def test_mcu_timecode(sim):
+    sim.send_midi(500, mcu_timecode(range(10)))
+    ns = sim.run(1500)
+    assert ns['MODE'] == 'MCU'
+
+
+def test_scattered_cc_is_not_mcu(sim):
+    sim.send_midi(500, mcu_timecode((0,)))
+    sim.send_midi(2500, mcu_timecode((3,)))
+    sim.send_midi(2600, mcu_timecode((10,)))  # Assignment display, not timecode
+    ns = sim.run(3500)
+    assert ns['MODE'] == 'Clock'
+
+
+def test_mcu_window(sim):
+    for index, position in enumerate(range(10)):
+        sim.send_midi(500 + index * 300, mcu_timecode((position,)))  # Over 1 s
+    ns = sim.run(4000)
+    assert ns['MODE'] == 'Clock'
+
+
+def mcu_frames(ms: float, frames: int, fps: int = 30) -> [(float, bytes)]:
+    """
+    A playing host: the full display once, then only the frame digits.
+    """
+    events = [(0, mcu_timecode(range(10)))]
+    for frame in range(1, frames):
+        events.append((frame * 1000 / fps, bytes((0xB0, 0x40, 0x30 + frame % 10, 0xB0, 0x41, 0x30 + frame // 10 % 3))))
+    return [(ms + offset, data) for offset, data in events]
+
+
+def test_stopped_host_keeps_mcu(sim):
+    sim.send_midi_stream(500, mcu_frames(0, 30))
+    ns = sim.run(500 + 1000 + 8000)  # Stopped for more than MCU_TIMEOUT
+    assert ns['MODE'] == 'MCU'
+
+
+def test_stop_then_resume(sim):
+    sim.send_midi_stream(500, mcu_frames(0, 30))
+    sim.send_midi_stream(9500, mcu_frames(0, 30)[1:])  # Only the frame digits change
+    ns = sim.run(9500 + 1000)
+    assert ns['MODE'] == 'MCU'
+    assert ns['mcu'].detected
+
+
+def test_resume_after_stop(sim):
+    sim.send_midi_stream(500, mcu_frames(0, 30))
+    sim.send_midi(1600, mcu_timecode(range(10)).replace(b'\x30', b'\x20'))  # Closed: blank display
+    sim.send_midi_stream(9000, mcu_frames(0, 30)[1:])  # Reopened, only the frame digits change
+    ns = sim.run(9000 + 1000)
+    assert ns['MODE'] == 'MCU'
+
+
+def test_blank_display_times_out(sim):
+    sim.send_midi_stream(500, mcu_frames(0, 30))
+    sim.send_midi(1600, mcu_timecode(range(10)).replace(b'\x30', b'\x20'))
+    ns = sim.run(1600 + 6000)
+    assert ns['MODE'] == 'Clock'
@@ -0,0 +1,88 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import pytest
+
+from midiingest import MIDIIngest
+from midirouter import CLOCK, TIMING_CLOCK, MIDIRouter
+from mtcframecounter import MTCFrameCounter
+from rawmidi import RawMTCInput
+from sim import mtc
+from timecode import RATE_30
+
+TS = 1000000000
+
+
+@pytest.fixture
+def counter() -> MTCFrameCounter:
+    return MTCFrameCounter()
+
+
+def ingest(port, counter: MTCFrameCounter, max_reads: int = 16, in_buf_size: int = 64) -> MIDIIngest:
+    router = MIDIRouter()
+    counter.register(router)
+    router.register(TIMING_CLOCK, lambda data1, data2, ts: False, CLOCK)
+    return MIDIIngest(RawMTCInput(port, router, in_buf_size), router, max_reads)
+
+
+def send(port, events) -> int:
+    for _, data in events:
+        port.send(data)
+    return len(events)
+
+
+def test_coalesce(port, counter):
+    """
+    A whole burst is ingested by a single drain, its frame updates collapsed into one display update.
+    """
+    midi = ingest(port, counter)
+    sent = send(port, mtc.stream(start=(1, 0, 0, 0), rate=RATE_30, frames=8))
+
+    assert midi.drain(TS) == sent
+    assert midi.is_mtc
+    assert midi.is_frame
+    assert not midi.more
+    assert midi.batches == 1
+    assert midi.messages == sent
+    assert midi.last_batch == midi.max_batch == sent
+    assert midi.coalesced == midi.frames - 1
+    assert midi.frames > 1
+    assert midi.batch_sizes[5] == 1  # 32-63 messages
+    assert counter.locked
+
+
+def test_idle(port, counter):
+    midi = ingest(port, counter)
+    send(port, mtc.stream(start=(1, 0, 0, 0), rate=RATE_30, frames=2))
+    midi.drain(TS)
+
+    assert midi.drain(TS + 1000000) == 0
+    assert not midi.is_mtc
+    assert not midi.is_frame
+    assert midi.batches == 1  # Empty drains are not batches
+
+
+def test_max_reads(port, counter):
+    """
+    A flooded bus is drained over several iterations.
+    """
+    midi = ingest(port, counter, max_reads=2, in_buf_size=8)
+    sent = send(port, mtc.stream(start=(1, 0, 0, 0), rate=RATE_30, frames=8, with_full_frame=False))
+
+    assert midi.drain(TS) == 8  # 2 reads of 4 Quarter Frames
+    assert midi.more
+    ingested = 8
+    while midi.more:
+        ingested += midi.drain(TS)
+    assert ingested == sent
+    assert midi.batches == sent // 8
+
+
+def test_clock_is_not_mtc(port, counter):
+    midi = ingest(port, counter)
+    port.send(bytes((TIMING_CLOCK,)) * 6)
+
+    assert midi.drain(TS) == 0
+    assert midi.is_clock
+    assert not midi.is_position
+    assert not midi.is_mtc
+    assert midi.batches == 0
@@ -0,0 +1,119 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import random
+
+import pytest
+
+from midirouter import MIDIRouter
+from mtcframecounter import MTCFrameCounter
+from rawmidi import RawMTCInput
+from sim import mtc
+from timecode import RATE_23976, RATE_24, RATE_2997_NDF, RATE_30
+
+START_NS = 1000000000
+_PULLDOWN = {RATE_24: RATE_23976, RATE_30: RATE_2997_NDF}
+
+
+def play(port, events, counter: MTCFrameCounter = None) -> (MTCFrameCounter, int):
+    """
+    Feeds a timed MTC stream to a counter, message by message.
+
+    Returns the counter and the timestamp of the last message.
+    """
+    if counter is None:
+        counter = MTCFrameCounter()
+    router = MIDIRouter()
+    counter.register(router)
+    midi = RawMTCInput(port, router)
+    ts = START_NS
+    for offset, data in events:
+        ts = START_NS + int(offset * 1000000)
+        port.send(data)
+        router.round()
+        midi.poll(ts)
+        counter.update(ts)
+    return counter, ts
+
+
+def test_lock(port):
+    counter, _ = play(port, mtc.stream(start=(1, 0, 0, 0), rate=RATE_30, frames=60))
+    assert counter.locked
+    assert counter.running
+    assert counter.direction == 1
+    assert counter.tc.rate == RATE_30
+    assert counter.timecode == '01:00:02:00'  # The last sequence completes 2 frames later
+
+
+def test_reverse(port):
+    counter, _ = play(port, mtc.stream(start=(1, 0, 0, 0), rate=RATE_30, frames=60, direction=-1))
+    assert counter.locked
+    assert counter.direction == -1
+    assert counter.timecode.startswith('00:59:58:')
+
+
+@pytest.mark.parametrize('rate, fps, expected', [
+    (RATE_24, 24, RATE_24),
+    (RATE_24, 24000 / 1001, RATE_23976),
+    (RATE_30, 30, RATE_30),
+    (RATE_30, 30000 / 1001, RATE_2997_NDF),
+])
+def test_pulldown(port, rate, fps, expected):
+    counter, _ = play(port, mtc.stream(start=(1, 0, 0, 0), rate=rate, frames=480, fps=fps))
+    assert counter.stats.settled
+    assert counter.locked
+    assert counter.tc.rate == expected
+    assert counter.pulldown == (expected != rate)
+
+
+@pytest.mark.parametrize('rate, fps, jitter', [
+    (RATE_30, 30000 / 1001, 1.0),
+    (RATE_30, 30, 0.5),
+    (RATE_30, 30, 1.0),
+    (RATE_24, 24, 1.0),
+    (RATE_24, 24000 / 1001, 1.0),
+])
+def test_pulldown_jitter(port, rate, fps, jitter):
+    """
+    A single relabel, once a whole drift window was measured, whatever the timestamps jitter (ms).
+    """
+    jittery = random.Random(rate)
+    events = [
+        (offset + jittery.uniform(-jitter, jitter), data)
+        for offset, data in mtc.stream(start=(1, 0, 0, 0), rate=rate, frames=600, fps=fps)
+    ]
+    counter = MTCFrameCounter()
+    labels = []
+    for offset, data in events:
+        play(port, [(offset, data)], counter)
+        if not labels or labels[-1] != counter.tc.rate:
+            labels.append(counter.tc.rate)
+    expected = rate if fps in (24, 30) else _PULLDOWN[rate]
+    assert labels == ([rate, expected] if expected != rate else [rate])
+
+
+def test_freewheel_undone(port):
+    counter, ts = play(port, mtc.stream(start=(1, 0, 0, 0), rate=RATE_30, frames=60), MTCFrameCounter(freewheel=20))
+    received = counter.timecode
+    frame_ns = 1000000000 // 30
+
+    assert counter.update(ts + 5 * frame_ns)
+    assert counter.freewheeling
+    assert counter.timecode != received
+
+    assert counter.update(ts + 30 * frame_ns)
+    assert not counter.locked
+    assert not counter.running
+    assert counter.timecode == received
+
+
+def test_mmc_without_session(port):
+    counter, _ = play(port, [(0, bytes((0xF0, 0x7F, 0x7F, 0x06, 0x01, 0xF7)))])  # MMC Stop
+    assert not counter.in_session(START_NS)
+
+
+def test_mmc_stop(port):
+    events = mtc.stream(start=(1, 0, 0, 0), rate=RATE_30, frames=60)
+    events.append((events[-1][0] + 1, bytes((0xF0, 0x7F, 0x7F, 0x06, 0x01, 0xF7))))
+    counter, _ = play(port, events)
+    assert not counter.running
+    assert not counter.locked
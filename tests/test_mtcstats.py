@@ -0,0 +1,98 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import pytest
+
+from mtcstats import DRIFT_WINDOW, MTCStats
+
+START_NS = 1000000000
+QF_PERIOD = 1000000000 // 30 // 4  # ns
+
+
+def feed(stats: MTCStats, count: int, offsets=lambda index: 0, start_type: int = 0) -> int:
+    """
+    Accounts for forward Quarter Frames at 30 fps, each shifted by offsets(index) ns.
+
+    Returns the timestamp of the last one.
+    """
+    ts = START_NS
+    for index in range(count):
+        ts = START_NS + index * QF_PERIOD + offsets(index)
+        stats.quarter_frame((start_type + index) & 0b111, ts, 1, QF_PERIOD)
+    return ts
+
+
+def test_batched_quarter_frames():
+    stats = MTCStats()
+    # Every 8th Quarter Frame is drained with the next one
+    feed(stats, 4 * 30 * 5, lambda index: QF_PERIOD if index % 8 == 0 else 0)
+    assert stats.jitter < QF_PERIOD // 10
+
+
+def test_clean_stream():
+    stats = MTCStats()
+    feed(stats, DRIFT_WINDOW + 2)
+    assert stats.quarter_frames == DRIFT_WINDOW + 2
+    assert (stats.missed, stats.out_of_order, stats.invalid) == (0, 0, 0)
+    assert stats.jitter == 0
+    assert stats.quality(QF_PERIOD) == 3
+    assert stats.settled
+    assert stats.drift(30) == pytest.approx(0, abs=1)
+
+
+@pytest.mark.parametrize('ppm', [-1000, 100, 1000])
+def test_drift(ppm):
+    for count, settled in ((DRIFT_WINDOW // 2, False), (DRIFT_WINDOW + 2, True)):
+        stats = MTCStats()
+        feed(stats, count, lambda index: -index * QF_PERIOD * ppm // 1000000)
+        assert stats.settled == settled
+        # From the current span until a window is complete
+        assert stats.drift(30) == pytest.approx(ppm, rel=0.01)
+
+
+def test_missed():
+    stats = MTCStats()
+    ts = feed(stats, 8)
+    stats.quarter_frame(3, ts + 4 * QF_PERIOD, 1, QF_PERIOD)  # 0 to 2 lost
+    assert stats.missed == 3
+    assert stats.out_of_order == 0
+
+
+def test_lost_sequences():
+    """
+    Whole lost sequences do not show in the types: they are counted from the time.
+    """
+    stats = MTCStats()
+    feed(stats, 16, lambda index: QF_PERIOD * 8 * 2 if index >= 8 else 0)
+    assert stats.missed == 16
+
+
+def test_out_of_order():
+    stats = MTCStats()
+    ts = feed(stats, 8)
+    stats.quarter_frame(7, ts + QF_PERIOD, 1, QF_PERIOD)  # Repeated
+    stats.quarter_frame(5, ts + 2 * QF_PERIOD, 1, QF_PERIOD)  # Late
+    assert stats.out_of_order == 2
+    assert stats.missed == 0
+
+
+def test_direction_change():
+    stats = MTCStats()
+    ts = feed(stats, DRIFT_WINDOW // 2, lambda index: -index * QF_PERIOD // 1000)  # 1000 ppm fast
+    assert stats.drift(30) > 0
+    stats.quarter_frame(0, ts + QF_PERIOD, -1, QF_PERIOD)  # 7 to 0 backward
+    assert stats.drift(30) == 0.0  # Span restarted
+    assert stats.missed == stats.out_of_order == 0
+
+
+@pytest.mark.parametrize('jitter, quality', [(0, 3), (QF_PERIOD // 10, 2), (QF_PERIOD // 2, 1)])
+def test_quality(jitter, quality):
+    stats = MTCStats()
+    feed(stats, 4 * 30 * 5, lambda index: jitter if index % 2 else 0)
+    assert stats.quality(QF_PERIOD) == quality
+
+
+def test_report(capsys):
+    stats = MTCStats()
+    feed(stats, 16)
+    stats.report(30)
+    assert capsys.readouterr().out.startswith("MTC: 16 QF, 0 missed, 0 out of order, 0 invalid, jitter 0 µs")
@@ -0,0 +1,108 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import pytest
+
+from midirouter import ANY, CLOCK, MCU, MTC, TIMING_CLOCK, MIDIRouter
+from rawmidi import RawMTCInput
+
+FF_PREFIX = bytes((0x7F, ANY, 0x01, 0x01))
+FF_LEN = 8
+FULL_FRAME = bytes((0xF0, 0x7F, 0x7F, 0x01, 0x01, 0x21, 0x02, 0x03, 0x04, 0xF7))
+
+
+class Recorder:
+    """
+    Records the messages routed to its handlers.
+    """
+
+    def __init__(self) -> None:
+        self.messages = []
+        self.sysex = []
+
+    def on_message(self, data1: int, data2: int, ts: int) -> bool:
+        self.messages.append((data1, data2))
+        return True
+
+    def on_sysex(self, buf, start: int, end: int, ts: int) -> bool:
+        self.sysex.append(bytes(buf[start:end]))
+        return True
+
+
+@pytest.fixture
+def recorder() -> Recorder:
+    return Recorder()
+
+
+@pytest.fixture
+def router(recorder) -> MIDIRouter:
+    router = MIDIRouter()
+    router.register(0xB0, recorder.on_message, MCU)
+    router.register(TIMING_CLOCK, recorder.on_message, CLOCK)
+    router.register_sysex(FF_PREFIX, recorder.on_sysex, MTC, FF_LEN)
+    return router
+
+
+def feed(port, router, data: bytes, in_buf_size: int = 64) -> None:
+    midi = RawMTCInput(port, router, in_buf_size)
+    port.send(data)
+    router.round()
+    while midi.poll(0) and midi.more:
+        pass
+
+
+def test_running_status(port, router, recorder):
+    feed(port, router, bytes((0xB0, 0x40, 0x01, 0x41, 0x02, 0x42, 0x03)))
+    assert recorder.messages == [(0x40, 0x01), (0x41, 0x02), (0x42, 0x03)]
+    assert router.received[MCU] == 3
+
+
+def test_running_status_across_reads(port, router, recorder):
+    feed(port, router, bytes((0xB0, 0x40, 0x01, 0x41, 0x02, 0x42, 0x03)), in_buf_size=2)
+    assert recorder.messages == [(0x40, 0x01), (0x41, 0x02), (0x42, 0x03)]
+
+
+def test_real_time_inside_running_status(port, router, recorder):
+    feed(port, router, bytes((0xB0, 0x40, 0xF8, 0x01, 0x41, 0x02)))
+    assert recorder.messages == [(0, 0), (0x40, 0x01), (0x41, 0x02)]
+
+
+def test_system_common_cancels_running_status(port, router, recorder):
+    feed(port, router, bytes((0xB0, 0x40, 0x01, 0xF6, 0x41, 0x02)))
+    assert recorder.messages == [(0x40, 0x01)]
+
+
+def test_real_time_inside_sysex(port, router, recorder):
+    data = FULL_FRAME[:5] + bytes((TIMING_CLOCK,)) + FULL_FRAME[5:]
+    feed(port, router, data)
+    assert recorder.messages == [(0, 0)]
+    assert recorder.sysex == [FULL_FRAME[1:-1]]
+    assert router.received[CLOCK] == 1
+    assert router.received[MTC] == 1
+
+
+def test_oversized_sysex(port, router, recorder):
+    data = FULL_FRAME[:-1] + bytes(4) + FULL_FRAME[-1:]
+    feed(port, router, data + FULL_FRAME)
+    assert router.oversized == 1
+    assert router.dropped == 0
+    assert recorder.sysex == [FULL_FRAME[1:-1]]  # Only the next one
+
+
+def test_unmatched_sysex(port, router, recorder):
+    data = bytes((0xF0, 0x43, 0x10, 0x4C, 0x00, 0x00, 0x7E, 0x00, 0xF7))
+    feed(port, router, data + FULL_FRAME)
+    assert router.dropped == 1
+    assert router.oversized == 0
+    assert recorder.sysex == [FULL_FRAME[1:-1]]
+
+
+def test_sysex_terminated_by_status(port, router, recorder):
+    feed(port, router, FULL_FRAME[:-1] + bytes((0xB0, 0x40, 0x01)))
+    assert recorder.sysex == []
+    assert recorder.messages == [(0x40, 0x01)]
+
+
+def test_unregistered_dropped(port, router, recorder):
+    feed(port, router, bytes((0x90, 0x3C, 0x40, 0x3C, 0x00)))
+    assert router.dropped == 2
+    assert recorder.messages == []
@@ -0,0 +1,108 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import pytest
+
+import refreshcontroller
+from refreshcontroller import RefreshController
+
+FRAME_NS = 1000000000 // 60
+
+
+class Display:
+    """
+    A display stand-in recording the refresh calls. Refreshes may be refused, like displayio does when busy.
+    """
+
+    def __init__(self) -> None:
+        self.auto_refresh = True
+        self.refreshed = []
+        self.accept = True
+
+    def refresh(self, *, target_frames_per_second: int = None, minimum_frames_per_second: int = 0) -> bool:
+        self.refreshed.append((target_frames_per_second, minimum_frames_per_second))
+        return self.accept
+
+
+@pytest.fixture
+def display() -> Display:
+    return Display()
+
+
+@pytest.fixture
+def refresher(display) -> RefreshController:
+    refresher = RefreshController(display, max_fps=60)
+    refresher.commit(0)  # Whatever was drawn before
+    return refresher
+
+
+def test_auto_refresh_off(display):
+    RefreshController(display)
+    assert not display.auto_refresh
+
+
+def test_initial_frame(display):
+    refresher = RefreshController(display)
+    assert refresher.pending
+    assert refresher.commit(0)
+    assert display.refreshed == [(None, 0)]  # Never waits nor skips
+
+
+def test_only_changes(display, refresher):
+    assert not refresher.commit(FRAME_NS)
+    assert not refresher.commit(2 * FRAME_NS)
+    assert len(display.refreshed) == 1
+
+
+def test_once_per_frame(display, refresher):
+    """
+    Several changes of one pass are shown together by a single refresh.
+    """
+    refresher.invalidate()
+    refresher.invalidate()
+    assert refresher.commit(FRAME_NS)
+    assert not refresher.pending
+    assert refresher.refreshes == 2
+    assert len(display.refreshed) == 2
+
+
+def test_cap(display, refresher):
+    """
+    A change held back by the cap is refreshed by a later pass.
+    """
+    refresher.invalidate()
+    assert not refresher.commit(FRAME_NS // 2)
+    assert refresher.held == 1
+    assert refresher.pending
+    assert refresher.commit(FRAME_NS)
+    assert len(display.refreshed) == 2
+
+
+def test_refused(display, refresher):
+    refresher.invalidate()
+    display.accept = False
+    assert not refresher.commit(FRAME_NS)
+    assert refresher.pending
+    display.accept = True
+    assert refresher.commit(FRAME_NS + 1)
+    assert refresher.refreshes == 2
+
+
+def test_latency(display, monkeypatch):
+    ns = [0]
+    monkeypatch.setattr(refreshcontroller.time, 'monotonic_ns', lambda: ns[0])
+    latencies = []
+    refresher = RefreshController(display, record=latencies.append)
+    refresher.commit(0)
+
+    ns[0] = 1000
+    refresher.invalidate()
+    ns[0] = 3000
+    refresher.invalidate()  # Latency counts from the first change
+    ns[0] = FRAME_NS + 5000
+    refresher.commit(FRAME_NS)
+    assert latencies == [0, FRAME_NS + 4000]
+
+
+def test_report(refresher, capsys):
+    refresher.report()
+    assert capsys.readouterr().out == "Display: 1 refreshes, 0 passes held back by the cap\n"
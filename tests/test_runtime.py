@@ -0,0 +1,119 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import pytest
+
+import runtime
+from runtime import MAX_DEFER, PRIORITY_DISPLAY, PRIORITY_MIDI, PRIORITY_SYNC, Runtime
+
+BUSY_RUNS = 30
+RUNS = 60
+
+
+class Stop(Exception):
+    """
+    Ends a runtime running forever.
+    """
+
+
+class Steps:
+    """
+    Records the order the steps run in.
+    The MIDI step has pending work for its first busy runs and stops the runtime after RUNS.
+    """
+
+    def __init__(self, busy: int = BUSY_RUNS) -> None:
+        self.busy = busy
+        self.log = []
+
+    def midi_step(self, ts: int) -> bool:
+        self.log.append('midi')
+        if self.log.count('midi') >= RUNS:
+            raise Stop
+        return self.log.count('midi') <= self.busy
+
+    def display_step(self, ts: int) -> bool:
+        self.log.append('display')
+        return False
+
+    def sync_step(self, ts: int) -> bool:
+        self.log.append('sync')
+        return False
+
+    def runs(self, name: str, start: int, end: int) -> int:
+        """
+        The runs of a step between two MIDI runs, by index.
+        """
+        midi = [index for index, step in enumerate(self.log) if step == 'midi']
+        return self.log[midi[start]:midi[end]].count(name)
+
+
+@pytest.fixture(params=['asyncio', 'loop'])
+def scheduler(request, monkeypatch) -> Runtime:
+    if request.param == 'loop':
+        monkeypatch.setattr(runtime, 'asyncio', None)
+    return Runtime()
+
+
+def run(scheduler: Runtime) -> None:
+    with pytest.raises(Stop):
+        scheduler.run()
+
+
+def test_priorities(scheduler):
+    steps = Steps(busy=0)
+    scheduler.add(steps.sync_step, priority=PRIORITY_SYNC)
+    scheduler.add(steps.display_step, priority=PRIORITY_DISPLAY)
+    scheduler.add(steps.midi_step, priority=PRIORITY_MIDI)
+    assert [task.name for task in scheduler.tasks] == ['midi_step', 'display_step', 'sync_step']
+
+    run(scheduler)
+    assert steps.log[:3] == ['midi', 'display', 'sync']
+    assert steps.runs('display', 0, RUNS - 1) == steps.runs('sync', 0, RUNS - 1) == RUNS - 1
+
+
+def test_busy_defers(scheduler):
+    """
+    Lower priorities give way to pending MIDI input, for a bounded number of passes.
+    """
+    steps = Steps()
+    scheduler.add(steps.midi_step, priority=PRIORITY_MIDI)
+    scheduler.add(steps.display_step, priority=PRIORITY_DISPLAY)
+
+    run(scheduler)
+    busy_runs = steps.runs('display', 0, BUSY_RUNS)
+    assert 1 <= busy_runs <= BUSY_RUNS // MAX_DEFER
+    assert steps.runs('display', BUSY_RUNS, RUNS - 1) == RUNS - BUSY_RUNS - 1  # Every pass once idle
+
+
+def test_shared_priority(scheduler):
+    """
+    A task becoming idle doesn't clear the pending work of another of the same priority.
+    """
+    steps = Steps()
+    scheduler.add(steps.midi_step, priority=PRIORITY_MIDI)
+    scheduler.add(lambda ts: False, priority=PRIORITY_MIDI, name='idle_step')
+    scheduler.add(steps.display_step, priority=PRIORITY_DISPLAY)
+
+    run(scheduler)
+    assert steps.runs('display', 1, BUSY_RUNS) <= BUSY_RUNS // MAX_DEFER
+
+
+def test_interval(monkeypatch):
+    """
+    On the plain loop: asyncio sleeps on its event loop clock.
+    """
+    monkeypatch.setattr(runtime, 'asyncio', None)
+    scheduler = Runtime()
+    steps = Steps(busy=0)
+    ns = [0]
+
+    def monotonic_ns() -> int:
+        ns[0] += 1000000  # 1 ms per reading
+        return ns[0]
+
+    monkeypatch.setattr(runtime.time, 'monotonic_ns', monotonic_ns)
+    scheduler.add(steps.midi_step, priority=PRIORITY_MIDI)
+    scheduler.add(steps.sync_step, interval=1000, priority=PRIORITY_SYNC)
+
+    run(scheduler)
+    assert steps.runs('sync', 0, RUNS - 1) == 1
@@ -0,0 +1,46 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+End-to-end scenarios on the whole firmware.
+"""
+from sim import mtc
+
+GREEN = 0x00FF00  # Locked
+
+
+def colors(snapshot) -> set:
+    return {pixel for row in snapshot for pixel in row}
+
+
+def test_boot(sim):
+    ns = sim.run(1500)
+    assert ns['MODE'] == 'Clock'
+    assert '#' in sim.ascii()
+
+
+def test_mtc_lock_then_timeout(sim):
+    snapshots = {}
+    sim.send_midi_stream(500, mtc.stream(start=(1, 0, 0, 0), frames=60))
+    sim.at(2000, lambda: snapshots.__setitem__('locked', sim.snapshot()))
+    ns = sim.run(2000 + 30000 + 2000)  # Past MTC_TIMEOUT
+
+    assert GREEN in colors(snapshots['locked'])
+
+    assert ns['MODE'] == 'Clock'
+    assert ns['mtc_counter'].timecode == '01:00:02:00'
+    assert not ns['mtc_counter'].running
+    assert GREEN not in colors(sim.snapshot())
+
+
+def test_mmc_alone_is_not_mtc(sim):
+    sim.send_midi(500, bytes((0xF0, 0x7F, 0x7F, 0x06, 0x02, 0xF7)))  # MMC Play
+    sim.send_midi(600, bytes((0xF0, 0x7E, 0x7F, 0x7E, 0x00, 0xF7)))  # NAK
+    ns = sim.run(1500)
+    assert ns['MODE'] == 'Clock'
+
+
+def test_network_start_does_not_block(sim):
+    ns = sim.run(5000)
+    assert ns['esp'] is not None
+    assert ns['esp'].connects
+    assert sim.longest_sleep < 20000000  # ns
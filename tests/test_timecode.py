@@ -0,0 +1,59 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+import pytest
+
+from timecode import RATE_24, RATE_25, RATE_2997_DF, RATE_2997_NDF, RATE_30, Timecode
+
+FPS = {RATE_24: 24, RATE_25: 25, RATE_30: 30, RATE_2997_NDF: 30, RATE_2997_DF: 30}
+FRAMES_PER_DAY = {rate: fps * 86400 for rate, fps in FPS.items()}
+FRAMES_PER_DAY[RATE_2997_DF] -= 2 * (24 * 60 - 24 * 6)
+
+
+def fields(tc: Timecode) -> (int, int, int, int):
+    return tc.hours, tc.minutes, tc.seconds, tc.frames
+
+
+@pytest.mark.parametrize('rate', sorted(FRAMES_PER_DAY))
+def test_round_trip(rate):
+    # Every 97th frame of the day and every frame of the first 11 minutes (drop frame boundaries)
+    indexes = list(range(0, FRAMES_PER_DAY[rate], 97)) + list(range(30 * 60 * 11))
+    tc = Timecode(rate)
+    other = Timecode(rate)
+    for index in indexes:
+        tc.index = index
+        other.set(*fields(tc))
+        assert other.index == index, str(tc)
+        assert fields(other) == fields(tc)
+
+
+@pytest.mark.parametrize('start, expected', [
+    ((0, 0, 59, 29), (0, 1, 0, 2)),  # Frames 00 and 01 dropped
+    ((0, 9, 59, 29), (0, 10, 0, 0)),  # Except every 10th minute
+    ((0, 59, 59, 29), (1, 0, 0, 0)),
+])
+def test_drop_frame_next(start, expected):
+    tc = Timecode(RATE_2997_DF)
+    tc.set(*start)
+    tc.add(1)
+    assert fields(tc) == expected
+
+
+def test_drop_frame_skipped_label():
+    tc = Timecode(RATE_2997_DF)
+    tc.set(0, 1, 0, 0)
+    assert fields(tc) == (0, 1, 0, 2)
+    assert tc.index == 30 * 60
+
+
+@pytest.mark.parametrize('rate', sorted(FRAMES_PER_DAY))
+def test_wrap(rate):
+    tc = Timecode(rate)
+    tc.add(-1)
+    assert tc.index == FRAMES_PER_DAY[rate] - 1
+    assert fields(tc) == (23, 59, 59, FPS[rate] - 1)
+    tc.add(2)
+    assert fields(tc) == (0, 0, 0, 1)
+
+    tc.set(23, 59, 59, 0)
+    tc.add(FRAMES_PER_DAY[rate])
+    assert fields(tc) == (23, 59, 59, 0)
@@ -0,0 +1,178 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+The time synchronization is imported with the hardware stand-ins: its ticks arithmetic comes with the board RTC.
+"""
+import random
+
+import pytest
+
+STEP = 10  # ms
+
+
+class Network:
+    """
+    A network that connects after a few ms, or never, and whose time server may fail.
+    """
+
+    def __init__(self, connect_time: int = 100, up: bool = True, valid: bool = True) -> None:
+        self.connect_time = connect_time
+        self.up = up
+        self.valid = valid
+        self.ticks = 0
+        self.connecting = None
+        self.applied = 0
+
+    def connect(self) -> None:
+        if not self.up:
+            raise OSError("No such network")
+        self.connecting = self.ticks
+
+    def connected(self) -> bool:
+        return self.connecting is not None and self.ticks - self.connecting >= self.connect_time
+
+    def query(self) -> bool:
+        if not self.valid:
+            raise RuntimeError("Timed out")
+        return True
+
+    def apply(self) -> None:
+        self.applied += 1
+
+
+@pytest.fixture
+def timesync(fakes):
+    import timesync
+    return timesync
+
+
+def sync(timesync, network: Network, interval: int = 60 * 60 * 24):
+    return timesync.TimeSync(network.connect, network.connected, network.query, network.apply, network.ticks, interval)
+
+
+def run(sync, network: Network, until: int) -> [(int, int)]:
+    """
+    Steps every STEP ms.
+
+    Returns the (ticks, state) transitions.
+    """
+    transitions = []
+    state = sync.state
+    while network.ticks < until:
+        network.ticks += STEP
+        if sync.step(network.ticks) != state:
+            state = sync.state
+            transitions.append((network.ticks, state))
+    return transitions
+
+
+def test_sync(timesync, capsys):
+    network = Network()
+    time_sync = sync(timesync, network)
+    transitions = run(time_sync, network, 2000)
+
+    assert [state for _, state in transitions] == [
+        timesync.CONNECTING, timesync.SETTLE, timesync.QUERY, timesync.APPLY, timesync.IDLE,
+    ]
+    assert transitions[2][0] - transitions[1][0] == timesync.TimeSync.SETTLE_TIME
+    assert network.applied == 1
+    assert time_sync.synced
+    assert not time_sync.busy
+    assert time_sync.attempts == 1
+    assert time_sync.failures == 0
+
+    time_sync.report()
+    assert "1 attempts, 1 successes, 0 failures" in capsys.readouterr().out
+
+
+def test_already_connected(timesync):
+    network = Network(connect_time=0)
+    network.connecting = 0
+    time_sync = sync(timesync, network)
+    assert [state for _, state in run(time_sync, network, 100)] == [timesync.QUERY, timesync.APPLY, timesync.IDLE]
+
+
+def test_interval(timesync):
+    network = Network()
+    time_sync = sync(timesync, network, interval=10)
+    run(time_sync, network, 2000)
+    assert run(time_sync, network, 11000)[:1] == []
+    assert run(time_sync, network, 12000)[0][1] == timesync.CONNECT
+    run(time_sync, network, 14000)
+    assert network.applied == 2
+
+
+def backoffs(timesync, transitions: [(int, int)]) -> [int]:
+    """
+    The durations of the backoff waits.
+    """
+    return [
+        ticks - transitions[index - 1][0]
+        for index, (ticks, state) in enumerate(transitions)
+        if state == timesync.CONNECT and index and transitions[index - 1][1] == timesync.BACKOFF
+    ]
+
+
+@pytest.mark.parametrize('network', [
+    Network(up=False),  # Connection error
+    Network(connect_time=10 ** 9),  # Connection timeout
+    Network(valid=False),  # Time server error
+], ids=['error', 'timeout', 'query'])
+def test_backoff(timesync, network, capsys):  # Quiet failures
+    """
+    Exponential, with jitter, up to the limit.
+    """
+    time_sync = sync(timesync, network)
+    waits = backoffs(timesync, run(time_sync, network, 60 * 60 * 1000))
+
+    assert len(waits) >= 9
+    for failure, wait in enumerate(waits):
+        delay = min(timesync.TimeSync.BACKOFF_BASE << failure, timesync.TimeSync.BACKOFF_MAX)
+        assert delay // 2 <= wait <= delay + STEP
+    assert max(waits) > timesync.TimeSync.BACKOFF_MAX // 2
+    assert time_sync.failures >= len(waits)
+    assert not time_sync.synced
+
+
+def test_jitter(timesync, monkeypatch):
+    """
+    Devices failing together retry apart.
+    """
+    waits = []
+    for seed in range(2):
+        monkeypatch.setattr(timesync, 'random', random.Random(seed))
+        network = Network(up=False)
+        waits.append(backoffs(timesync, run(sync(timesync, network), network, 5 * 60 * 1000)))
+    assert waits[0] != waits[1]
+
+
+def test_recovery(timesync):
+    """
+    A success resets the backoff.
+    """
+    network = Network(up=False)
+    time_sync = sync(timesync, network)
+    run(time_sync, network, 10 * 60 * 1000)
+    assert time_sync.state in (timesync.BACKOFF, timesync.CONNECT)
+
+    network.up = True
+    time_sync.request(network.ticks)
+    assert time_sync.state == timesync.CONNECT
+    run(time_sync, network, network.ticks + 2000)
+    assert time_sync.synced
+    assert time_sync.state == timesync.IDLE
+
+    network.up = False
+    network.connecting = None
+    time_sync.request(network.ticks)
+    waits = backoffs(timesync, run(time_sync, network, network.ticks + 60000))
+    assert waits[0] <= timesync.TimeSync.BACKOFF_BASE + STEP
+
+
+def test_state_time(timesync):
+    network = Network()
+    time_sync = sync(timesync, network)
+    run(time_sync, network, 2000)
+    assert time_sync.state_entries[timesync.IDLE] == 1
+    assert time_sync.state_time[timesync.SETTLE] == timesync.TimeSync.SETTLE_TIME
+    assert time_sync.state_time[timesync.CONNECTING] == network.connect_time
@@ -0,0 +1,113 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+The views are imported with the hardware stand-ins: they draw with displayio.
+"""
+import os
+
+import pytest
+
+from sim.core import SRC_DIR
+
+MODES = ('clock', 'mtc', 'hui')
+WIDTH = 64
+HEIGHT = 32
+COLORS = (0x000000, 0xFF0000, 0xFFFF00, 0x00FF00)
+
+
+@pytest.fixture
+def displayio(fakes):
+    import displayio
+    return displayio
+
+
+@pytest.fixture
+def views(displayio):
+    from viewmanager import ViewManager
+
+    views = ViewManager('clock')
+    for mode in MODES:
+        views.add(mode, displayio.Group())
+    return views
+
+
+def visible(views) -> [bool]:
+    return [not view.hidden for view in views]
+
+
+def test_initial_view(views):
+    assert views.mode == 'clock'
+    assert visible(views) == [True, False, False]
+    assert len(views) == len(MODES)
+
+
+def test_show(views):
+    layers = list(views)
+    assert views.show('mtc')
+    assert views.mode == 'mtc'
+    assert visible(views) == [False, True, False]
+    assert list(views) == layers  # No membership change
+    assert views.switches == 1
+
+
+def test_show_current(views):
+    assert not views.show('clock')
+    assert views.switches == 0
+    assert visible(views) == [True, False, False]
+
+
+def test_switch_back(views):
+    views.show('hui')
+    views.show('clock')
+    assert visible(views) == [True, False, False]
+    assert views.switches == 2
+
+
+@pytest.fixture
+def overlay(displayio):
+    from glyphcells import GlyphSheet
+    from statusoverlay import StatusOverlay
+
+    palette = displayio.Palette(len(COLORS))
+    for index, color in enumerate(COLORS):
+        palette[index] = color
+    return StatusOverlay(GlyphSheet(atlas=os.path.join(SRC_DIR, 'gt.atlas')), palette, WIDTH, HEIGHT)
+
+
+def test_overlay_layout(overlay):
+    arrow, rate = overlay
+    assert arrow[0] == 0  # Dot
+    assert rate.y + rate.height == HEIGHT
+    assert rate.x + rate.width // 2 == pytest.approx(WIDTH // 2, abs=1)
+
+
+def test_overlay_arrows(overlay):
+    arrow, _ = overlay
+    bitmap = arrow.bitmap
+    size = overlay.ARROW_SIZE
+    forward = [[bitmap[size + x, y] for x in range(size)] for y in range(size)]
+    reverse = [[bitmap[2 * size + x, y] for x in range(size)] for y in range(size)]
+    assert reverse == [row[::-1] for row in forward]
+    assert [row[0] for row in forward] == [1] * size  # Narrows to the right
+    assert sum(row[size // 2] for row in forward) == 1
+
+
+def test_overlay_update(overlay):
+    from statusoverlay import LOCKED, RUNNING, STOPPED
+
+    arrow, rate = overlay
+    assert overlay.update(1, '30', RUNNING)
+    assert arrow[0] == 1
+    assert rate.text == '30'
+    assert rate.color == COLORS[RUNNING]
+    assert arrow.pixel_shader[1] == COLORS[RUNNING]
+
+    assert not overlay.update(1, '30', RUNNING)
+
+    assert overlay.update(-1, '30', LOCKED)
+    assert arrow[0] == 2
+    assert rate.color == COLORS[LOCKED]
+
+    assert overlay.update(0, '29.97', STOPPED)
+    assert arrow[0] == 0
+    assert rate.text == '29.97'
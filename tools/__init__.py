@@ -0,0 +1,9 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Host-side build tools for the Network Studio Clock firmware.
+
+Run from the repository root, e.g.:
+
+    python -m tools.glyphatlas
+"""
@@ -0,0 +1,135 @@
+# SPDX-FileCopyrightText: 2021-2022 Raphaël Doursenaud <rdoursenaud@free.fr>
+# SPDX-License-Identifier: MIT
+"""
+Glyph atlas compiler.
+
+Converts a BDF font into the ready-to-use glyph atlas GlyphSheet loads at boot
+with a single read, instead of parsing the font and rendering every glyph on the board.
+
+Atlas format:
+
+    Offset  Size    Content
+    0       4       b'GLA1'
+    4       1       Tile width
+    5       1       Tile height
+    6       1       Glyph count n
+    7       n       Charset, as ASCII codes. Space first.
+    7 + n   n       Horizontal advance by glyph
+    7 + 2n          1 bpp sprite sheet: n tiles wide, tile height rows.
+                    Rows are padded to a byte, first pixel in the most significant bit.
+
+Glyphs are placed in their tile the same way GlyphSheet renders a font.
+The charset defaults to every glyph of the font.
+"""
+import argparse
+import os
+
+MAGIC = b'GLA1'
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FONT = os.path.join(ROOT_DIR, 'src', 'gt.bdf')
+DEFAULT_OUTPUT = os.path.join(ROOT_DIR, 'src', 'gt.atlas')
+
+
+def parse_bdf(path: str) -> ((int, int, int, int), dict):
+    """
+    Reads a BDF font.
+
+    Returns the font bounding box and the glyphs by code point
+    as (advance, width, height, x offset, y offset, rows) where rows are bits integers, MSB first.
+    """
+    bounding_box = None
+    glyphs = {}
+    with open(path, encoding='utf-8') as f:
+        lines = iter(f.read().splitlines())
+    for line in lines:
+        fields = line.split()
+        if not fields:
+            continue
+        if fields[0] == 'FONTBOUNDINGBOX':
+            bounding_box = tuple(int(field) for field in fields[1:5])
+        elif fields[0] == 'STARTCHAR':
+            code = advance = bbx = None
+            rows = []
+            for line in lines:
+                fields = line.split()
+                if fields[0] == 'ENCODING':
+                    code = int(fields[1])
+                elif fields[0] == 'DWIDTH':
+                    advance = int(fields[1])
+                elif fields[0] == 'BBX':
+                    bbx = tuple(int(field) for field in fields[1:5])
+                elif fields[0] == 'BITMAP':
+                    for _ in range(bbx[1]):
+                        row = next(lines).strip()
+                        # Left align on the glyph width
+                        rows.append(int(row, 16) >> (len(row) * 4 - bbx[0]))
+                elif fields[0] == 'ENDCHAR':
+                    break
+            glyphs[code] = (advance,) + bbx + (rows,)
+    if bounding_box is None:
+        raise ValueError(f"{path}: no FONTBOUNDINGBOX")
+    return bounding_box, glyphs
+
+
+def compile_atlas(bounding_box: (int, int, int, int), glyphs: dict, charset: str) -> bytes:
+    """
+    Renders the charset glyphs into an atlas.
+    """
+    if not charset or charset[0] != ' ':
+        raise ValueError("The charset must start with a space")
+    width, height, x_offset, y_offset = bounding_box
+    baseline = height + y_offset
+    count = len(charset)
+    if max(width, height, count) > 0xFF:
+        raise ValueError("Atlas too large")
+
+    sheet_width = width * count
+    pixels = [[0] * sheet_width for _ in range(height)]
+    advances = bytearray(count)
+    for tile, char in enumerate(charset):
+        glyph = glyphs.get(ord(char))
+        if glyph is None:
+            continue  # Blank
+        advance, glyph_width, glyph_height, dx, dy, rows = glyph
+        advances[tile] = advance
+        dst_x = tile * width + dx - x_offset
+        dst_y = baseline - glyph_height - dy
+        for y, row in enumerate(rows):
+            for x in range(glyph_width):
+                if row >> (glyph_width - 1 - x) & 1:
+                    pixels[dst_y + y][dst_x + x] = 1
+
+    data = bytearray(MAGIC)
+    data += bytes((width, height, count))
+    data += charset.encode('ascii')
+    data += advances
+    row_bytes = (sheet_width + 7) // 8
+    for row in pixels:
+        packed = bytearray(row_bytes)
+        for x, pixel in enumerate(row):
+            if pixel:
+                packed[x >> 3] |= 0x80 >> (x & 7)
+        data += packed
+    return bytes(data)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('font', nargs='?', default=DEFAULT_FONT, help="BDF font (default: src/gt.bdf)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="atlas file (default: src/gt.atlas)")
+    parser.add_argument('--charset', help="characters to include, space first (default: every glyph)")
+    args = parser.parse_args()
+
+    bounding_box, glyphs = parse_bdf(args.font)
+    charset = args.charset
+    if charset is None:
+        charset = ' ' + ''.join(chr(code) for code in sorted(glyphs) if code != 0x20)
+    atlas = compile_atlas(bounding_box, glyphs, charset)
+    with open(args.output, 'wb') as f:
+        f.write(atlas)
+    print(f"{args.output}: {len(charset)} glyphs {charset!r}, {bounding_box[0]}x{bounding_box[1]}, {len(atlas)} bytes")
+
+
+if __name__ == '__main__':
+    main()